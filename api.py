@@ -0,0 +1,325 @@
+"""Lightweight async HTTP API over the candy catalog, without Streamlit.
+
+Endpoints (JSON in, JSON out):
+
+    GET  /health    dataset version and row count
+    POST /filter    {"flags": [...], "sugar_range": [0, 100], "price_range": [0, 100],
+                     "sort_by": "winpercent", "descending": true,
+                     "page": 1, "page_size": 25}
+    POST /analyze   {"candies": ["Twix", "Snickers"], "intervals": false}
+    POST /similar   {"candy": "Twix", "k": 5, "require": [], "exclude": ["peanutyalmondy"],
+                     "sugar_range": [0, 100], "price_range": [0, 100]}
+    POST /predict   {"flags": ["chocolate"], "sugar": 50, "price": 50}
+    POST /votes     {"votes": [["Twix", "Snickers", "Twix"], ...]}  (with --matchups)
+
+One ``CandyCatalog`` (memory-mapped data plus filter index) is loaded at start
+and shared by every connection. Connections are kept alive (HTTP/1.1), so a
+client can send many requests over one socket.
+
+The catalog is reloaded in the background when the CSV is replaced (see
+``candy_reload``) and swapped in at the next refresh. With ``--shared``, it is
+attached from a ``candy_shared`` publisher instead, so several API processes
+share one copy of the data, and a newly published dataset is picked up the
+same way.
+
+With ``--matchups``, head-to-head votes (candy a, candy b, winner) posted to
+/votes or appended by other producers go to that log, and the served win
+rates are refreshed from it every ``--refresh`` seconds. A new dataset whose
+candies differ from the log's (or are in another order) is not swapped in.
+
+    python api.py --port 8000 --matchups data/votes.log
+    python api.py --port 8001 --shared candy
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import traceback
+
+from candy_core import DATA_PATH
+from candy_matchups import MatchupTracker
+from candy_paging import SORT_COLUMNS
+from candy_reload import DatasetManager
+from candy_shared import SharedCatalog
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_PAGE_SIZE = 1000
+REFRESH_SECONDS = 5
+# Decimals of the CSV's percents; averages are rounded to them so the sums'
+# float64 noise (79.15834699999999) isn't passed on
+DECIMALS = 6
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class BadRequest(Exception):
+    pass
+
+
+class LiveCatalog:
+    """The catalog being served, swapped for a new one as live votes arrive or
+    its source (a ``DatasetManager`` or ``SharedCatalog``) has a new dataset."""
+
+    def __init__(self, catalog, matchup_log=None, source=None):
+        self.matchup_log = matchup_log
+        self.source = source
+        self.source_version = source.version() if source else None
+        self.tracker = None
+        self._load(catalog)
+
+    def _load(self, catalog):
+        # Raises ValueError if the log's votes are for another list of candies
+        tracker = None
+        if self.matchup_log:
+            tracker = MatchupTracker(self.matchup_log, catalog.names, catalog.store.column('winpercent'))
+        self.base = self.current = catalog
+        self.tracker = tracker
+        if tracker is not None:
+            self.refresh()
+
+    def refresh(self):
+        if self.source is not None and self.source.version() != self.source_version:
+            self.source_version = self.source.version()
+            try:
+                self._load(self.source.attach(self.source_version))
+            except ValueError as e:
+                # The vote log's positions would credit the wrong candies
+                print(f"Keeping the previous dataset: {e}", file=sys.stderr)
+        elif self.tracker is not None and self.tracker.refresh():
+            self.current = self.base.with_winpercent(self.tracker.winpercent)
+
+
+def _range(body, key):
+    value = body.get(key, [0, 100])
+    if (not isinstance(value, list) or len(value) != 2
+            or not all(isinstance(v, (int, float)) for v in value)
+            or not 0 <= value[0] <= value[1] <= 100):
+        raise BadRequest(f"{key} must be [low, high] between 0 and 100")
+    return value
+
+
+def _names(body, key):
+    value = body.get(key, [])
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise BadRequest(f"{key} must be a list of characteristic names")
+    return value
+
+
+def handle_filter(live, body):
+    catalog = live.current
+    flags = _names(body, 'flags')
+    sort_by = body.get('sort_by', 'winpercent')
+    if sort_by not in SORT_COLUMNS:
+        raise BadRequest(f"sort_by must be one of {', '.join(SORT_COLUMNS)}")
+    page = body.get('page', 1)
+    page_size = body.get('page_size', 25)
+    if not isinstance(page, int) or not isinstance(page_size, int) or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise BadRequest(f"page and page_size must be integers, page_size at most {MAX_PAGE_SIZE}")
+
+    try:
+        positions = catalog.filter(flags, _range(body, 'sugar_range'), _range(body, 'price_range'))
+    except ValueError as e:
+        raise BadRequest(str(e))
+    page_positions, n_pages = catalog.pager.page(
+        positions, sort_by, bool(body.get('descending', True)), page, page_size)
+    return {
+        'total': len(positions),
+        'page': min(max(1, page), n_pages),
+        'pages': n_pages,
+        'candies': catalog.rows(page_positions),
+    }
+
+
+def handle_analyze(live, body):
+    names = body.get('candies')
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        raise BadRequest("candies must be a list of candy names")
+    try:
+        result = live.current.analyze_selection(names)
+        for key in ('averages', 'overall', 'deltas'):
+            result[key] = {metric: round(float(value), DECIMALS) for metric, value in result[key].items()}
+        if body.get('intervals'):
+            # Bootstrap intervals and p-values for the deltas
+            result['intervals'] = live.current.selection_intervals(names)
+        return result
+    except KeyError as e:
+        raise BadRequest(e.args[0])
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+
+def handle_similar(live, body):
+    name = body.get('candy')
+    k = body.get('k', 5)
+    require, exclude = _names(body, 'require'), _names(body, 'exclude')
+    if not isinstance(name, str):
+        raise BadRequest("candy must be a candy name")
+    if not isinstance(k, int) or not 1 <= k <= MAX_PAGE_SIZE:
+        raise BadRequest(f"k must be an integer from 1 to {MAX_PAGE_SIZE}")
+    try:
+        similar = live.current.similar(
+            name, k, require, exclude, _range(body, 'sugar_range'), _range(body, 'price_range'))
+    except KeyError as e:
+        raise BadRequest(e.args[0])
+    except ValueError as e:
+        raise BadRequest(str(e))
+    return {'candy': name, 'similar': similar}
+
+
+def handle_predict(live, body):
+    flags = _names(body, 'flags')
+    sugar, price = body.get('sugar', 50), body.get('price', 50)
+    if not all(isinstance(v, (int, float)) and 0 <= v <= 100 for v in (sugar, price)):
+        raise BadRequest("sugar and price must be numbers between 0 and 100")
+    try:
+        return {'winpercent': live.current.predict_winpercent(flags, sugar, price)}
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+
+def handle_votes(live, body):
+    if live.tracker is None:
+        raise BadRequest("Live votes are not enabled (start the API with --matchups)")
+    votes = body.get('votes')
+    if (not isinstance(votes, list)
+            or not all(isinstance(v, list) and len(v) == 3 and all(isinstance(x, str) for x in v)
+                       and v[2] in v[:2] and v[0] != v[1] for v in votes)):
+        raise BadRequest("votes must be [candy a, candy b, winner] triples with the winner one of a and b")
+    a_names, b_names, winners = zip(*votes) if votes else ((), (), ())
+    try:
+        a = live.base.views.positions(a_names)
+        b = live.base.views.positions(b_names)
+    except KeyError as e:
+        raise BadRequest(f"Unknown candy: {e.args[0]}")
+    live.tracker.log.append(a, b, [winner == b_name for winner, b_name in zip(winners, b_names)])
+    return {'accepted': len(votes)}
+
+
+ROUTES = {
+    ('POST', '/filter'): handle_filter,
+    ('POST', '/analyze'): handle_analyze,
+    ('POST', '/similar'): handle_similar,
+    ('POST', '/predict'): handle_predict,
+    ('POST', '/votes'): handle_votes,
+    ('GET', '/health'): lambda live, body: {
+        'status': 'ok', 'version': live.current.version, 'rows': len(live.current),
+        'votes': live.tracker.offset if live.tracker else None},
+}
+
+
+# Handlers whose cost grows with the catalog size or, for /analyze with
+# intervals, the bootstrap resamples. They run in a worker thread so other
+# connections are served meanwhile.
+THREADED_HANDLERS = {handle_filter, handle_analyze, handle_similar}
+
+
+async def dispatch(live, method, path, raw_body):
+    """Return (status, payload) for one request."""
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        if any(route_path == path for _, route_path in ROUTES):
+            return 405, {'error': f"{method} not allowed on {path}"}
+        return 404, {'error': f"No route for {path}"}
+    try:
+        body = json.loads(raw_body) if raw_body else {}
+        if not isinstance(body, dict):
+            raise BadRequest("Request body must be a JSON object")
+        if handler in THREADED_HANDLERS:
+            return 200, await asyncio.to_thread(handler, live, body)
+        return 200, handler(live, body)
+    except json.JSONDecodeError:
+        return 400, {'error': "Request body is not valid JSON"}
+    except BadRequest as e:
+        return 400, {'error': str(e)}
+    except Exception:
+        # Answer instead of dropping the connection; the traceback goes to the log
+        traceback.print_exc()
+        return 500, {'error': "Internal server error"}
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+async def serve_connection(live, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                writer.write(_response(400, {'error': "Malformed request line"}, False))
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            length = int(headers.get('content-length') or 0)
+            if length > MAX_BODY_BYTES:
+                writer.write(_response(413, {'error': "Request body too large"}, False))
+                break
+            raw_body = await reader.readexactly(length) if length else b''
+
+            status, payload = await dispatch(live, method, target.split('?', 1)[0], raw_body)
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def refresh_periodically(live, seconds):
+    while True:
+        await asyncio.sleep(seconds)
+        # Rebuilding the catalog for large logs takes a while; keep serving meanwhile
+        await asyncio.to_thread(live.refresh)
+
+
+async def serve(live, host, port, refresh_seconds=REFRESH_SECONDS):
+    server = await asyncio.start_server(
+        lambda reader, writer: serve_connection(live, reader, writer), host, port)
+    print(f"Serving {len(live.current)} candies on http://{host}:{port}")
+    if live.tracker is not None or live.source is not None:
+        asyncio.get_running_loop().create_task(refresh_periodically(live, refresh_seconds))
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--data', default=DATA_PATH, help="candy CSV to serve")
+    parser.add_argument('--shared', help="attach to the catalog published under this shared memory name")
+    parser.add_argument('--matchups', help="head-to-head vote log to take win rates from")
+    parser.add_argument('--refresh', type=float, default=REFRESH_SECONDS,
+                        help="seconds between refreshes from the vote log and dataset")
+    args = parser.parse_args()
+    try:
+        source = SharedCatalog(args.shared) if args.shared else DatasetManager(args.data)
+        live = LiveCatalog(source.attach(), args.matchups, source)
+        asyncio.run(serve(live, args.host, args.port, args.refresh))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,576 +1,633 @@
+import os
+import time
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from candy_assortment import solve_assortment
+from candy_bootstrap import interval_text
+from candy_core import DATA_PATH
+from candy_figures import radar_figure
+from candy_index import CHARACTERISTICS
+from candy_matchups import MatchupTracker
+from candy_profile import RerunProfile, history_jsonl, profiling_requested, summarize_history
+from candy_reload import RELOAD_POLL_SECONDS, DatasetManager
+from candy_scoring import recommend
+from candy_shared import SharedCatalog
+from candy_templates import (
+    ABOUT, FINAL_THOUGHTS, PAGE_STYLE, PICK_CARD, RECOMMENDATION_CARD, SECTION_DIVIDER, WHY_THESE_CANDIES,
+    card_row, metric_label,
+)
 
 # Set page configuration
 st.set_page_config(page_title="Halloween Candy Dashboard", layout="wide")
 
-# Load the data
-@st.cache_data
-def load_data():
-    data = pd.read_csv('data/candy-data.csv')
-    return data
-
-candy_data = load_data()
-
-# Custom CSS for Halloween theme with improved readability
-st.markdown("""
-<style>
-    .stApp {
-        background-color: #F8F0E3;
-        color: #333333;
-    }
-    h1, h2, h3, h4, h5 {
-        color: #D35400;
-        font-family: 'Arial', sans-serif;
-    }
-    .stPlotlyChart {
-        background-color: #FFFFFF;
-    }
-    .stButton>button {
-        color: #FFFFFF;
-        background-color: #D35400;
-        border-radius: 5px;
-    }
-    .stTextInput>div>div>input {
-        color: #333333;
-    }
-    .stSelectbox>div>div>select {
-        color: #333333;
-    }
-    .stMultiSelect>div>div>select {
-        color: #333333;
-    }
-    .candy-card {
-        background-color: white;
-        border-radius: 10px;
-        padding: 20px;
-        margin-bottom: 20px;
-        border: 2px solid #D35400;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        height:370px;
-    }
-    .section-divider {
-        border-top: 2px solid #D35400;
-        margin: 30px 0;
-    }
-    .metric-card {
-        background-color: #FFFFFF;
-        border-radius: 10px;
-        padding: 15px;
-        margin-bottom: 20px;
-        border: 1px solid #D35400;
-    }
-    .sidebar-info {
-        background-color: #FFFFFF;
-        border-radius: 10px;
-        padding: 15px;
-        margin-top: 20px;
-        border: 1px solid #D35400;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Add a spooky title
-st.markdown("<h1 style='text-align:center;  font-size:36px; color: #D35400;'>🎃 Halloween Candy Selection Dashboard 🍬</h1>", unsafe_allow_html=True)
-
-# Main content area
-tab1, tab2 = st.tabs(["🍫 Top Recommendations", "🎃 Custom Selection"])
+# Opt-in render profiling (CANDY_PROFILE=1 or ?profile=1); a no-op otherwise
+profile = RerunProfile(profiling_requested(st.query_params))
+
+# Where the catalog comes from: by default a DatasetManager, which loads the
+# memory-mapped columnar store (streamed in from the CSV on first use) and
+# reloads it in the background when the CSV is replaced. With
+# CANDY_SHARED_CATALOG set, a candy_shared publisher's shared memory instead.
+SHARED_CATALOG = os.environ.get('CANDY_SHARED_CATALOG')
+
+@st.cache_resource
+def catalog_source():
+    if SHARED_CATALOG:
+        return SharedCatalog(SHARED_CATALOG)
+    return DatasetManager(DATA_PATH, float(os.environ.get('CANDY_RELOAD_SECONDS', RELOAD_POLL_SECONDS)))
+
+# The catalog holds the filter index, summary statistics, card views and
+# paging helpers. cache_resource shares one copy across sessions instead of
+# pickling it for every rerun, and the key is the dataset version, which every
+# other cache below is keyed on too.
+@st.cache_resource(max_entries=1)
+def load_catalog(version):
+    profile.miss('load_catalog')
+    return catalog_source().attach(version)
+
+# Optional live head-to-head votes (see candy_matchups) replace the survey win
+# rates; new votes are folded in at most once per refresh interval
+MATCHUP_LOG = os.environ.get('CANDY_MATCHUP_LOG')
+MATCHUP_REFRESH_SECONDS = 5
+
+@st.cache_resource(max_entries=1)
+def load_matchups(version):
+    catalog = load_catalog(version)
+    return MatchupTracker(MATCHUP_LOG, catalog.names, catalog.store.column('winpercent'))
+
+@st.cache_resource(max_entries=2)
+def load_live_catalog(version, window):
+    profile.miss('load_live_catalog')
+    tracker = load_matchups(version)
+    tracker.refresh()
+    winpercent, offset = tracker.snapshot()
+    return load_catalog(version).with_winpercent(winpercent), offset
+
+candy_version = dataset_key = catalog_source().version()
+catalog = profile.cached('load_catalog', load_catalog, candy_version)
+if MATCHUP_LOG:
+    window = int(time.time() // MATCHUP_REFRESH_SECONDS)
+    try:
+        catalog, votes = profile.cached('load_live_catalog', load_live_catalog, candy_version, window)
+        # Anything keyed on the version is recomputed once new votes arrive
+        candy_version = f'{candy_version}+{votes}'
+    except ValueError as e:
+        # A log for other candies (or another order) would credit the wrong ones
+        st.sidebar.warning(f"{e}. Showing the survey win rates.")
+candy_data = catalog.data
+candy_views = catalog.views
+candy_pager, candy_search_index = catalog.pager, catalog.search
+profile.checkpoint('load_data')
+
+# A replaced CSV that failed to load leaves the previous dataset in place
+reload_error = getattr(catalog_source(), 'error', None)
+if reload_error:
+    st.sidebar.warning(f"{reload_error}. Still showing the previous dataset.")
+
+PAGE_SIZE = 25
+OPTION_LIMIT = 1000
+SORT_OPTIONS = {"Win %": 'winpercent', "Sugar Percentile": 'sugarpercent', "Price Percentile": 'pricepercent'}
+SIMILAR_COUNT = 5
+
+# Characteristic checkboxes in the custom selection tab, one list per column
+FILTER_CHECKBOXES = [
+    [("chocolate", "Chocolate"), ("fruity", "Fruity"), ("caramel", "Caramel")],
+    [("peanutyalmondy", "Peanut/Almond"), ("nougat", "Nougat"), ("crispedricewafer", "Crispy/Wafer")],
+    [("hard", "Hard Candy"), ("bar", "Bar"), ("pluribus", "Pluribus (multiple pieces)")],
+]
+
+# "Find similar" popover for a candy card; key keeps each card's widgets apart
+def similar_candies_popover(candy, key):
+    with st.popover("🔍 Find Similar", use_container_width = True):
+        st.write(f"#### Candies Like {candy}")
+        nut_free = st.checkbox("Nut-free only", value=kept.get(f"{key}_nut_free", False), key=f"{key}_nut_free")
+        cheaper = st.checkbox("Same price or cheaper", value=kept.get(f"{key}_cheaper", False), key=f"{key}_cheaper")
+        less_sugar = st.checkbox("Same sugar or less", value=kept.get(f"{key}_less_sugar", False), key=f"{key}_less_sugar")
+
+        candy_view = candy_views[candy]
+        similar = catalog.similar(
+            candy,
+            SIMILAR_COUNT,
+            exclude=['peanutyalmondy'] if nut_free else [],
+            sugar_range=(0.0, candy_view.sugarpercent*100 if less_sugar else 100.0),
+            price_range=(0.0, candy_view.pricepercent*100 if cheaper else 100.0),
+        )
+        if similar:
+            st.dataframe(
+                [
+                    {"Candy": row['competitorname'], "Win %": row['winpercent'],
+                     "Sugar": row['sugarpercent'], "Price": row['pricepercent'],
+                     "Differences": row['differ']}
+                    for row in similar
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+            st.caption("Differences counts the characteristics that differ; ties are broken by closest sugar and price.")
+        else:
+            st.info("No candies match these constraints.")
 
-with tab1:
-    st.markdown("<h2 style='text-align: center; font-size:30px; color: #D35400;'>Our Top 3 Candy Recommendations</h2>", unsafe_allow_html=True)
-    
-    # Our top 3 candy selection based on analysis
-    selected_candies = ["Reese's Peanut Butter cup", "Twix", "Starburst"]
-    selected_data = candy_data[candy_data['competitorname'].isin(selected_candies)]
-    
-    # Create columns for each candy
-    cols = st.columns(3)
-    
-    for i, candy in enumerate(selected_candies):
-        candy_data_item = selected_data[selected_data['competitorname'] == candy].iloc[0]
-        characteristics = [
-            "Chocolate" if candy_data_item['chocolate'] else None,
-            "Fruity" if candy_data_item['fruity'] else None,
-            "Caramel" if candy_data_item['caramel'] else None,
-            "Peanuts/Almonds" if candy_data_item['peanutyalmondy'] else None,
-            "Nougat" if candy_data_item['nougat'] else None,
-            "Crispy/Wafer" if candy_data_item['crispedricewafer'] else None,
-            "Hard" if candy_data_item['hard'] else None,
-            "Bar" if candy_data_item['bar'] else None,
-            "Pluribus" if candy_data_item['pluribus'] else None
-        ]
-        characteristics = [c for c in characteristics if c]
-        characteristics_str = ", ".join(characteristics)
-        
-        with cols[i]:
-            with st.container():
-                st.markdown(f"""
-                <div class="candy-card">
-                    <p style=" font-size:18px; text-align: center; color: #D35400;"><strong>{candy}</strong></p>
-                    <hr style="border-top: 1px solid #D35400;">
-                    <p><strong>Characteristics:</strong> {characteristics_str}</p>
-                    <p><strong>Win Percentage:</strong> {candy_data_item['winpercent']:.2f}%</p>
-                    <p><strong>Sugar Percentile:</strong> {candy_data_item['sugarpercent']*100:.2f}th</p>
-                    <p><strong>Price Percentile:</strong> {candy_data_item['pricepercent']*100:.2f}th</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Create a popover for each candy
-                with st.popover("🍬 Why We Recommend", use_container_width = True):
-                    st.write(f"#### Why We Recommend {candy}")
-                    if candy == "Reese's Peanut Butter cup":
-                        st.write("""
+# Hand-written notes for the candies the analysis notebook picked; any other
+# pick falls back to the reason its preset selected it
+WHY_WE_RECOMMEND = {
+    "Reese's Peanut Butter cup": """
                         Reese's Peanut Butter cup stands out for several reasons:
                         1. Highest win percentage among all candies, indicating wide appeal.
                         2. Unique combination of chocolate and peanut butter, offering a distinctive flavor profile.
                         3. Recognizable brand with strong consumer loyalty.
                         4. Satisfying texture combination of smooth chocolate and creamy peanut butter.
                         5. Versatile size options, suitable for various treat-giving scenarios.
-                        """)
-                    elif candy == "Twix":
-                        st.write("""
+                        """,
+    "Twix": """
                         Twix is an excellent choice for these reasons:
                         1. High win percentage, showing strong popularity among consumers.
                         2. Unique texture combination of chocolate, caramel, and cookie.
                         3. Nut-free, making it suitable for those with nut allergies.
                         4. Comes in a bar form, which is easy to distribute and portion.
                         5. Offers a satisfying crunch, which many candy consumers enjoy.
-                        """)
-                    else:  # Starburst
-                        st.write("""
+                        """,
+    "Starburst": """
                         Starburst rounds out our selection for these reasons:
                         1. Provides a fruity option, catering to non-chocolate preferences.
                         2. High win percentage among fruit-flavored candies.
                         3. Offers variety with multiple flavors in each pack.
                         4. Chewy texture provides a different experience from chocolate bars.
                         5. Individually wrapped pieces make for easy distribution and portion control.
-                        """)
-
-    st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
+                        """,
+}
+
+# Everything in the Top Recommendations tab that depends only on the dataset
+# (the card row's HTML, popover text, metric values and notes, the radar
+# figure), built once per dataset version and shared by every session
+@st.cache_resource(max_entries=2)
+def load_recommendation_section(version):
+    profile.miss('load_recommendation_section')
+    # Score every candy under each recommendation preset in one pass
+    recommendations = [(name, preset.label) for name, preset in recommend(candy_data)]
+    candies = [name for name, _ in recommendations]
+
+    cards, card_html = [], []
+    for candy, label in recommendations:
+        candy_view = candy_views[candy]
+        card_html.append(RECOMMENDATION_CARD(
+            candy, candy_view.characteristics, candy_view.win_text, candy_view.sugar_text, candy_view.price_text))
+        why = WHY_WE_RECOMMEND.get(candy) or f"""
+                        {candy} is our **{label}**:
+                        1. It scores highest for this category across the whole catalog.
+                        2. Win percentage of {candy_view.win_text} in head-to-head matchups.
+                        3. Sugar in the {candy_view.sugar_text} and price in the {candy_view.price_text} percentile.
+                        """
+        cards.append((candy, why))
+
+    # Compare the recommended candies' averages with the overall averages
+    avg_rec_win, avg_rec_sugar, avg_rec_price = candy_views.averages(candies)
+    overall_avg_win, overall_avg_sugar, overall_avg_price = catalog.overall_averages()
+
+    if avg_rec_win > overall_avg_win:
+        win_note = (
+            f"*Our selected candies have a significantly higher win rate, outperforming others by {avg_rec_win - overall_avg_win:.2f}%. "
+            "This suggests they are highly popular and well-received in head-to-head matchups.*"
+        )
+    else:
+        win_note = (
+            f"*Our selected candies trail the average win rate by {overall_avg_win - avg_rec_win:.2f}%, "
+            "trading some popularity for variety and safety.*"
+        )
+    if avg_rec_price < overall_avg_price:
+        price_note = (
+            "*Our selection includes both higher and lower-priced options, offering a balanced assortment "
+            f"that's still {overall_avg_price - avg_rec_price:.2f}% below average, making it affordable overall.*"
+        )
+    else:
+        price_note = (
+            "*Our selection includes both higher and lower-priced options, offering a balanced assortment "
+            f"that's {avg_rec_price - overall_avg_price:.2f}% above average, a small premium for proven favorites.*"
+        )
+    if avg_rec_sugar < overall_avg_sugar:
+        sugar_note = (
+            f"*The sugar content in our selection is {overall_avg_sugar - avg_rec_sugar:.2f}% below average, offering a healthier option. "
+            "We included one with higher sugar to balance preferences for sweeter treats.*"
+        )
+    else:
+        sugar_note = (
+            f"*The sugar content in our selection is {avg_rec_sugar - overall_avg_sugar:.2f}% above average, "
+            "catering to trick-or-treaters with a sweet tooth.*"
+        )
+    intervals = catalog.selection_intervals(candies)
+    metrics = [
+        ("Win Rate", f"{avg_rec_win:.2f}%", f"{avg_rec_win - overall_avg_win:.2f}%", win_note,
+         interval_text(intervals['winpercent'])),
+        ("Price Percentile", f"{avg_rec_price:.2f}", f"{avg_rec_price - overall_avg_price:.2f}", price_note,
+         interval_text(intervals['pricepercent'])),
+        ("Sugar Percentile", f"{avg_rec_sugar:.2f}", f"{avg_rec_sugar - overall_avg_sugar:.2f}", sugar_note,
+         interval_text(intervals['sugarpercent'])),
+    ]
+
+
+    return {
+        'cards': cards,
+        'card_row': card_row(card_html),
+        'metrics': metrics,
+        'radar': radar_figure(candy_views, candies, 'recommendations'),
+    }
 
-    st.markdown("<h3 style='text-align: center; font-size: 28px;'>🔮 Analysis of Recommendations</h3>", unsafe_allow_html=True)
-    
-    
-    # Calculate average values for recommended candies
-    avg_rec_win = candy_data_item['winpercent'].mean()
-    avg_rec_sugar = candy_data_item['sugarpercent'].mean() * 100
-    avg_rec_price = candy_data_item['pricepercent'].mean() * 100
+# How each characteristic relates to win rate, as in the notebook. Keyed on
+# the dataset version without live votes, so the resampling doesn't rerun on
+# every vote refresh; the correlations are with the survey win rates.
+@st.cache_resource(max_entries=1)
+def load_correlations(version):
+    profile.miss('load_correlations')
+    labels = {name: label for column in FILTER_CHECKBOXES for name, label in column}
+    results = load_catalog(version).correlation_intervals()
+    rows = [
+        {"Characteristic": labels[name], "Correlation with Win %": result['correlation'],
+         "95% CI": f"{result['low']:+.2f} to {result['high']:+.2f}", "p-value": result['p_value']}
+        for name, result in results.items()
+    ]
+    if next(iter(results.values()))['method'] == 'bootstrap':
+        caption = "Bootstrap intervals and permutation p-values for each characteristic's correlation with the survey win rate."
+    else:
+        caption = "Fisher z intervals and p-values for each characteristic's correlation with the survey win rate."
+    return rows, caption
+
+# Bootstrap intervals for a user selection; the order of the picks doesn't
+# change them, so the key is the sorted names
+@st.cache_resource(max_entries=256)
+def load_selection_intervals(version, candies):
+    profile.miss('load_selection_intervals')
+    return {metric: interval_text(result) for metric, result in catalog.selection_intervals(list(candies)).items()}
+
+# Radar figures for user selections, keyed by the candies shown (in order, as
+# that decides trace colors) and shared across sessions
+@st.cache_resource(max_entries=256)
+def load_radar_figure(version, candies):
+    profile.miss('load_radar_figure')
+    return radar_figure(candy_views, candies, 'selection')
+
+# Halloween theme styles (see candy_templates), minified once at import
+st.markdown(PAGE_STYLE, unsafe_allow_html=True)
 
-    # Compare with overall averages
-    overall_avg_win = candy_data['winpercent'].mean()
-    overall_avg_sugar = candy_data['sugarpercent'].mean() * 100
-    overall_avg_price = candy_data['pricepercent'].mean() * 100
+# Add a spooky title
+st.markdown("<h1 style='text-align:center;  font-size:36px; color: #D35400;'>🎃 Halloween Candy Selection Dashboard 🍬</h1>", unsafe_allow_html=True)
+profile.checkpoint('page styles')
 
-    # Create three columns for the metrics
-    col1, col2, col3 = st.columns(3)
+# Main content area
+# Only the open tab runs: switching tabs reruns the script, and each tab body
+# is skipped while it is hidden. Streamlit forgets the state of widgets that
+# are not rendered in a run, so each widget's latest value is kept in a plain
+# dict and handed back as its value/index/default when it is rendered again.
+# (Writing them back to the widget keys would make Streamlit warn about
+# widgets with both a default and a Session State value.)
+kept = st.session_state.setdefault('kept_values', {})
+kept.update((key, value) for key, value in st.session_state.items() if key != 'kept_values')
+tab1, tab2 = st.tabs(["🍫 Top Recommendations", "🎃 Custom Selection"], default=kept.get("active_tab"),
+                      key="active_tab", on_change="rerun")
 
-    # Display metrics in the first column
-    with col1:
-        # Create sub-columns for Win Rate
-        subcol1, subcol2 = st.columns(2)
+with tab1:
+    if tab1.open:
+        st.markdown("<h2 style='text-align: center; font-size:30px; color: #D35400;'>Our Top 3 Candy Recommendations</h2>", unsafe_allow_html=True)
+    
+        # Our top 3 candy selection, scored with the analysis notebook's weightings
+        section = profile.cached('load_recommendation_section', load_recommendation_section, candy_version)
+    
+        # All three cards in one element, then each card's popovers below it
+        st.markdown(section['card_row'], unsafe_allow_html=True)
+        cols = st.columns(3)
+    
+        for i, (candy, why) in enumerate(section['cards']):
+            with cols[i]:
+                # Create a popover for each candy
+                with st.popover("🍬 Why We Recommend", use_container_width = True):
+                    st.write(f"#### Why We Recommend {candy}")
+                    st.write(why)
 
-        with subcol1:
-            st.markdown("<h4 style='padding-top:40px; font-size:16px; font-weight:bold;'>Win Rate</h4>", unsafe_allow_html=True)
+                similar_candies_popover(candy, f"similar_top_{i}")
+        profile.checkpoint('tab1 cards')
 
-        with subcol2:
-            st.metric(label="", value=f"{avg_rec_win:.2f}%", delta=f"{avg_rec_win - overall_avg_win:.2f}%")        
+        st.markdown(SECTION_DIVIDER, unsafe_allow_html=True)
 
-        st.markdown(
-            "*Our selected candies have a significantly higher win rate, outperforming others by 16.72%. "
-            "This suggests they are highly popular and well-received in head-to-head matchups.*"
-        )        
+        st.markdown("<h3 style='text-align: center; font-size: 28px;'>🔮 Analysis of Recommendations</h3>", unsafe_allow_html=True)
 
-    # Display metrics in the second column
-    with col2:
-        # Create sub-columns for Price Percentile
-        subcol1, subcol2 = st.columns(2)
+        # One column per metric, each with its label, value and delta, then the note
+        for column, (label, value, delta, note, interval) in zip(st.columns(3), section['metrics']):
+            with column:
+                subcol1, subcol2 = st.columns(2)
 
-        with subcol1:
-            st.markdown("<h4 style='padding-top:40px; font-size:16px; font-weight:bold;'>Price Percentile</h4>", unsafe_allow_html=True)
+                with subcol1:
+                    st.markdown(metric_label(label), unsafe_allow_html=True)
 
-        with subcol2:
-            st.metric(label="", value=f"{avg_rec_price:.2f}", delta=f"{avg_rec_price - overall_avg_price:.2f}")
+                with subcol2:
+                    st.metric(label="", value=value, delta=delta)
 
-        st.markdown(
-            "*Our selection includes both higher and lower-priced options, offering a balanced assortment "
-            "that's still 24.89% below average, making it affordable overall.*"
-        )
+                st.markdown(note)
+                st.caption(f"Difference from average: {interval}")
+        profile.checkpoint('tab1 metrics')
 
-    # Display metrics in the third column
-    with col3:
-        # Create sub-columns for Sugar Percentile
-        subcol1, subcol2 = st.columns(2)
+        # Display radar chart spanning full width below the metrics
+        st.plotly_chart(section['radar'], use_container_width=True)
+        profile.checkpoint('tab1 radar chart')
 
-        with subcol1:
-            st.markdown("<h4 style='padding-top:40px; font-size:16px; font-weight:bold;'>Sugar Percentile</h4>", unsafe_allow_html=True)
+        with st.expander("📈 What Drives Win Rate?"):
+            correlations, caption = profile.cached('load_correlations', load_correlations, dataset_key)
+            st.dataframe(correlations, hide_index=True, use_container_width=True)
+            st.caption(caption)
 
-        with subcol2:
-            st.metric(label="", value=f"{avg_rec_sugar:.2f}", delta=f"{avg_rec_sugar - overall_avg_sugar:.2f}")
+        st.markdown(SECTION_DIVIDER, unsafe_allow_html=True)
 
-        st.markdown(
-            "*The sugar content in our selection is 32.76% below average, offering a healthier option. "
-            "We included one with higher sugar to balance preferences for sweeter treats.*"
-        )
+        st.markdown(WHY_THESE_CANDIES, unsafe_allow_html=True)
+        profile.checkpoint('tab1 correlations')
 
-    # Radar chart section
-    categories = ['Win %', 'Sugar %', 'Price %', 'Chocolate', 'Fruity', 'Peanut/Almond', 'Nougat', 'Crispy/Wafer', 'Hard', 'Bar', 'Pluribus']
-
-    fig_radar = go.Figure()
-
-    for candy in selected_candies:
-        candy_data_item = selected_data[selected_data['competitorname'] == candy].iloc[0]
-        values = [
-            candy_data_item['winpercent'],
-            candy_data_item['sugarpercent'] * 100,
-            candy_data_item['pricepercent'] * 100,
-            100 if candy_data_item['chocolate'] else 0,
-            100 if candy_data_item['fruity'] else 0,
-            100 if candy_data_item['peanutyalmondy'] else 0,
-            100 if candy_data_item['nougat'] else 0,
-            100 if candy_data_item['crispedricewafer'] else 0,
-            100 if candy_data_item['hard'] else 0,
-            100 if candy_data_item['bar'] else 0,
-            100 if candy_data_item['pluribus'] else 0
-        ]
-        
-        fig_radar.add_trace(go.Scatterpolar(
-            r=values,
-            theta=categories,
-            fill='toself',
-            name=candy,
-        ))
-
-    fig_radar.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-        showlegend=True,
-        legend=dict(font=dict(color="#333333")),
-        paper_bgcolor='#F8F0E3',
-        plot_bgcolor='#FFFFFF',
-        font_color='#333333',
-    )
-
-    # Display radar chart spanning full width below the metrics
-    st.plotly_chart(fig_radar, use_container_width=True)
-
-    st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
-
-    st.markdown("""
-    <div style="background-color: #2E2E2E; color: white; border-radius: 10px; padding: 20px; margin-top: 20px;">
-        <h4 style="color: #FF6600;">Why These 3 Candies? 🎃</h4>
-    <p>
-        Our selection of top candies is based on a careful, data-driven approach to ensure they’re a Halloween hit, considering:
-    </p>
-        <ul>
-            <li><strong>Popularity</strong> 🏆: These treats have consistently won in head-to-head matchups, making them crowd favorites.</li>
-            <li><strong>Balanced Flavors</strong> 🍭: We’ve chosen a variety of sweet, rich, and fruity options to cater to diverse tastes.</li>
-            <li><strong>Variety</strong> 🍫: From chewy to crunchy, we’ve included something for every texture preference.</li>
-            <li><strong>Affordability</strong> 💸: By analyzing price data, we've ensured the selection fits within a reasonable budget without sacrificing quality.</li>
-            <li><strong>Safety</strong> 🧙‍♀️: Allergy considerations are taken into account to keep all trick-or-treaters safe.</li>
-        </ul>    
-    <p><strong>Curious about the data behind our candy selection?</strong> Click the button below to dive deeper into our detailed analysis!</p>
-    <a href='https://halloween-candy-rankings-analysis.netlify.app/' target='_blank' style='text-decoration: none; color: white; background-color: #D35400; padding: 10px 20px; border-radius: 5px;'>🔍 Dive into Our Analysis</a>
-        
-    """, unsafe_allow_html=True)
-    
 with tab2:
-    st.markdown("<h2 style='text-align: center; font-size:30px; color: #D35400;'>Brew Your Own Halloween Candy Potion</h2>", unsafe_allow_html=True)
+    if tab2.open:
+        st.markdown("<h2 style='text-align: center; font-size:30px; color: #D35400;'>Brew Your Own Halloween Candy Potion</h2>", unsafe_allow_html=True)
     
-    col1, col2 = st.columns(2)
+        col1, col2 = st.columns(2)
     
-    with col1:
-        st.markdown("##### 🧪 Select Your Candy Ingredients")
-        with st.container():
-            col1_a, col1_b, col1_c = st.columns(3)
-            with col1_a:
-                chocolate = st.checkbox("Chocolate", key="chocolate")
-                fruity = st.checkbox("Fruity", key="fruity")
-                caramel = st.checkbox("Caramel", key="caramel")
-            with col1_b:
-                peanutyalmondy = st.checkbox("Peanut/Almond", key="peanutyalmondy")
-                nougat = st.checkbox("Nougat", key="nougat")
-                crispedricewafer = st.checkbox("Crispy/Wafer", key="crispedricewafer")
-            with col1_c:
-                hard = st.checkbox("Hard Candy", key="hard")
-                bar = st.checkbox("Bar", key="bar")
-                pluribus = st.checkbox("Pluribus (multiple pieces)", key="pluribus")
+        with col1:
+            st.markdown("##### 🧪 Select Your Candy Ingredients")
+            # Each label shows how many candies would match with that box checked
+            # too, given the other boxes and the sliders; boxes that would leave
+            # nothing are disabled
+            checked = {name: kept.get(name, False) for name in CHARACTERISTICS}
+            facets = catalog.facets(
+                [name for name in CHARACTERISTICS if checked[name]],
+                kept.get("sugar_range", (0.0, 100.0)),
+                kept.get("price_range", (0.0, 100.0)),
+            )
+            with st.container():
+                for column, checkboxes in zip(st.columns(3), FILTER_CHECKBOXES):
+                    with column:
+                        for name, label in checkboxes:
+                            checked[name] = st.checkbox(
+                                f"{label} ({facets[name]:,})",
+                                value=checked[name],
+                                key=name,
+                                disabled=not checked[name] and facets[name] == 0
+                            )
     
-        st.markdown("##### 🎭 Adjust Your Candy Potion")
-        col1_slider, col2_slider = st.columns(2)
-        with col1_slider:
-            sugar_range = st.slider("Sugar Percentile", 0.0, 100.0, (0.0, 100.0), step=1.0, key="sugar_range")
-        
-        with col2_slider:
-            price_range = st.slider("Price Percentile", 0.0, 100.0, (0.0, 100.0), step=1.0, key="price_range")
-
-        st.markdown("*Adjust the sugar and price percentiles to control the sweetness and cost of your selected candies relative to others: a higher percentile means more sugar or a higher cost, while a lower percentile indicates less sugar or a lower price.*")
-
-    # Function to filter candies based on user preferences
-    def filter_candies():
-        mask = pd.Series(True, index=candy_data.index)
-        
-        if chocolate:
-            mask &= candy_data['chocolate'] == 1
-        if fruity:
-            mask &= candy_data['fruity'] == 1
-        if caramel:
-            mask &= candy_data['caramel'] == 1
-        if peanutyalmondy:
-            mask &= candy_data['peanutyalmondy'] == 1
-        if nougat:
-            mask &= candy_data['nougat'] == 1
-        if crispedricewafer:
-            mask &= candy_data['crispedricewafer'] == 1
-        if hard:
-            mask &= candy_data['hard'] == 1
-        if bar:
-            mask &= candy_data['bar'] == 1
-        if pluribus:
-            mask &= candy_data['pluribus'] == 1
-        
-        mask &= (candy_data['sugarpercent'] >= sugar_range[0]/100) & (candy_data['sugarpercent'] <= sugar_range[1]/100)
-        mask &= (candy_data['pricepercent'] >= price_range[0]/100) & (candy_data['pricepercent'] <= price_range[1]/100)
+            st.markdown("##### 🎭 Adjust Your Candy Potion")
+            col1_slider, col2_slider = st.columns(2)
+            with col1_slider:
+                sugar_range = st.slider("Sugar Percentile", 0.0, 100.0, kept.get("sugar_range", (0.0, 100.0)), step=1.0, key="sugar_range")
         
-        return candy_data[mask]
+            with col2_slider:
+                price_range = st.slider("Price Percentile", 0.0, 100.0, kept.get("price_range", (0.0, 100.0)), step=1.0, key="price_range")
+
+            st.markdown("*Adjust the sugar and price percentiles to control the sweetness and cost of your selected candies relative to others: a higher percentile means more sugar or a higher cost, while a lower percentile indicates less sugar or a lower price.*")
+
+            # Expected win rate of a candy with exactly these ingredients in the
+            # middle of both slider ranges, even if no such candy exists yet
+            potion_win = catalog.predict_winpercent(
+                [name for name in CHARACTERISTICS if checked[name]], sum(sugar_range) / 2, sum(price_range) / 2
+            )
+            st.metric(
+                "🔮 Predicted Win Rate of Your Potion",
+                f"{potion_win:.2f}%",
+                delta=f"{potion_win - catalog.overall_averages()[0]:.2f}% vs. average"
+            )
+            st.caption("From a regression of win rate on the characteristics, their pairings, sugar and price.")
+        profile.checkpoint('tab2 controls')
+
+        # Function to filter candies based on user preferences; returns row positions
+        def filter_candies():
+            flags = [name for name in CHARACTERISTICS if checked[name]]
+
+            return catalog.filter(flags, sugar_range, price_range)
     
-    with col2:
-        st.markdown("##### 🧙‍♂️ Your Magical Candy Selection")
+        with col2:
+            st.markdown("##### 🧙‍♂️ Your Magical Candy Selection")
         
-        filtered_data = filter_candies()
+            filtered_positions = filter_candies()
+            profile.checkpoint('filter_candies')
+
+            # Sort and page on the server so only one page of rows is sent
+            n_pages = max(1, -(-len(filtered_positions) // PAGE_SIZE))
+            if kept.get("page", 1) > n_pages:
+                # Back to the last page; the widget's own state is dropped so
+                # the value passed in below applies
+                kept["page"] = n_pages
+                st.session_state.pop("page", None)
+            sort_col, order_col, page_col = st.columns([2, 1, 1])
+            with sort_col:
+                sort_label = st.selectbox(
+                    "Sort by", list(SORT_OPTIONS), index=list(SORT_OPTIONS).index(kept.get("sort_by", "Win %")), key="sort_by")
+            with order_col:
+                descending = st.toggle("Highest first", value=kept.get("sort_descending", True), key="sort_descending")
+            with page_col:
+                page = st.number_input("Page", min_value=1, max_value=n_pages, value=kept.get("page", 1), key="page")
+
+            page_positions, _ = candy_pager.page(
+                filtered_positions, SORT_OPTIONS[sort_label], descending, page, PAGE_SIZE
+            )
         
-        # Display the enhanced DataFrame
-        st.dataframe(
-            filtered_data[['competitorname', 'winpercent', 'sugarpercent', 'pricepercent']].reset_index(drop=True),
-            hide_index=True,
-            use_container_width=True
-        )
+            # Display the enhanced DataFrame
+            st.dataframe(
+                candy_data.iloc[page_positions][['competitorname', 'winpercent', 'sugarpercent', 'pricepercent']].reset_index(drop=True),
+                hide_index=True,
+                use_container_width=True
+            )
+            first_row = (page - 1) * PAGE_SIZE + 1 if len(filtered_positions) else 0
+            st.caption(f"Showing {first_row}–{first_row + len(page_positions) - 1 if len(page_positions) else 0} of {len(filtered_positions):,} candies")
+            profile.checkpoint('candy table')
     
-    st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
+        with st.expander("🪄 Auto-Brew: Let Us Pick the Best Assortment"):
+            st.markdown("*We search the candies matching your ingredients and sliders above for the assortment with the highest average win rate that stays within your budget and sugar limits.*")
+            brew_col1, brew_col2, brew_col3 = st.columns(3)
+            with brew_col1:
+                brew_size = st.number_input("Number of candies", min_value=1, max_value=20, value=kept.get("brew_size", 5), key="brew_size")
+                brew_nut_free = st.checkbox("Nut-free only", value=kept.get("brew_nut_free", False), key="brew_nut_free")
+            with brew_col2:
+                brew_price = st.slider("Max average price percentile", 0.0, 100.0, kept.get("brew_price", 50.0), step=1.0, key="brew_price")
+                brew_sugar = st.slider("Max average sugar percentile", 0.0, 100.0, kept.get("brew_sugar", 50.0), step=1.0, key="brew_sugar")
+            with brew_col3:
+                brew_require = st.multiselect(
+                    "Must include at least one",
+                    options=["Chocolate", "Fruity", "Caramel"],
+                    default=kept.get("brew_require", ["Chocolate", "Fruity", "Caramel"]),
+                    key="brew_require"
+                )
+
+            if st.button("🧪 Brew My Assortment"):
+                st.session_state['auto_brew'] = solve_assortment(
+                    candy_data,
+                    brew_size,
+                    max_avg_price=brew_price/100,
+                    max_avg_sugar=brew_sugar/100,
+                    nut_free=brew_nut_free,
+                    require=[name.lower() for name in brew_require],
+                    allowed=filtered_positions
+                )
+
+            if 'auto_brew' in st.session_state:
+                brew = st.session_state['auto_brew']
+                if brew is None:
+                    st.warning("No assortment fits these limits. Try a larger budget, more sugar, or fewer required types.")
+                else:
+                    brew_data = candy_data.iloc[brew.positions].sort_values('winpercent', ascending=False)
+                    st.dataframe(
+                        brew_data[['competitorname', 'winpercent', 'sugarpercent', 'pricepercent']].reset_index(drop=True),
+                        hide_index=True,
+                        use_container_width=True
+                    )
+                    metric_col1, metric_col2, metric_col3 = st.columns(3)
+                    metric_col1.metric("Average Win Rate", f"{brew.avg_win:.2f}%")
+                    metric_col2.metric("Average Price Percentile", f"{brew.avg_price*100:.2f}")
+                    metric_col3.metric("Average Sugar Percentile", f"{brew.avg_sugar*100:.2f}")
+                    if brew.optimal:
+                        quality = "best possible assortment"
+                    else:
+                        quality = f"best found, at most {brew.upper_bound - brew.avg_win:.2f} points below the best possible win rate"
+                    st.caption(
+                        f"Solved in {brew.seconds*1000:.0f} ms over {brew.pool_size:,} candidate candies "
+                        f"({brew.nodes:,} search steps): {quality}."
+                    )
+        profile.checkpoint('auto-brew')
+
+        st.markdown(SECTION_DIVIDER, unsafe_allow_html=True)
     
-    st.markdown("##### 🎃 Select Your Halloween Candy Assortment")
-    user_selected_candies = st.multiselect(
-        "",
-        options=filtered_data['competitorname'].tolist(),
-        max_selections=3
-    )
-
-    if user_selected_candies:
-        user_selected_data = filtered_data[filtered_data['competitorname'].isin(user_selected_candies)]
-        
-        st.markdown('<h3 style="text-align: center; font-size:30px; color: #D35400;">Your Spooky Selection:</h3>', unsafe_allow_html=True)
+        st.markdown("##### 🎃 Select Your Halloween Candy Assortment")
+        # Every matching candy is an option while there are at most OPTION_LIMIT
+        # of them (always, for the bundled dataset). Above that, the options are
+        # the current picks plus the matches of a name search, so the list sent
+        # to the browser stays bounded for any catalog size.
+        current_picks = kept.get("user_candies", [])
+        if len(filtered_positions) <= OPTION_LIMIT:
+            matches = candy_search_index.search("", filtered_positions, limit=OPTION_LIMIT)
+        else:
+            candy_search = st.text_input(
+                f"🔍 Search the {len(filtered_positions):,} matching candies", value=kept.get("candy_search", ""),
+                key="candy_search", placeholder="Type part of a candy name")
+            matches = candy_search_index.search(candy_search, filtered_positions, limit=OPTION_LIMIT)
+            if len(matches) == OPTION_LIMIT:
+                st.caption(f"Showing the first {OPTION_LIMIT:,} matches; type more of a name to find others.")
+        user_selected_candies = st.multiselect(
+            "",
+            options=current_picks + [name for name in matches if name not in current_picks],
+            default=current_picks,
+            max_selections=3,
+            key="user_candies"
+        )
+        profile.checkpoint('candy search')
+
+        if user_selected_candies:
+            st.markdown('<h3 style="text-align: center; font-size:30px; color: #D35400;">Your Spooky Selection:</h3>', unsafe_allow_html=True)
         
-        candy_chunks = [user_selected_candies[i:i + 3] for i in range(0, len(user_selected_candies), 3)]
+            candy_chunks = [user_selected_candies[i:i + 3] for i in range(0, len(user_selected_candies), 3)]
         
-        for candy_row in candy_chunks:
-            cols = st.columns(len(candy_row))
+            for candy_row in candy_chunks:
+                # One element per row of cards, with each card's popover below it
+                row_views = [candy_views[candy] for candy in candy_row]
+                st.markdown(card_row([
+                    PICK_CARD(candy, view.win_text, view.sugar_text, view.price_text, view.characteristics)
+                    for candy, view in zip(candy_row, row_views)
+                ], len(candy_row)), unsafe_allow_html=True)
+                cols = st.columns(len(candy_row))
             
-            for idx, candy in enumerate(candy_row):
-                candy_info = user_selected_data[user_selected_data['competitorname'] == candy].iloc[0]
-                
-                with cols[idx]:
-                    characteristics = [
-                        "Chocolate" if candy_info['chocolate'] else None,
-                        "Fruity" if candy_info['fruity'] else None,
-                        "Caramel" if candy_info['caramel'] else None,
-                        "Peanuts/Almonds" if candy_info['peanutyalmondy'] else None,
-                        "Nougat" if candy_info['nougat'] else None,
-                        "Crispy/Wafer" if candy_info['crispedricewafer'] else None,
-                        "Hard" if candy_info['hard'] else None,
-                        "Bar" if candy_info['bar'] else None,
-                        "Pluribus" if candy_info['pluribus'] else None
-                    ]
-                    characteristics = [c for c in characteristics if c]
-                    
-                    st.markdown(f"""
-                    <div class="candy-card">
-                        <p style=" font-size:18px; text-align: center; color: #D35400;"><strong>{candy}</strong></p>
-                        <hr style="border-top: 1px solid #D35400;">
-                        <p><strong>Win Percentage:</strong> {candy_info['winpercent']:.2f}%</p>
-                        <p><strong>Sugar Percentile:</strong> {candy_info['sugarpercent']*100 :.2f}th</p>
-                        <p><strong>Price Percentile:</strong> {candy_info['pricepercent']*100 :.2f}th</p>
-                        <p><strong>Characteristics:</strong> {", ".join(characteristics)}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                for idx, candy in enumerate(candy_row):
+                    with cols[idx]:
+                        similar_candies_popover(candy, f"similar_pick_{candy}")
+            profile.checkpoint('tab2 cards')
+
+            st.markdown(SECTION_DIVIDER, unsafe_allow_html=True)
+
+            st.markdown("<h3 style='text-align: center; font-size: 28px;'>🔮 Analysis of Your Spooky Selection</h3>", unsafe_allow_html=True)
+
+            # Averages, comparisons with the overall averages and the analysis
+            # messages all come from the shared core
+            analysis = catalog.analyze_selection(user_selected_candies)
+            avg_win = analysis['averages']['winpercent']
+            avg_sugar = analysis['averages']['sugarpercent']
+            avg_price = analysis['averages']['pricepercent']
+            overall_avg_win, overall_avg_sugar, overall_avg_price = catalog.overall_averages()
+            intervals = profile.cached(
+                'load_selection_intervals', load_selection_intervals, candy_version, tuple(sorted(user_selected_candies))
+            )
         
-        st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
+            # Create three columns for the metrics
+            col1, col2, col3 = st.columns(3)
 
-        st.markdown("<h3 style='text-align: center; font-size: 28px;'>🔮 Analysis of Your Spooky Selection</h3>", unsafe_allow_html=True)
+            # Display metrics in the first column
+            with col1:
+                # Create sub-columns for Win Rate
+                subcol1, subcol2 = st.columns(2)
 
-        # Calculate average values for selected candies
-        avg_win = user_selected_data['winpercent'].mean()
-        avg_sugar = user_selected_data['sugarpercent'].mean() * 100
-        avg_price = user_selected_data['pricepercent'].mean() * 100
+                with subcol1:
+                    st.markdown(metric_label("Win Rate"), unsafe_allow_html=True)
 
-        # Compare with overall averages
-        overall_avg_win = candy_data['winpercent'].mean()
-        overall_avg_sugar = candy_data['sugarpercent'].mean() * 100
-        overall_avg_price = candy_data['pricepercent'].mean() * 100
-        
-        # Create three columns for the metrics
-        col1, col2, col3 = st.columns(3)
+                with subcol2:
+                    st.metric(label="", value=f"{avg_win:.2f}%", delta=f"{avg_win - overall_avg_win:.2f}%")
 
-        # Display metrics in the first column
-        with col1:
-            # Create sub-columns for Win Rate
-            subcol1, subcol2 = st.columns(2)
+                st.markdown(f"*{analysis['notes']['winpercent']}*")
+                st.caption(f"Difference from average: {intervals['winpercent']}")
 
-            with subcol1:
-                st.markdown("<h4 style='padding-top:40px; font-size:16px; font-weight:bold;'>Win Rate</h4>", unsafe_allow_html=True)
+            # Display metrics in the second column
+            with col2:
+                # Create sub-columns for Sugar Percentile
+                subcol1, subcol2 = st.columns(2)
 
-            with subcol2:
-                st.metric(label="", value=f"{avg_win:.2f}%", delta=f"{avg_win - overall_avg_win:.2f}%")
+                with subcol1:
+                    st.markdown(metric_label("Sugar Percentile"), unsafe_allow_html=True)
 
-            if avg_win > overall_avg_win:
-                st.markdown(
-                    "*Your selected candies have a higher-than-average win rate, meaning they are more popular in head-to-head matchups.*"
-                )
-            else:
-                st.markdown(
-                    "*Your selected candies have a lower-than-average win rate. Consider adding more popular options for better appeal.*"
-                )
-
-        # Display metrics in the second column
-        with col2:
-            # Create sub-columns for Sugar Percentile
-            subcol1, subcol2 = st.columns(2)
+                with subcol2:
+                    st.metric(label="", value=f"{avg_sugar:.2f}", delta=f"{avg_sugar - overall_avg_sugar:.2f}")
 
-            with subcol1:
-                st.markdown("<h4 style='padding-top:40px; font-size:16px; font-weight:bold;'>Sugar Percentile</h4>", unsafe_allow_html=True)
-
-            with subcol2:
-                st.metric(label="", value=f"{avg_sugar:.2f}", delta=f"{avg_sugar - overall_avg_sugar:.2f}")
-
-            if avg_sugar > overall_avg_sugar:
-                st.markdown(
-                    "*Your selected candies contain more sugar on average, which may be appealing to kids but could also be seen as too sweet by some.*"
-                )
-            else:
-                st.markdown(
-                    "*Your selected candies contain less sugar on average, making them a healthier option but possibly less appealing to those seeking sweetness.*"
-                )
+                st.markdown(f"*{analysis['notes']['sugarpercent']}*")
+                st.caption(f"Difference from average: {intervals['sugarpercent']}")
 
-        # Display metrics in the third column
-        with col3:
-            # Create sub-columns for Price Percentile
-            subcol1, subcol2 = st.columns(2)
+            # Display metrics in the third column
+            with col3:
+                # Create sub-columns for Price Percentile
+                subcol1, subcol2 = st.columns(2)
 
-            with subcol1:
-                st.markdown("<h4 style='padding-top:40px; font-size:16px; font-weight:bold;'>Price Percentile</h4>", unsafe_allow_html=True)
+                with subcol1:
+                    st.markdown(metric_label("Price Percentile"), unsafe_allow_html=True)
 
-            with subcol2:
-                st.metric(label="", value=f"{avg_price:.2f}", delta=f"{avg_price - overall_avg_price:.2f}")
+                with subcol2:
+                    st.metric(label="", value=f"{avg_price:.2f}", delta=f"{avg_price - overall_avg_price:.2f}")
 
-            if avg_price > overall_avg_price:
-                st.markdown(
-                    "*Your selected candies are priced above average, potentially indicating higher quality but also impacting your overall budget.*"
-                )
-            else:
-                st.markdown(
-                    "*Your selected candies are priced below average, making them a more budget-friendly choice, but ensure you're not compromising on quality.*"
-                )
-        # Radar chart for user-selected candies
-        categories = ['Win %', 'Sugar %', 'Price %', 'Chocolate', 'Fruity', 'Peanut/Almond', 'Nougat', 'Crispy/Wafer', 'Hard', 'Bar', 'Pluribus']
-        user_fig_radar = go.Figure()
-        
-        for candy in user_selected_candies:
-            candy_data_item = user_selected_data[user_selected_data['competitorname'] == candy].iloc[0]
-            values = [
-                candy_data_item['winpercent'],
-                candy_data_item['sugarpercent'] * 100,
-                candy_data_item['pricepercent'] * 100,
-                100 if candy_data_item['chocolate'] else 0,
-                100 if candy_data_item['fruity'] else 0,
-                100 if candy_data_item['peanutyalmondy'] else 0,
-                100 if candy_data_item['nougat'] else 0,
-                100 if candy_data_item['crispedricewafer'] else 0,
-                100 if candy_data_item['hard'] else 0,
-                100 if candy_data_item['bar'] else 0,
-                100 if candy_data_item['pluribus'] else 0
-            ]
-
-            user_fig_radar.add_trace(go.Scatterpolar(
-                r=values,
-                theta=categories,
-                fill='toself',
-                name=candy
-            ))
-
-        user_fig_radar.update_layout(
-            polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-            showlegend=True,
-            legend=dict(font=dict(color="#FF9900")),
-            paper_bgcolor='#F8F0E3',
-            plot_bgcolor= '#F8F0E3',
-            font_color='#333333',
-        )
+                st.markdown(f"*{analysis['notes']['pricepercent']}*")
+                st.caption(f"Difference from average: {intervals['pricepercent']}")
+            profile.checkpoint('tab2 metrics')
+            # Radar chart for user-selected candies
+            user_fig_radar = profile.cached(
+                'load_radar_figure', load_radar_figure, candy_version, tuple(user_selected_candies)
+            )
 
-        st.plotly_chart(user_fig_radar, use_container_width=True)
+            st.plotly_chart(user_fig_radar, use_container_width=True)
+            profile.checkpoint('tab2 radar chart')
 
-        st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
+            st.markdown(SECTION_DIVIDER, unsafe_allow_html=True)
 
-        st.markdown("#### 🧛‍♂️ Candy Concoction Analysis")
+            st.markdown("#### 🧛‍♂️ Candy Concoction Analysis")
         
-        analysis_text = ""
+            st.markdown("\n\n".join(analysis['messages']))
 
-        if avg_win > overall_avg_win:
-            analysis_text += "🎃 Your selection has an above-average win rate. It's likely to be popular with trick-or-treaters!\n\n"
-        else:
-            analysis_text += "💀 Your selection has a below-average win rate. Consider adding some more popular candies to increase its appeal.\n\n"
+            st.markdown(FINAL_THOUGHTS, unsafe_allow_html=True)
+            profile.checkpoint('tab2 messages')
 
-        if avg_sugar > overall_avg_sugar:
-            analysis_text += "🍭 Your selection has an above-average sugar content percentile. It might be extra sweet compared to other candies.\n\n"
-        else:
-            analysis_text += "🥕 Your selection has a below-average sugar content percentile. This might be appealing to health-conscious parents.\n\n"
+st.sidebar.markdown(ABOUT, unsafe_allow_html=True)
 
-        if avg_price > overall_avg_price:
-            analysis_text += "💰 Your selection has an above-average price percentile. While this might indicate higher quality, consider including some more affordable options to balance your budget.\n\n"
-        else:
-            analysis_text += "💵 Your selection has a below-average price percentile, which could be good for your budget. Just ensure you're not compromising too much on quality or popularity.\n\n"
-
-        # Check for common allergens
-        contains_allergens = any(user_selected_data['peanutyalmondy'])
-        if contains_allergens:
-            analysis_text += "🚫 **Allergy Warning**: Some of your selected candies contain nuts. Consider adding nut-free options to accommodate those with allergies.\n\n"
-
-        # Check for variety in candy types
-        contains_chocolate = any(user_selected_data['chocolate'])
-        contains_fruity = any(user_selected_data['fruity'])
-        contains_caramel = any(user_selected_data['caramel'])
-
-        if not contains_chocolate:
-            analysis_text += "🍫 Consider adding chocolate: None of your selected candies contain chocolate. Including chocolate-based candies can appeal to many trick-or-treaters.\n\n"
-
-        if not contains_fruity:
-            analysis_text += "🍎 Consider adding fruity candies: None of your selected candies are fruity. Adding fruity candies can provide balance and variety.\n\n"
-
-        if not contains_caramel:
-            analysis_text += "🍬 Consider adding caramel candies: Your selection doesn't include caramel candies, which are popular. Including them can make your assortment more versatile.\n\n"
-
-        st.markdown(analysis_text)
-
-        st.markdown("""
-        <div style="background-color: #2E2E2E; color: white; border-radius: 10px; padding: 20px; margin-top: 20px;">
-            <h4 style="color: #FF6600;">🎭 Final Thoughts</h4>
-            <p>Remember, the perfect Halloween candy assortment often includes a mix of different types, flavors, and price points to appeal to a wide range of trick-or-treaters. 
-            Feel free to adjust your selection based on this analysis to create the ultimate Halloween treat experience!</p>
-        </div>
-        """, unsafe_allow_html=True)
-
-st.sidebar.markdown("""
-<div style="background-color: #2E2E2E; color: white; border-radius: 10px; padding: 20px; margin-top: 20px;">
-    <h4 style="color: #FF6600;">About This Dashboard</h4>
-<p>
-Welcome to our spooktacular candy selection tool! Discover the perfect mix of treats for your trick-or-treaters using our data-driven approach. 
-Explore our top recommendations or create your own haunting blend of sweets!
-</p>
-<p>
-    <a href="https://mavenanalytics.io/challenges/maven-halloween-challenge/701f06a2-a19b-41e9-95d3-37a0dcc5492f" style="color: #FF6600;">Created for Maven Halloween Challenge</a></li>
-</p>
-<p>Connect with me:</p>
-<ul>
-    <li><a href="https://www.linkedin.com/in/santanu-jha-845510292/" style="color: #FF6600;">LinkedIn</a></li>
-    <li><a href="https://github.com/jhasantanu9" style="color: #FF6600;">GitHub</a></li>
-    <li><a href="https://santanujha.netlify.app/" style="color: #FF6600;">Portfolio</a></li>
-</ul>
-""", unsafe_allow_html=True)
+# Render profile panel, filled in after everything else has been timed
+if profile.enabled:
+    history = st.session_state.setdefault('profile_history', [])
+    last_rerun = profile.finish(history)
+    with st.sidebar.expander("⏱️ Render Profile", expanded=True):
+        st.caption(f"Last rerun: {last_rerun['total_ms']:.1f} ms over {len(history)} recorded reruns")
+        st.dataframe(
+            [{'section': name, 'ms': ms} for name, ms in last_rerun['sections'].items()],
+            hide_index=True,
+            use_container_width=True
+        )
+        if last_rerun['caches']:
+            st.dataframe(
+                [{'cache': name, **counts} for name, counts in last_rerun['caches'].items()],
+                hide_index=True,
+                use_container_width=True
+            )
+        st.markdown("**Across recorded reruns**")
+        st.dataframe(summarize_history(history), hide_index=True, use_container_width=True)
+        st.download_button(
+            "📥 Download profile log",
+            history_jsonl(history),
+            file_name="candy-profile.jsonl",
+            mime="application/json"
+        )
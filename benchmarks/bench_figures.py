@@ -0,0 +1,88 @@
+"""Build and serialize cost of the radar chart, old path vs. candy_figures.
+
+Each variant is timed the way a rerun pays for it: building the figure, then
+what ``st.plotly_chart`` does with it (Streamlit validates dicts but not
+Figures, then serializes with ``plotly.io.to_json``).
+
+    go_figure     go.Figure + add_trace + update_layout (the original app code)
+    dict_spec     radar_spec dict, validated by st.plotly_chart
+    spec_figure   radar_figure: dict spec wrapped without validation
+    cached        a radar_figure built earlier, serialization only
+
+Usage:
+    python benchmarks/bench_figures.py --runs 200 --candies 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import plotly.tools
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import streamlit.elements.plotly_chart  # noqa: E402,F401  (registers the streamlit template)
+
+from candy_core import CandyCatalog  # noqa: E402
+from candy_figures import radar_figure, radar_spec  # noqa: E402
+from candy_views import RADAR_CATEGORIES  # noqa: E402
+
+
+def go_figure(views, names):
+    fig = go.Figure()
+    for name in names:
+        fig.add_trace(go.Scatterpolar(r=views[name].radar, theta=RADAR_CATEGORIES, fill='toself', name=name))
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+        showlegend=True,
+        legend=dict(font=dict(color="#FF9900")),
+        paper_bgcolor='#F8F0E3',
+        plot_bgcolor='#F8F0E3',
+        font_color='#333333',
+    )
+    return fig
+
+
+def serialize(figure):
+    # What st.plotly_chart does with its argument
+    figure = plotly.tools.return_figure_from_figure_or_data(figure, validate_figure=True)
+    return pio.to_json(figure, validate=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--candies', type=int, default=3)
+    args = parser.parse_args()
+
+    catalog = CandyCatalog()
+    views = catalog.views
+    names = catalog.data['competitorname'].astype(str).tolist()[:args.candies]
+    cached = radar_figure(views, names, 'selection')
+
+    variants = {
+        'go_figure': lambda: go_figure(views, names),
+        'dict_spec': lambda: radar_spec(views, names, 'selection'),
+        'spec_figure': lambda: radar_figure(views, names, 'selection'),
+        'cached': lambda: cached,
+    }
+    print(f'{"variant":<12} {"build ms":>9} {"serialize ms":>13} {"total ms":>9} {"JSON bytes":>11}')
+    for name, build in variants.items():
+        build_time = serialize_time = 0.0
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            figure = build()
+            middle = time.perf_counter()
+            spec = serialize(figure)
+            build_time += middle - start
+            serialize_time += time.perf_counter() - middle
+        build_ms = build_time / args.runs * 1000
+        serialize_ms = serialize_time / args.runs * 1000
+        print(f'{name:<12} {build_ms:9.3f} {serialize_ms:13.3f} {build_ms + serialize_ms:9.3f} {len(spec):11,}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark the bitset filter index against the original pandas mask chain.
+
+Two query mixes are timed: random checkboxes with random sugar/price ranges,
+and the same checkboxes with the sliders left at their full range, which the
+index answers from the flag bitsets alone.
+
+Usage:
+    python benchmarks/bench_filter.py --rows 100000 --queries 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from candy_index import CHARACTERISTICS, CandyIndex  # noqa: E402
+from synthetic import make_catalog  # noqa: E402
+
+
+def make_queries(count, seed=1):
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(count):
+        flags = [name for name in CHARACTERISTICS if rng.random() < 0.2]
+        sugar = tuple(sorted(rng.integers(0, 101, 2) / 100))
+        price = tuple(sorted(rng.integers(0, 101, 2) / 100))
+        queries.append((flags, sugar, price))
+    return queries
+
+
+def mask_filter(data, flags, sugar_range, price_range):
+    # Same predicate chain the dashboard used before the index existed
+    mask = pd.Series(True, index=data.index)
+    for name in flags:
+        mask &= data[name] == 1
+    mask &= (data['sugarpercent'] >= sugar_range[0]) & (data['sugarpercent'] <= sugar_range[1])
+    mask &= (data['pricepercent'] >= price_range[0]) & (data['pricepercent'] <= price_range[1])
+    return np.flatnonzero(mask.to_numpy())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    data = make_catalog(args.rows)
+    queries = make_queries(args.queries)
+
+    start = time.perf_counter()
+    index = CandyIndex.from_frame(data)
+    build = time.perf_counter() - start
+
+    print(f'rows: {args.rows:,}  queries: {args.queries}')
+    print(f'index build:   {build * 1000:9.2f} ms')
+    full = (0.0, 1.0)
+    mixes = {'ranged': queries, 'flags only': [(flags, full, full) for flags, _, _ in queries]}
+    for mix, mix_queries in mixes.items():
+        start = time.perf_counter()
+        expected = [mask_filter(data, *q) for q in mix_queries]
+        mask_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [index.query(*q) for q in mix_queries]
+        index_time = time.perf_counter() - start
+
+        for e, a in zip(expected, actual):
+            assert np.array_equal(e, a), 'index and mask results differ'
+
+        print(f'{mix}:')
+        print(f'  mask filter:   {mask_time / args.queries * 1000:9.3f} ms/query')
+        print(f'  index filter:  {index_time / args.queries * 1000:9.3f} ms/query')
+        print(f'  speedup:       {mask_time / index_time:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
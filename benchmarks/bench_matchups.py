@@ -0,0 +1,71 @@
+"""Throughput of the matchup log and the online win-rate / Elo estimators.
+
+Appends ``--votes`` random head-to-head votes in batches, then times how long
+a tracker takes to fold them in, and the cost of small incremental refreshes.
+
+Usage:
+    python benchmarks/bench_matchups.py --candies 100000 --votes 10000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from candy_matchups import VOTE, MatchupLog, MatchupTracker  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candies', type=int, default=100_000)
+    parser.add_argument('--votes', type=int, default=10_000_000)
+    parser.add_argument('--batch', type=int, default=100_000, help='votes per append')
+    parser.add_argument('--elo', action='store_true', help='also update Elo ratings')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = rng.uniform(20, 90, args.candies)
+    names = [f'Candy {i:08d}' for i in range(args.candies)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'votes.log')
+        log = MatchupLog(path, names)
+        tracker = MatchupTracker(path, names, base, elo=args.elo)
+
+        batches = []
+        for start in range(0, args.votes, args.batch):
+            size = min(args.batch, args.votes - start)
+            a = rng.integers(0, args.candies, size)
+            batches.append((a, (a + rng.integers(1, args.candies, size)) % args.candies, rng.random(size) < 0.5))
+
+        start = time.perf_counter()
+        for a, b, b_won in batches:
+            log.append(a, b, b_won)
+        append_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ingested = tracker.refresh()
+        refresh_time = time.perf_counter() - start
+        assert ingested == args.votes
+
+        small = batches[0]
+        small_times = []
+        for size in (100, 1_000, 10_000):
+            log.append(small[0][:size], small[1][:size], small[2][:size])
+            start = time.perf_counter()
+            tracker.refresh()
+            small_times.append((size, time.perf_counter() - start))
+
+    print(f'candies: {args.candies:,}  votes: {args.votes:,}  elo: {args.elo}')
+    print(f'append:   {args.votes / append_time / 1e6:8.1f} M votes/s  ({args.votes * VOTE.itemsize / 2**20:.0f} MB log)')
+    print(f'refresh:  {args.votes / refresh_time / 1e6:8.1f} M votes/s')
+    for size, seconds in small_times:
+        print(f'refresh of {size:>6,} new votes: {seconds * 1000:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Cold-start cost of the dashboard, each measurement in a fresh interpreter.
+
+    imports          import every module app.py imports at the top
+    plotly_express   what ``import plotly.express`` adds after those (app.py
+                     used to import it without using it)
+    first_render     AppTest's first run of app.py, with the columnar store
+                     already built (the snapshot from ``python candy_store.py``)
+    first_render_no_snapshot
+                     the same with no store, so the first run ingests the CSV
+
+For the renders, ``script ms`` is the app script's own time (from its
+CANDY_PROFILE log); the rest is Streamlit's per-run setup. The renders run
+in a temporary directory holding a copy of the CSV, so the store they build
+and delete is never the working tree's.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+import argparse
+import ast
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, ROOT)
+
+from candy_core import DATA_PATH  # noqa: E402
+from candy_store import default_store_dir  # noqa: E402
+
+IMPORTS = """
+import json, sys, time
+start = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+imported = time.perf_counter()
+import plotly.express
+print(json.dumps({{'imports': (imported - start) * 1000,
+                  'plotly_express': (time.perf_counter() - imported) * 1000}}))
+"""
+
+FIRST_RENDER = """
+import json, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+elapsed = (time.perf_counter() - start) * 1000
+assert not at.exception, at.exception
+print(json.dumps({{'first_render': elapsed}}))
+"""
+
+
+def app_imports():
+    """Top-level modules imported by app.py, in order."""
+    with open(os.path.join(ROOT, 'app.py')) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return modules
+
+
+def run_child(code, env=None, cwd=ROOT):
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=cwd, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def render(workdir, profile_log, snapshot):
+    """First render of app.py run from ``workdir``, which holds a copy of the data."""
+    if not snapshot:
+        shutil.rmtree(os.path.join(workdir, default_store_dir(DATA_PATH)), ignore_errors=True)
+    if os.path.exists(profile_log):
+        os.unlink(profile_log)
+    env = dict(os.environ, CANDY_PROFILE='1', CANDY_PROFILE_LOG=profile_log, PYTHONPATH=ROOT)
+    timings = run_child(FIRST_RENDER.format(app=os.path.join(ROOT, 'app.py')), env, cwd=workdir)
+    with open(profile_log) as f:
+        timings['script'] = json.loads(f.readline())['total_ms']
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [run_child(IMPORTS.format(modules=app_imports())) for _ in range(args.runs)]
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, os.path.dirname(DATA_PATH)))
+        shutil.copy2(os.path.join(ROOT, DATA_PATH), os.path.join(tmp, DATA_PATH))
+        profile_log = os.path.join(tmp, 'profile.jsonl')
+        # Without a store first; that run leaves the snapshot the next one uses
+        renders = {'first_render_no_snapshot': [], 'first_render': []}
+        for _ in range(args.runs):
+            renders['first_render_no_snapshot'].append(render(tmp, profile_log, snapshot=False))
+            renders['first_render'].append(render(tmp, profile_log, snapshot=True))
+
+    print(f'{"metric":<26} {"median ms":>10} {"script ms":>10}')
+    for name in ('imports', 'plotly_express'):
+        print(f'{name:<26} {statistics.median(run[name] for run in imports):10.1f}')
+    for name, runs in renders.items():
+        print(f'{name:<26} {statistics.median(run["first_render"] for run in runs):10.1f} '
+              f'{statistics.median(run["script"] for run in runs):10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Markup cost of the candy cards, old f-strings vs. candy_templates.
+
+Lays out the Create Your Own Potion tab's cards for ``--candies`` candies in
+rows of three, plus the page style sheet, and measures what one rerun costs:
+
+    fstring     one markdown element per card from the original f-string,
+                with the original style sheet
+    templates   one element per row of cards (``card_row``), minified styles
+
+For each variant it prints the build time, the time to wrap and serialize
+the elements as ForwardMsgs (what Streamlit sends over the websocket), the
+element count and the bytes sent on the first run and on later reruns. On a
+rerun the browser already holds every element at least
+``global.minCachedMessageSize`` bytes long, so only its hash is sent; the
+rerun columns use Streamlit's default threshold and the one in
+.streamlit/config.toml.
+
+Usage:
+    python benchmarks/bench_templates.py --runs 200 --candies 85
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+from streamlit.runtime.forward_msg_cache import create_reference_msg, populate_hash_if_needed  # noqa: E402
+
+from candy_core import CandyCatalog  # noqa: E402
+from candy_templates import PAGE_STYLE, PICK_CARD, card_row  # noqa: E402
+
+DEFAULT_CACHE_THRESHOLD = 10_000
+CONFIGURED_CACHE_THRESHOLD = 512
+
+# The original app's style sheet
+OLD_STYLE = """
+<style>
+    .stApp {
+        background-color: #F8F0E3;
+        color: #333333;
+    }
+    h1, h2, h3, h4, h5 {
+        color: #D35400;
+        font-family: 'Arial', sans-serif;
+    }
+    .stPlotlyChart {
+        background-color: #FFFFFF;
+    }
+    .stButton>button {
+        color: #FFFFFF;
+        background-color: #D35400;
+        border-radius: 5px;
+    }
+    .stTextInput>div>div>input {
+        color: #333333;
+    }
+    .stSelectbox>div>div>select {
+        color: #333333;
+    }
+    .stMultiSelect>div>div>select {
+        color: #333333;
+    }
+    .candy-card {
+        background-color: white;
+        border-radius: 10px;
+        padding: 20px;
+        margin-bottom: 20px;
+        border: 2px solid #D35400;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        height:370px;
+    }
+    .section-divider {
+        border-top: 2px solid #D35400;
+        margin: 30px 0;
+    }
+    .metric-card {
+        background-color: #FFFFFF;
+        border-radius: 10px;
+        padding: 15px;
+        margin-bottom: 20px;
+        border: 1px solid #D35400;
+    }
+    .sidebar-info {
+        background-color: #FFFFFF;
+        border-radius: 10px;
+        padding: 15px;
+        margin-top: 20px;
+        border: 1px solid #D35400;
+    }
+</style>
+"""
+
+
+def fstring_elements(views, rows):
+    elements = [OLD_STYLE]
+    for row in rows:
+        for candy in row:
+            candy_info = views[candy]
+            elements.append(f"""
+                        <div class="candy-card">
+                            <p style=" font-size:18px; text-align: center; color: #D35400;"><strong>{candy}</strong></p>
+                            <hr style="border-top: 1px solid #D35400;">
+                            <p><strong>Win Percentage:</strong> {candy_info.win_text}</p>
+                            <p><strong>Sugar Percentile:</strong> {candy_info.sugar_text}</p>
+                            <p><strong>Price Percentile:</strong> {candy_info.price_text}</p>
+                            <p><strong>Characteristics:</strong> {candy_info.characteristics}</p>
+                        </div>
+                        """)
+    return elements
+
+
+def template_elements(views, rows):
+    elements = [PAGE_STYLE]
+    for row in rows:
+        row_views = [views[candy] for candy in row]
+        elements.append(card_row([
+            PICK_CARD(candy, view.win_text, view.sugar_text, view.price_text, view.characteristics)
+            for candy, view in zip(row, row_views)
+        ], len(row)))
+    return elements
+
+
+def messages(elements):
+    """Serialized markdown ForwardMsgs and the hash references that replace them."""
+    sizes = []
+    for body in elements:
+        msg = ForwardMsg()
+        msg.delta.new_element.markdown.body = body
+        msg.delta.new_element.markdown.allow_html = True
+        populate_hash_if_needed(msg)
+        sizes.append((len(msg.SerializeToString()), len(create_reference_msg(msg).SerializeToString())))
+    return sizes
+
+
+def rerun_bytes(sizes, threshold):
+    return sum(reference if size >= threshold else size for size, reference in sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--candies', type=int, default=85)
+    args = parser.parse_args()
+
+    catalog = CandyCatalog()
+    views = catalog.views
+    names = catalog.data['competitorname'].astype(str).tolist()[:args.candies]
+    rows = [names[i:i + 3] for i in range(0, len(names), 3)]
+
+    variants = {'fstring': fstring_elements, 'templates': template_elements}
+    print(f'{"variant":<10} {"build ms":>9} {"send ms":>8} {"total ms":>9} {"elements":>9} {"first run":>10} '
+          f'{"rerun @" + str(DEFAULT_CACHE_THRESHOLD):>12} {"rerun @" + str(CONFIGURED_CACHE_THRESHOLD):>11}')
+    for name, build in variants.items():
+        build_time = send_time = 0.0
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            elements = build(views, rows)
+            middle = time.perf_counter()
+            sizes = messages(elements)
+            build_time += middle - start
+            send_time += time.perf_counter() - middle
+        first = sum(size for size, _ in sizes)
+        build_ms, send_ms = build_time / args.runs * 1000, send_time / args.runs * 1000
+        print(f'{name:<10} {build_ms:9.3f} {send_ms:8.3f} {build_ms + send_ms:9.3f} '
+              f'{len(elements):9} {first:10,} {rerun_bytes(sizes, DEFAULT_CACHE_THRESHOLD):12,} '
+              f'{rerun_bytes(sizes, CONFIGURED_CACHE_THRESHOLD):11,}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Load test for a running api.py instance.
+
+Opens ``--concurrency`` keep-alive connections and sends a mix of /filter and
+/analyze requests on each for ``--duration`` seconds, then reports throughput
+and latency percentiles.
+
+Usage:
+    python api.py --port 8000 &
+    python benchmarks/load_test.py --port 8000 --concurrency 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+FLAGS = ['chocolate', 'fruity', 'caramel', 'peanutyalmondy', 'nougat',
+         'crispedricewafer', 'hard', 'bar', 'pluribus']
+
+
+def post(host, path, body):
+    payload = json.dumps(body).encode()
+    return (f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n"
+            ).encode() + payload
+
+
+def make_request(host, rng, names):
+    if names and rng.random() < 0.3:
+        path = '/analyze'
+        body = {'candies': rng.sample(names, min(len(names), rng.randint(1, 5)))}
+    else:
+        path = '/filter'
+        low = rng.randint(0, 60)
+        body = {
+            'flags': [flag for flag in FLAGS if rng.random() < 0.15],
+            'sugar_range': [low, rng.randint(low, 100)],
+            'sort_by': rng.choice(['winpercent', 'sugarpercent', 'pricepercent']),
+            'page': rng.randint(1, 3),
+        }
+    return post(host, path, body)
+
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def fetch(host, port, request):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(request)
+    await writer.drain()
+    _, body = await read_response(reader)
+    writer.close()
+    return json.loads(body)
+
+
+async def client(host, port, deadline, seed, names, latencies, errors):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    while time.perf_counter() < deadline:
+        request = make_request(host, rng, names)
+        start = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+        status, _ = await read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+    writer.close()
+
+
+async def run(args):
+    # Candy names for /analyze requests come from the server itself
+    listing = await fetch(args.host, args.port, post(args.host, '/filter', {'page_size': 1000}))
+    names = [row['competitorname'] for row in listing.get('candies', [])]
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(args.host, args.port, deadline, seed, names, latencies, errors)
+        for seed in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    print(f"{len(latencies)} requests in {elapsed:.1f} s over {args.concurrency} connections: "
+          f"{len(latencies) / elapsed:,.0f} req/s, {len(errors)} errors")
+    print(f"latency ms  p50 {np.percentile(ms, 50):.2f}  p90 {np.percentile(ms, 90):.2f}  "
+          f"p99 {np.percentile(ms, 99):.2f}  max {ms.max():.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""Benchmark suite over synthetic catalogs from 10^3 to 10^7 rows.
+
+For each catalog size this times the dashboard's hot paths:
+
+    load_data_cold   CandyCatalog from the CSV with no columnar store yet
+    load_data_warm   CandyCatalog when the store is already built
+    filter           catalog.filter for random flag/slider combinations
+    filter_page      filter plus sorting and paging the result
+    analysis         averages and Concoction Analysis for 3 random candies
+    intervals        bootstrap intervals and p-values for the same selections
+    radar_figure     the Plotly radar figure for 3 candies
+    similar          5 nut-free nearest neighbours of a random candy
+    predict_all      model win rate for every row of the catalog
+
+Results are written as JSON (environment, git commit and one record per size
+and metric) so runs can be compared with ``--compare``.
+
+Usage:
+    python benchmarks/run_suite.py --sizes 1000 100000 1000000 --output results.json
+    python benchmarks/run_suite.py --sizes 1000 100000 --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import plotly
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from candy_core import CandyCatalog  # noqa: E402
+from candy_figures import radar_figure  # noqa: E402
+from candy_index import CHARACTERISTICS  # noqa: E402
+from candy_paging import SORT_COLUMNS  # noqa: E402
+from candy_store import default_store_dir  # noqa: E402
+from synthetic import write_catalog  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def timed(function, runs):
+    """Run ``function`` ``runs`` times; returns milliseconds per run."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def random_queries(count, seed):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        flags = [name for name in CHARACTERISTICS if rng.random() < 0.15]
+        sugar = sorted(rng.randint(0, 100) for _ in range(2))
+        price = sorted(rng.randint(0, 100) for _ in range(2))
+        queries.append((flags, sugar, price, rng.choice(SORT_COLUMNS)))
+    return queries
+
+
+def catalog_path(rows, seed):
+    path = os.path.join(DATA_DIR, f'candy-{rows}-{seed}.csv')
+    if not os.path.exists(path):
+        print(f'generating {rows:,} rows...', file=sys.stderr)
+        write_catalog(path, rows, seed)
+    return path
+
+
+def bench_size(rows, args):
+    path = catalog_path(rows, args.seed)
+    shutil.rmtree(default_store_dir(path), ignore_errors=True)
+    results = {}
+
+    start = time.perf_counter()
+    catalog = CandyCatalog(path)
+    results['load_data_cold'] = [(time.perf_counter() - start) * 1000]
+    results['load_data_warm'] = timed(lambda: CandyCatalog(path), args.load_runs)
+
+    queries = random_queries(args.queries, args.seed)
+    results['filter'] = [
+        timed(lambda: catalog.filter(flags, sugar, price), 1)[0]
+        for flags, sugar, price, _ in queries
+    ]
+    results['filter_page'] = [
+        timed(lambda: catalog.pager.page(catalog.filter(flags, sugar, price), column, True, 1, 25), 1)[0]
+        for flags, sugar, price, column in queries
+    ]
+
+    rng = random.Random(args.seed)
+    names = catalog.data['competitorname']
+    selections = [
+        [str(names.iloc[rng.randrange(rows)]) for _ in range(3)] for _ in range(args.queries)
+    ]
+    results['analysis'] = [
+        timed(lambda: catalog.analyze_selection(selection), 1)[0] for selection in selections
+    ]
+    results['intervals'] = [
+        timed(lambda: catalog.selection_intervals(selection), 1)[0] for selection in selections
+    ]
+    results['radar_figure'] = [
+        timed(lambda: radar_figure(catalog.views, selection), 1)[0] for selection in selections
+    ]
+    results['similar'] = [
+        timed(lambda: catalog.similar(selection[0], 5, exclude=['peanutyalmondy']), 1)[0]
+        for selection in selections
+    ]
+    results['predict_all'] = timed(catalog.predicted_winpercent, args.load_runs)
+
+    records = []
+    for metric, times in results.items():
+        times = np.array(times)
+        records.append({
+            'rows': rows,
+            'metric': metric,
+            'runs': len(times),
+            'median_ms': round(float(np.median(times)), 4),
+            'p90_ms': round(float(np.percentile(times, 90)), 4),
+            'min_ms': round(float(times.min()), 4),
+            'max_ms': round(float(times.max()), 4),
+        })
+        print(f'{rows:>10,}  {metric:<15} median {records[-1]["median_ms"]:10.3f} ms', file=sys.stderr)
+    return records
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+    }
+
+
+def compare(results, baseline):
+    """Print median ratios (current / baseline) for metrics present in both runs."""
+    before = {(r['rows'], r['metric']): r['median_ms'] for r in baseline['results']}
+    print(f'{"rows":>10}  {"metric":<15} {"baseline ms":>12} {"current ms":>12} {"ratio":>7}')
+    for record in results['results']:
+        key = (record['rows'], record['metric'])
+        if key in before:
+            ratio = record['median_ms'] / before[key] if before[key] else float('inf')
+            print(f'{key[0]:>10,}  {key[1]:<15} {before[key]:12.3f} {record["median_ms"]:12.3f} {ratio:7.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='catalog sizes in rows (up to 10000000)')
+    parser.add_argument('--queries', type=int, default=50, help='filter queries and selections per size')
+    parser.add_argument('--load-runs', type=int, default=3, help='warm load_data repetitions')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results JSON here (default: stdout)')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    results = {'environment': environment(), 'results': []}
+    for rows in args.sizes:
+        results['results'].extend(bench_size(rows, args))
+
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(results, out, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Synthetic candy catalogs with the same schema as data/candy-data.csv.
+
+Flag rates follow the real dataset (chocolate and fruity rarely overlap, bars
+are chocolate, ...), and ``winpercent`` rises with chocolate and peanuts the
+way the notebook found, so filters and rankings see realistic selectivity.
+
+Usage:
+    python benchmarks/synthetic.py --rows 1000000 --output benchmarks/data/candy-1000000.csv
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from candy_index import CHARACTERISTICS  # noqa: E402
+
+COLUMNS = ['competitorname'] + CHARACTERISTICS + ['sugarpercent', 'pricepercent', 'winpercent']
+
+# Rows generated per step when writing a CSV, so 10^7-row catalogs stay in memory bounds
+WRITE_CHUNK = 1_000_000
+
+
+def make_catalog(rows, seed=0, start=0):
+    """A DataFrame of ``rows`` synthetic candies; names are numbered from ``start``."""
+    rng = np.random.default_rng(seed)
+    chocolate = rng.random(rows) < 0.44
+    fruity = ~chocolate & (rng.random(rows) < 0.8)
+    flags = {
+        'chocolate': chocolate,
+        'fruity': fruity,
+        'caramel': rng.random(rows) < 0.16,
+        'peanutyalmondy': chocolate & (rng.random(rows) < 0.35),
+        'nougat': chocolate & (rng.random(rows) < 0.18),
+        'crispedricewafer': chocolate & (rng.random(rows) < 0.18),
+        'hard': fruity & (rng.random(rows) < 0.35),
+        'bar': chocolate & (rng.random(rows) < 0.55),
+        'pluribus': rng.random(rows) < 0.52,
+    }
+    win = (42 + 15 * chocolate + 8 * flags['peanutyalmondy'] + 5 * flags['crispedricewafer']
+           - 5 * flags['hard'] + rng.normal(0, 9, rows))
+
+    data = {'competitorname': [f'Candy {i:08d}' for i in range(start, start + rows)]}
+    for name in CHARACTERISTICS:
+        data[name] = flags[name].astype(np.int64)
+    data['sugarpercent'] = rng.integers(0, 1000, rows) / 1000
+    data['pricepercent'] = np.clip(rng.normal(0.45 + 0.2 * chocolate, 0.25), 0.0, 1.0).round(3)
+    data['winpercent'] = np.clip(win, 20.0, 90.0).round(6)
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def write_catalog(path, rows, seed=0):
+    """Write a synthetic catalog CSV in chunks; returns ``path``."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='') as out:
+        for step, start in enumerate(range(0, rows, WRITE_CHUNK)):
+            chunk = make_catalog(min(WRITE_CHUNK, rows - start), seed=(seed, step), start=start)
+            chunk.to_csv(out, header=start == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+    write_catalog(args.output, args.rows, args.seed)
+    print(f'wrote {args.rows:,} candies to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
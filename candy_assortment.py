@@ -0,0 +1,186 @@
+"""Best k-candy assortment under budget, sugar, nut-free and variety constraints.
+
+Maximizes the average ``winpercent`` of k candies such that the average
+``pricepercent`` and ``sugarpercent`` stay under the given ceilings, optionally
+excluding nut candies and requiring at least one candy of each listed type.
+
+The solver works in three steps:
+
+1. A Lagrangian relaxation (price and sugar moved into the objective, variety
+   dropped) gives an upper bound; each bound is a vectorized top-k selection.
+2. A greedy pass in reduced-score order gives a feasible lower bound, and
+   reduced-cost fixing discards every candy that cannot appear in a solution
+   better than it.
+3. Branch-and-bound over the remaining pool in reduced-score order, with the
+   Lagrangian, budget and variety bounds checked at every node.
+"""
+
+import time
+from collections import namedtuple
+
+import numpy as np
+
+DEFAULT_REQUIRE = ['chocolate', 'fruity', 'caramel']
+
+AssortmentResult = namedtuple('AssortmentResult', [
+    'positions',    # row positions of the chosen candies
+    'avg_win', 'avg_price', 'avg_sugar',
+    'optimal',      # False if the node limit stopped the search early
+    'upper_bound',  # best possible average win rate found by the relaxation
+    'pool_size',    # candidates left after reduced-cost fixing
+    'nodes',        # branch-and-bound nodes visited
+    'seconds',
+])
+
+
+def _top_k_sum(scores, k):
+    top = np.argpartition(-scores, k - 1)[:k]
+    return scores[top].sum(), top
+
+
+def _lagrangian_bound(win, price, sugar, k, price_budget, sugar_budget, iterations=60):
+    """Minimize the Lagrangian dual with projected subgradient steps."""
+    lam = np.zeros(2)
+    best = (np.inf, lam.copy())
+    step = max(win.max() - win.min(), 1.0)
+    for t in range(iterations):
+        scores = win - lam[0] * price - lam[1] * sugar
+        total, top = _top_k_sum(scores, k)
+        bound = total + lam[0] * price_budget + lam[1] * sugar_budget
+        if bound < best[0]:
+            best = (bound, lam.copy())
+        # Subgradient: how far the relaxed solution overshoots each budget
+        gradient = np.array([price[top].sum() - price_budget, sugar[top].sum() - sugar_budget])
+        if not gradient.any():
+            break
+        lam = np.maximum(0.0, lam + step / (t + 1) * gradient)
+    return best
+
+
+def _greedy(order, win, price, sugar, cover, k, price_budget, sugar_budget, required_mask):
+    """Fill k slots in the given order, keeping the constraints satisfiable.
+
+    Each candy may use at most its fair share of the remaining budgets, which
+    keeps the per-slot allowance from shrinking as slots fill up.
+    """
+    chosen, total_price, total_sugar, covered = [], 0.0, 0.0, 0
+    for i in order:
+        slots = k - len(chosen)
+        missing = bin(required_mask & ~(covered | int(cover[i]))).count('1')
+        if (price[i] * slots <= price_budget - total_price
+                and sugar[i] * slots <= sugar_budget - total_sugar
+                and missing <= slots - 1):
+            chosen.append(i)
+            total_price += price[i]
+            total_sugar += sugar[i]
+            covered |= int(cover[i])
+            if len(chosen) == k:
+                break
+    if len(chosen) == k and covered & required_mask == required_mask:
+        return win[chosen].sum(), chosen
+    return -np.inf, []
+
+
+def solve_assortment(data, k, max_avg_price=1.0, max_avg_sugar=1.0, nut_free=False,
+                     require=DEFAULT_REQUIRE, allowed=None, node_limit=100_000):
+    """Find the best k-candy assortment; returns None if no assortment is feasible.
+
+    ``allowed`` optionally restricts the search to these row positions (e.g. the
+    current filter result).
+    """
+    start = time.perf_counter()
+
+    positions = np.arange(len(data)) if allowed is None else np.asarray(allowed)
+    if nut_free:
+        positions = positions[~data['peanutyalmondy'].to_numpy(dtype=bool)[positions]]
+    if len(positions) < k or k <= 0:
+        return None
+
+    win = data['winpercent'].to_numpy(dtype=np.float64)[positions]
+    price = data['pricepercent'].to_numpy(dtype=np.float64)[positions]
+    sugar = data['sugarpercent'].to_numpy(dtype=np.float64)[positions]
+    cover = np.zeros(len(positions), dtype=np.int64)
+    for bit, name in enumerate(require):
+        cover |= data[name].to_numpy(dtype=np.int64)[positions] << bit
+    required_mask = (1 << len(require)) - 1
+    price_budget, sugar_budget = k * max_avg_price, k * max_avg_sugar
+
+    # 1. Upper bound from the Lagrangian relaxation
+    upper, lam = _lagrangian_bound(win, price, sugar, k, price_budget, sugar_budget)
+    reduced = win - lam[0] * price - lam[1] * sugar
+
+    # 2. Greedy lower bound, then drop candies that cannot beat it
+    order = np.argsort(-reduced, kind='stable')
+    best_total, best_set = _greedy(order, win, price, sugar, cover, k,
+                                   price_budget, sugar_budget, required_mask)
+    if np.isfinite(best_total):
+        _, top = _top_k_sum(reduced, k)
+        kth = reduced[top].min()
+        keep = upper + (reduced - kth) >= best_total - 1e-9
+        keep[top] = True
+        pool = np.flatnonzero(keep)
+    else:
+        pool = np.arange(len(win))
+
+    # 3. Branch-and-bound over the pool, highest reduced score first
+    pool = pool[np.argsort(-reduced[pool], kind='stable')]
+    p_win, p_price, p_sugar, p_cover = win[pool], price[pool], sugar[pool], cover[pool]
+    n = len(pool)
+    # Prefix sums of the reduced score bound what the remaining slots can add:
+    # any completion gains at most its reduced score plus lam times the budget
+    # it has left
+    reduced_prefix = np.concatenate([[0.0], np.cumsum(reduced[pool])])
+    # Suffix minima / unions bound what the remaining slots can still satisfy
+    min_price_after = np.minimum.accumulate(p_price[::-1])[::-1]
+    min_sugar_after = np.minimum.accumulate(p_sugar[::-1])[::-1]
+    cover_after = np.bitwise_or.accumulate(p_cover[::-1])[::-1]
+
+    rank = np.empty(len(win), dtype=np.int64)
+    rank[pool] = np.arange(n)
+    best = [best_total, list(rank[best_set])]
+    nodes = 0
+    chosen = []
+
+    def search(start, total_win, total_price, total_sugar, covered):
+        nonlocal nodes
+        nodes += 1
+        left = k - len(chosen)
+        if left == 0:
+            if (total_win > best[0] and covered & required_mask == required_mask
+                    and total_price <= price_budget and total_sugar <= sugar_budget):
+                best[0], best[1] = total_win, list(chosen)
+            return
+        # Each next candy is the first of the remaining slots; every bound only
+        # gets tighter as idx grows, so a failed bound ends the whole loop
+        for idx in range(start, n - left + 1):
+            if nodes >= node_limit:
+                return
+            bound = (total_win + reduced_prefix[idx + left] - reduced_prefix[idx]
+                     + lam[0] * (price_budget - total_price) + lam[1] * (sugar_budget - total_sugar))
+            if bound <= best[0] + 1e-9:
+                return
+            if (total_price + left * min_price_after[idx] > price_budget
+                    or total_sugar + left * min_sugar_after[idx] > sugar_budget
+                    or (covered | cover_after[idx]) & required_mask != required_mask):
+                return
+            chosen.append(idx)
+            search(idx + 1, total_win + p_win[idx], total_price + p_price[idx],
+                   total_sugar + p_sugar[idx], covered | int(p_cover[idx]))
+            chosen.pop()
+
+    search(0, 0.0, 0.0, 0.0, 0)
+
+    if not best[1]:
+        return None
+    picked = pool[best[1]]
+    return AssortmentResult(
+        positions=positions[picked],
+        avg_win=win[picked].mean(),
+        avg_price=price[picked].mean(),
+        avg_sugar=sugar[picked].mean(),
+        optimal=nodes < node_limit,
+        upper_bound=upper / k,
+        pool_size=n,
+        nodes=nodes,
+        seconds=time.perf_counter() - start,
+    )
@@ -0,0 +1,249 @@
+"""Offline "Candy Concoction Analysis" for many assortments at once.
+
+Reads assortments from a CSV file, one per line with a candy name in each
+cell (quote names that contain commas), and writes what the dashboard shows for a
+selection (averages, differences from the overall averages, allergy and
+variety warnings; the full message text with ``--messages``) as one report
+row per assortment. The report is CSV, or Parquet if the output ends in
+``.parquet`` (needs pyarrow).
+
+The file is read in blocks of ``--chunk`` lines, and each block is parsed and
+analyzed with ``CandyCatalog.analyze_batch`` (one ``reduceat`` pass per
+column). The messages are looked up in a table built with
+``candy_core.selection_messages``, so the rules are exactly the dashboard's.
+With ``--workers`` the blocks go to a process pool as raw text, which is
+cheaper to send than parsed rows, and each worker opens the memory-mapped
+store, so the data pages are shared. Rows with unknown candies are reported
+with an ``error`` instead of stopping the run.
+
+``--all-candies`` adds every candy on its own and ``--presets`` the Top
+Recommendations trio plus each scoring preset's top three, so a report can be
+made without an input file.
+
+    python candy_batch.py assortments.csv --output report.csv --workers 4
+    python candy_batch.py --all-candies --presets --output report.parquet
+"""
+
+import argparse
+import csv
+import io
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from candy_core import DATA_PATH, METRICS, VARIETY_SUGGESTIONS, CandyCatalog, selection_messages
+from candy_scoring import PRESETS, recommend, score_matrix, top_k
+
+# Lines of the assortments file per analyze_batch call (and per task with --workers)
+BATCH_CHUNK = 50_000
+
+MESSAGE_SEPARATOR = ' | '
+
+# Bits of a message code: above average per metric, nuts, then missing types
+_MESSAGE_BITS = len(METRICS) + 1 + len(VARIETY_SUGGESTIONS)
+
+
+def _message_table():
+    """Joined messages for every message code."""
+    table = []
+    for code in range(1 << _MESSAGE_BITS):
+        bits = [bool(code >> i & 1) for i in range(_MESSAGE_BITS)]
+        above = dict(zip(METRICS, bits))
+        missing = [kind for kind, bit in zip(VARIETY_SUGGESTIONS, bits[len(METRICS) + 1:]) if bit]
+        table.append(MESSAGE_SEPARATOR.join(selection_messages(above, bits[len(METRICS)], missing)))
+    return np.array(table, dtype=object)
+
+
+MESSAGES = _message_table()
+
+# '; '-joined missing types for every combination of the missing bits
+MISSING_TYPES = np.array([
+    '; '.join(kind for i, kind in enumerate(VARIETY_SUGGESTIONS) if code >> i & 1)
+    for code in range(1 << len(VARIETY_SUGGESTIONS))
+], dtype=object)
+
+
+def parse_assortments(lines, first_line=1):
+    """[(label, names)] for each non-blank CSV line; the label is the line number."""
+    rows = [(str(number), [cell.strip() for cell in row if cell.strip()])
+            for number, row in enumerate(csv.reader(lines), first_line)]
+    return [(label, names) for label, names in rows if names]
+
+
+def read_blocks(path, lines_per_block=BATCH_CHUNK):
+    """Yield (first line number, text) for each block of lines of a file.
+
+    Only one block is read at a time.
+    """
+    with open(path, newline='') as f:
+        first_line = 1
+        while True:
+            lines = list(islice(f, lines_per_block))
+            if not lines:
+                return
+            yield first_line, ''.join(lines)
+            first_line += len(lines)
+
+
+def candy_assortments(catalog):
+    """Every candy on its own."""
+    return [(name, [name]) for name in catalog.data['competitorname'].astype(str)]
+
+
+def preset_assortments(catalog, k=3):
+    """The Top Recommendations picks and each scoring preset's top ``k``."""
+    names = catalog.data['competitorname'].astype(str).to_numpy()
+    assortments = [('Top Recommendations', [str(name) for name, _ in recommend(catalog.data)])]
+    scores = score_matrix(catalog.data, list(PRESETS.values()))
+    for i, preset in enumerate(PRESETS.values()):
+        assortments.append((f'{preset.label} top {k}', names[top_k(scores[:, i], k)].tolist()))
+    return assortments
+
+
+def analyze_assortments(catalog, assortments, messages=False):
+    """The report rows for a list of (label, names), as a DataFrame.
+
+    ``messages`` adds the dashboard's message text, joined by
+    ``MESSAGE_SEPARATOR``; it is most of the report's size.
+    """
+    positions, sizes, valid, errors = [], [], [], [None] * len(assortments)
+    # Every name of the block is looked up in one call
+    found = catalog.names.lookup([name for _, names in assortments for name in names])
+    start = 0
+    for i, (_, names) in enumerate(assortments):
+        selection = found[start:start + len(names)]
+        start += len(names)
+        if (selection < 0).any():
+            missing_names = [name for name, position in zip(names, selection) if position < 0]
+            errors[i] = f"Unknown candies: {', '.join(missing_names)}"
+        elif not names:
+            errors[i] = "Select at least one candy"
+        else:
+            positions.append(selection)
+            sizes.append(len(names))
+            valid.append(i)
+    offsets = np.zeros(len(sizes) + 1, dtype=np.intp)
+    np.cumsum(sizes, out=offsets[1:])
+    positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.intp)
+    result = catalog.analyze_batch(positions, offsets)
+
+    bits = [result['above'][metric] for metric in METRICS] + [result['contains_nuts']]
+    bits += [result['missing'][kind] for kind in VARIETY_SUGGESTIONS]
+    codes = sum(bit.astype(np.intp) << i for i, bit in enumerate(bits))
+    missing_codes = codes >> (len(METRICS) + 1)
+
+    def scatter(values, fill):
+        # Values for the valid rows, ``fill`` for the rest
+        column = np.full(len(assortments), fill, dtype=object if fill is None else np.asarray(values).dtype)
+        column[valid] = values
+        return column
+
+    report = {
+        'assortment': [label for label, _ in assortments],
+        'candies': ['; '.join(names) for _, names in assortments],
+        'size': [len(names) for _, names in assortments],
+    }
+    for metric in METRICS:
+        report[f'avg_{metric}'] = scatter(result['averages'][metric], np.nan)
+    for metric in METRICS:
+        report[f'delta_{metric}'] = scatter(result['deltas'][metric], np.nan)
+    report['contains_nuts'] = scatter(result['contains_nuts'], None)
+    report['missing_types'] = scatter(MISSING_TYPES[missing_codes], None)
+    if messages:
+        report['messages'] = scatter(MESSAGES[codes], None)
+    report['error'] = errors
+    return pd.DataFrame(report)
+
+
+_worker_catalog = None
+
+
+def _init_worker(csv_path):
+    global _worker_catalog
+    _worker_catalog = CandyCatalog(csv_path)
+
+
+def _analyze_block(catalog, first_line, text, messages):
+    return analyze_assortments(catalog, parse_assortments(io.StringIO(text), first_line), messages)
+
+
+def _analyze_in_worker(first_line, text, messages):
+    return _analyze_block(_worker_catalog, first_line, text, messages)
+
+
+def _pooled(pool, blocks, messages, in_flight):
+    # Like pool.map, but reads ahead only ``in_flight`` blocks rather than
+    # submitting (and so reading) the whole file at once
+    pending = deque()
+    for first_line, text in blocks:
+        pending.append(pool.submit(_analyze_in_worker, first_line, text, messages))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def batch_report(blocks=(), assortments=(), csv_path=DATA_PATH, workers=1, messages=False,
+                 catalog=None):
+    """The report for ``blocks`` (see ``read_blocks``) followed by ``assortments``.
+
+    With ``workers > 1`` the blocks are parsed and analyzed in a process pool.
+    """
+    catalog = catalog or CandyCatalog(csv_path)
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(csv_path,)) as pool:
+            parts = list(_pooled(pool, blocks, messages, 2 * workers))
+    else:
+        parts = [_analyze_block(catalog, first_line, text, messages) for first_line, text in blocks]
+    if assortments or not parts:
+        # An empty part would turn the integer columns into floats
+        parts.append(analyze_assortments(catalog, list(assortments), messages))
+    return pd.concat(parts, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('assortments', nargs='?', help="CSV with one assortment of candy names per line")
+    parser.add_argument('--output', required=True, help="report path (.csv, or .parquet with pyarrow)")
+    parser.add_argument('--data', default=DATA_PATH, help="candy CSV to analyze against")
+    parser.add_argument('--all-candies', action='store_true', help="add every candy on its own")
+    parser.add_argument('--presets', action='store_true', help="add the recommendation and preset assortments")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk', type=int, default=BATCH_CHUNK, help="lines of the file per batch")
+    parser.add_argument('--messages', action='store_true', help="include the dashboard's message text")
+    args = parser.parse_args()
+    if not (args.assortments or args.all_candies or args.presets):
+        parser.error("give an assortments file, --all-candies or --presets")
+
+    start = time.perf_counter()
+    catalog = CandyCatalog(args.data)
+    blocks = read_blocks(args.assortments, args.chunk) if args.assortments else ()
+    assortments = []
+    if args.all_candies:
+        assortments += candy_assortments(catalog)
+    if args.presets:
+        assortments += preset_assortments(catalog)
+    read = time.perf_counter()
+
+    report = batch_report(blocks, assortments, args.data, args.workers, args.messages, catalog)
+    analyzed = time.perf_counter()
+
+    if args.output.endswith('.parquet'):
+        report.to_parquet(args.output, index=False)
+    else:
+        report.to_csv(args.output, index=False)
+    written = time.perf_counter()
+
+    failed = int(report['error'].notna().sum())
+    print(f"Analyzed {len(report):,} assortments ({failed:,} with errors) with {args.workers} worker(s)")
+    print(f"  setup {read - start:.2f} s, read + parse + analysis {analyzed - read:.2f} s "
+          f"({len(report) / max(analyzed - read, 1e-9):,.0f} assortments/s), write {written - analyzed:.2f} s")
+    print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
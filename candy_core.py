@@ -0,0 +1,325 @@
+"""Streamlit-free core of the dashboard: the loaded catalog, filtering and
+selection analysis.
+
+``app.py`` renders what this module computes, and ``api.py`` serves the same
+results over HTTP. A ``CandyCatalog`` holds everything derived from one
+dataset version (the memory-mapped data, filter index, views, summary stats,
+pager and name search) so it can be shared by every session or request.
+Everything it keeps per candy is a view on the store's files or shared
+segment; only ``data``, the DataFrame the dashboard works with, decodes the
+names into Python strings, and it is built the first time it is used.
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+from candy_bootstrap import RESAMPLES, correlation_intervals, selection_intervals
+from candy_facets import FacetCounts
+from candy_index import CHARACTERISTICS, flag_mask
+from candy_model import WinRateModel
+from candy_names import CandyNames
+from candy_paging import NameSearch, ResultPager
+from candy_stats import FlagStats, dataset_version
+from candy_store import open_store
+from candy_stream import new_column_stats
+from candy_views import CandyViews
+
+DATA_PATH = 'data/candy-data.csv'
+
+# Types a balanced assortment should include, with the suggestion shown when
+# none of the selected candies has them
+VARIETY_SUGGESTIONS = {
+    'chocolate': "🍫 Consider adding chocolate: None of your selected candies contain chocolate. Including chocolate-based candies can appeal to many trick-or-treaters.",
+    'fruity': "🍎 Consider adding fruity candies: None of your selected candies are fruity. Adding fruity candies can provide balance and variety.",
+    'caramel': "🍬 Consider adding caramel candies: Your selection doesn't include caramel candies, which are popular. Including them can make your assortment more versatile.",
+}
+
+ALLERGY_WARNING = "🚫 **Allergy Warning**: Some of your selected candies contain nuts. Consider adding nut-free options to accommodate those with allergies."
+
+# (above average, at or below average) texts for each metric
+METRIC_NOTES = {
+    'winpercent': (
+        "Your selected candies have a higher-than-average win rate, meaning they are more popular in head-to-head matchups.",
+        "Your selected candies have a lower-than-average win rate. Consider adding more popular options for better appeal.",
+    ),
+    'sugarpercent': (
+        "Your selected candies contain more sugar on average, which may be appealing to kids but could also be seen as too sweet by some.",
+        "Your selected candies contain less sugar on average, making them a healthier option but possibly less appealing to those seeking sweetness.",
+    ),
+    'pricepercent': (
+        "Your selected candies are priced above average, potentially indicating higher quality but also impacting your overall budget.",
+        "Your selected candies are priced below average, making them a more budget-friendly choice, but ensure you're not compromising on quality.",
+    ),
+}
+
+METRIC_FINDINGS = {
+    'winpercent': (
+        "🎃 Your selection has an above-average win rate. It's likely to be popular with trick-or-treaters!",
+        "💀 Your selection has a below-average win rate. Consider adding some more popular candies to increase its appeal.",
+    ),
+    'sugarpercent': (
+        "🍭 Your selection has an above-average sugar content percentile. It might be extra sweet compared to other candies.",
+        "🥕 Your selection has a below-average sugar content percentile. This might be appealing to health-conscious parents.",
+    ),
+    'pricepercent': (
+        "💰 Your selection has an above-average price percentile. While this might indicate higher quality, consider including some more affordable options to balance your budget.",
+        "💵 Your selection has a below-average price percentile, which could be good for your budget. Just ensure you're not compromising too much on quality or popularity.",
+    ),
+}
+
+METRICS = ['winpercent', 'sugarpercent', 'pricepercent']
+
+# Factor from the stored values to the 0-100 scale the averages are shown on
+METRIC_SCALES = {'winpercent': 1, 'sugarpercent': 100, 'pricepercent': 100}
+
+
+class CandyCatalog:
+    """Everything derived from one version of the candy dataset."""
+
+    def __init__(self, csv_path=DATA_PATH, store=None, version=None):
+        # ``store`` defaults to the columnar store next to the CSV; workers
+        # pass one attached from shared memory instead (see candy_shared)
+        self.csv_path = csv_path
+        self.version = version or dataset_version(csv_path)
+        # Kept so the columns' backing files or segment stay mapped
+        self.store = store or open_store(csv_path)
+        store = self.store
+        self.index = store.index()
+        self.summary = store.summary
+        columns = {name: store.column(name) for name in CHARACTERISTICS + METRICS}
+        self.names = CandyNames(store)
+        self.views = CandyViews(self.names, columns)
+        self.pager = ResultPager(columns, self.index, store.column('winpercent_order'))
+        self.search = NameSearch(self.names)
+        self.similar_index = store.similarity_index()
+        self.facet_counts = FacetCounts(self.similar_index.codes, self.index)
+        # Plain arrays for building result rows without per-request pandas indexing
+        self._flags = [columns[name] for name in CHARACTERISTICS]
+        self._metrics = [columns[metric] for metric in METRICS]
+        self._base = None   # the catalog ``with_winpercent`` was called on
+        self.model = self._fit_model(self._metrics[0])
+
+    @cached_property
+    def data(self):
+        """The dataset as a DataFrame whose numeric columns are views on the store."""
+        if self._base is None:
+            return self.store.to_frame()
+        # Built from the original catalog's frame, so the names are decoded once
+        return self._base.data.assign(winpercent=self._metrics[0])
+
+    def __len__(self):
+        return self.store.rows
+
+    def _flag_matrix(self):
+        return np.column_stack(self._flags)
+
+    def _fit_model(self, winpercent):
+        return WinRateModel.fit(self.similar_index.codes, self._metrics[1], self._metrics[2], winpercent)
+
+    def with_winpercent(self, winpercent):
+        """A catalog sharing this one's data except for new ``winpercent`` values.
+
+        Used to serve live win rates (see ``candy_matchups``); the filter
+        index, name search and name lookup are reused as they don't depend
+        on win rates.
+        """
+        winpercent = np.asarray(winpercent, dtype=self._metrics[0].dtype)
+        if len(winpercent) != len(self):
+            raise ValueError(f"Expected {len(self):,} win rates, got {len(winpercent):,}")
+        catalog = object.__new__(CandyCatalog)
+        catalog.__dict__.update(self.__dict__)
+        catalog.__dict__.pop('data', None)
+        catalog._base = self._base or self
+        catalog.views = self.views.with_winpercent(winpercent)
+        catalog.pager = self.pager.with_winpercent(winpercent)
+        catalog._metrics = [winpercent] + self._metrics[1:]
+        catalog.model = catalog._fit_model(catalog._metrics[0])
+
+        win_stats = new_column_stats()['winpercent']
+        win_stats.update(winpercent)
+        flag_stats = FlagStats()
+        flag_stats.update(self._flag_matrix(), winpercent)
+        catalog.summary = {
+            **self.summary,
+            'columns': {**self.summary['columns'], 'winpercent': win_stats.summary()},
+            'characteristics': flag_stats.summary(),
+        }
+        return catalog
+
+    def overall_averages(self):
+        """Overall mean win rate and sugar/price percentiles (0-100)."""
+        columns = self.summary['columns']
+        return (
+            columns['winpercent']['mean'],
+            columns['sugarpercent']['mean'] * 100,
+            columns['pricepercent']['mean'] * 100,
+        )
+
+    def filter(self, flags=(), sugar_range=(0.0, 100.0), price_range=(0.0, 100.0)):
+        """Row positions matching every flag and both percentile ranges (0-100)."""
+        unknown = set(flags) - set(CHARACTERISTICS)
+        if unknown:
+            raise ValueError(f"Unknown characteristics: {', '.join(sorted(unknown))}")
+        return self.index.query(
+            list(flags),
+            sugar_range=(sugar_range[0]/100, sugar_range[1]/100),
+            price_range=(price_range[0]/100, price_range[1]/100),
+        )
+
+    def facets(self, flags=(), sugar_range=(0.0, 100.0), price_range=(0.0, 100.0)):
+        """How many candies match if each characteristic is added to ``flags``."""
+        return self.facet_counts.counts(
+            flags,
+            sugar_range=(sugar_range[0]/100, sugar_range[1]/100),
+            price_range=(price_range[0]/100, price_range[1]/100),
+        )
+
+    def predict_winpercent(self, flags=(), sugar=50.0, price=50.0):
+        """Expected win rate of a candy with exactly ``flags`` at the given
+        sugar/price percentiles (0-100), whether or not one exists."""
+        return self.model.predict(flags, sugar/100, price/100)
+
+    def predicted_winpercent(self, positions=None):
+        """Model win rates for the given rows (default: all of them), in one pass."""
+        codes, sugar, price = self.similar_index.codes, self._metrics[1], self._metrics[2]
+        if positions is not None:
+            codes, sugar, price = codes[positions], sugar[positions], price[positions]
+        return self.model.predict_codes(codes, sugar, price)
+
+    def rows(self, positions):
+        """Plain dicts for the given rows, as shown in the candy table."""
+        # The store keeps the percents as float32; the shortest decimal that
+        # round-trips each one gives 0.72 rather than 0.7200000286102295
+        columns = [self.names.take(positions)] + [
+            values[positions].astype(np.float32).astype(str).astype(float).tolist()
+            for values in self._metrics
+        ]
+        keys = ['competitorname'] + METRICS
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+    def similar(self, name, k=5, require=(), exclude=(), sugar_range=(0.0, 100.0),
+                price_range=(0.0, 100.0)):
+        """Up to ``k`` candies most like ``name`` that meet the constraints.
+
+        ``require``/``exclude`` list characteristics the matches must have or
+        lack; the ranges are percentiles (0-100). Each row also carries its
+        ``distance`` and how many characteristics ``differ`` from ``name``.
+        Raises KeyError for an unknown name.
+        """
+        if name not in self.views:
+            raise KeyError(f"Unknown candy: {name}")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        positions, distances, differences = self.similar_index.query(
+            self.views[name].position, k, require, exclude,
+            sugar_range=(sugar_range[0]/100, sugar_range[1]/100),
+            price_range=(price_range[0]/100, price_range[1]/100),
+        )
+        rows = self.rows(positions)
+        for row, distance, differ in zip(rows, distances.tolist(), differences.tolist()):
+            row['distance'] = distance
+            row['differ'] = differ
+        return rows
+
+    def _check_selection(self, names):
+        missing_names = [name for name in names if name not in self.views]
+        if missing_names:
+            raise KeyError(f"Unknown candies: {', '.join(missing_names)}")
+        if not names:
+            raise ValueError("Select at least one candy")
+
+    def analyze_selection(self, names):
+        """The "Candy Concoction Analysis" for a list of candy names.
+
+        Raises KeyError for names that are not in the catalog.
+        """
+        self._check_selection(names)
+        return analyze(self.views, names, self.overall_averages())
+
+    def analyze_batch(self, positions, offsets):
+        """``analyze_selection``'s averages, deltas and flags for many selections.
+
+        Selection i is ``positions[offsets[i]:offsets[i + 1]]`` (row
+        positions, see ``CandyViews.positions``); every selection needs at
+        least one candy. Returns a dict of arrays, one entry per selection:
+        the 0-100 ``averages`` and ``deltas`` and the ``above`` flags (each
+        keyed by metric), ``contains_nuts`` and ``missing`` (keyed by
+        ``VARIETY_SUGGESTIONS`` type).
+        """
+        positions, offsets = np.asarray(positions), np.asarray(offsets)
+        sizes = np.diff(offsets)
+        if len(sizes) and sizes.min() < 1:
+            raise ValueError("Select at least one candy")
+        starts = offsets[:-1]
+        overall = dict(zip(METRICS, self.overall_averages()))
+        averages = {
+            metric: np.add.reduceat(values[positions], starts, dtype=np.float64) / sizes * METRIC_SCALES[metric]
+            for metric, values in zip(METRICS, self._metrics)
+        }
+        # Every characteristic at least one selected candy has, in one pass
+        flags = np.bitwise_or.reduceat(self.similar_index.codes[positions], starts)
+        return {
+            'averages': averages,
+            'deltas': {metric: averages[metric] - overall[metric] for metric in METRICS},
+            'above': {metric: averages[metric] > overall[metric] for metric in METRICS},
+            'contains_nuts': (flags & flag_mask(['peanutyalmondy'])) != 0,
+            'missing': {kind: (flags & flag_mask([kind])) == 0 for kind in VARIETY_SUGGESTIONS},
+        }
+
+    def selection_intervals(self, names, resamples=RESAMPLES, seed=0, workers=1):
+        """How sure the selection's differences from the overall averages are.
+
+        Per metric, the ``delta`` of ``analyze_selection`` with its bootstrap
+        interval (``low``, ``high``) and permutation ``p_value`` (see
+        candy_bootstrap). Raises KeyError for unknown names.
+        """
+        self._check_selection(names)
+        overall = [self.summary['columns'][metric]['mean'] for metric in METRICS]
+        results = selection_intervals(
+            self._metrics, self.views.positions(names), overall, resamples, seed, workers)
+        return {
+            metric: {**result, **{key: result[key] * METRIC_SCALES[metric] for key in ('delta', 'low', 'high')}}
+            for metric, result in zip(METRICS, results)
+        }
+
+    def correlation_intervals(self, resamples=RESAMPLES, seed=0, workers=1):
+        """Each characteristic's correlation with win rate, with interval and p-value."""
+        results = correlation_intervals(
+            self._flag_matrix(), self._metrics[0], resamples, seed, workers)
+        return dict(zip(CHARACTERISTICS, results))
+
+
+def analyze(views, names, overall):
+    """Averages, deltas and the analysis messages for a selection."""
+    selected = [views[name] for name in names]
+    averages = dict(zip(METRICS, views.averages(names)))
+    overall = dict(zip(METRICS, overall))
+    above = {metric: averages[metric] > overall[metric] for metric in METRICS}
+
+    contains_nuts = any('peanutyalmondy' in view.flags for view in selected)
+    missing_types = [
+        kind for kind in VARIETY_SUGGESTIONS
+        if not any(kind in view.flags for view in selected)
+    ]
+
+    return {
+        'candies': list(names),
+        'averages': averages,
+        'overall': overall,
+        'deltas': {metric: averages[metric] - overall[metric] for metric in METRICS},
+        'notes': {metric: METRIC_NOTES[metric][0 if above[metric] else 1] for metric in METRICS},
+        'contains_nuts': contains_nuts,
+        'missing_types': missing_types,
+        'messages': selection_messages(above, contains_nuts, missing_types),
+    }
+
+
+def selection_messages(above, contains_nuts, missing_types):
+    """The analysis messages, in display order, given which metrics are
+    ``above`` average, whether there are nuts and which types are missing."""
+    messages = [METRIC_FINDINGS[metric][0 if above[metric] else 1] for metric in METRICS]
+    if contains_nuts:
+        messages.append(ALLERGY_WARNING)
+    messages.extend(VARIETY_SUGGESTIONS[kind] for kind in missing_types)
+    return messages
@@ -0,0 +1,45 @@
+"""Facet counts for the characteristic checkboxes.
+
+For the flags already checked, ``FacetCounts`` reports how many candies would
+match if each other flag were checked too. Rows are reduced to a 512-cell
+count cube over their 9-bit flag codes, and a superset-sum transform turns
+it into "rows whose flags include mask m" for every m at once, so any
+checkbox combination is a single lookup. The cube for the full catalog is
+built once; with narrowed sliders it is rebuilt from the index's range
+candidates, which is still a single ``bincount``.
+"""
+
+import numpy as np
+
+from candy_index import CHARACTERISTICS, FLAG_CODES as CODES, flag_mask
+
+
+def superset_sums(counts):
+    """result[m] = sum of counts[c] over every code c that contains mask m."""
+    sums = np.array(counts, dtype=np.int64)
+    for bit in range(len(CHARACTERISTICS)):
+        step = 1 << bit
+        # Axis 1 is this bit: fold the codes that have it into those that don't
+        halves = sums.reshape(-1, 2, step)
+        halves[:, 0, :] += halves[:, 1, :]
+    return sums
+
+
+class FacetCounts:
+    """Per-checkbox match counts from flag codes and the filter index."""
+
+    def __init__(self, codes, index):
+        self._codes = codes
+        self._index = index
+        self._cube = superset_sums(np.bincount(codes, minlength=CODES))
+
+    def counts(self, flags=(), sugar_range=(0.0, 1.0), price_range=(0.0, 1.0)):
+        """{flag: rows matching ``flags`` plus that flag}, within both ranges (0-1).
+
+        Flags already in ``flags`` map to the current number of matches.
+        """
+        rows = self._index.range_rows(sugar_range, price_range)
+        cube = self._cube if rows is None else superset_sums(
+            np.bincount(self._codes[rows], minlength=CODES))
+        mask = flag_mask(flags)
+        return {name: int(cube[mask | 1 << j]) for j, name in enumerate(CHARACTERISTICS)}
@@ -0,0 +1,54 @@
+"""Radar chart figures for the dashboard, built from plain dict specs.
+
+``radar_spec`` lays the figure out as a plain ``{'data', 'layout'}`` dict.
+Trace values are rounded to two decimals, so the float32 columns serialize as
+``84.18`` rather than ``84.18029022216797`` (for eleven values per trace this
+is also shorter than Plotly's base64 typed arrays). ``radar_figure`` wraps
+the spec in a ``go.Figure`` without running Plotly's property validation (the
+spec is fixed and known to be valid), and ``st.plotly_chart`` does not
+re-validate a Figure the way it does a dict.
+
+Plotly is imported by ``radar_figure`` rather than at module level, so the
+Streamlit-free users of this module (the API, batch reports) don't load it.
+The dashboard gains nothing from this, as Streamlit imports Plotly itself.
+"""
+
+from candy_views import RADAR_CATEGORIES
+
+# Legend and plot background for the two radar charts in app.py
+RADAR_STYLES = {
+    'recommendations': {'legend': '#333333', 'plot_bgcolor': '#FFFFFF'},
+    'selection': {'legend': '#FF9900', 'plot_bgcolor': '#F8F0E3'},
+}
+
+
+def radar_spec(views, names, style='recommendations'):
+    """Plain dict spec of the radar chart comparing ``names``."""
+    colors = RADAR_STYLES[style]
+    return {
+        'data': [
+            {
+                'type': 'scatterpolar',
+                'r': [round(value, 2) for value in views[name].radar],
+                'theta': RADAR_CATEGORIES,
+                'fill': 'toself',
+                'name': name,
+            }
+            for name in names
+        ],
+        'layout': {
+            'polar': {'radialaxis': {'visible': True, 'range': [0, 100]}},
+            'showlegend': True,
+            'legend': {'font': {'color': colors['legend']}},
+            'paper_bgcolor': '#F8F0E3',
+            'plot_bgcolor': colors['plot_bgcolor'],
+            'font': {'color': '#333333'},
+        },
+    }
+
+
+def radar_figure(views, names, style='recommendations'):
+    """``radar_spec`` as an unvalidated ``go.Figure``, ready for ``st.plotly_chart``."""
+    import plotly.graph_objects as go
+
+    return go.Figure(radar_spec(views, names, style), _validate=False)
@@ -0,0 +1,154 @@
+"""Precomputed filter index for the candy catalog.
+
+The index keeps one packed bitset per characteristic flag and a sorted copy of
+``sugarpercent`` / ``pricepercent`` so that any checkbox/slider combination from
+the "Brew Your Own" tab can be answered without rebuilding a boolean mask over
+the whole DataFrame.
+"""
+
+import numpy as np
+
+# The nine 0/1 characteristic columns, in the order they appear in the CSV
+CHARACTERISTICS = [
+    'chocolate', 'fruity', 'caramel', 'peanutyalmondy', 'nougat',
+    'crispedricewafer', 'hard', 'bar', 'pluribus',
+]
+
+# Number of distinct flag combinations (see flag_codes)
+FLAG_CODES = 1 << len(CHARACTERISTICS)
+
+
+def pack_bits(values):
+    """Pack a boolean vector into a zero-padded array of 64-bit words."""
+    n_bytes = -(-len(values) // 64) * 8
+    packed = np.zeros(n_bytes, dtype=np.uint8)
+    bits = np.packbits(values)
+    packed[:len(bits)] = bits
+    return packed.view(np.uint64)
+
+
+def bitset_rows(bitset):
+    """Ascending positions of the set bits of a ``pack_bits`` bitset.
+
+    Only words with a bit set are unpacked, so the cost follows the matches
+    (at most 64 bits per matching word) rather than the catalog size.
+    """
+    words = np.flatnonzero(bitset)
+    if len(words) == len(bitset):
+        return np.flatnonzero(np.unpackbits(bitset.view(np.uint8)))
+    hits = np.flatnonzero(np.unpackbits(bitset[words].view(np.uint8)))
+    return words[hits >> 6] * 64 + (hits & 63)
+
+
+def flag_codes(flags):
+    """Pack each row of a (rows, len(CHARACTERISTICS)) 0/1 matrix into a 9-bit code."""
+    flags = np.asarray(flags, dtype=np.uint16)
+    return flags @ (1 << np.arange(len(CHARACTERISTICS), dtype=np.uint16))
+
+
+def flag_mask(names):
+    """The code bits of the named characteristics."""
+    unknown = set(names) - set(CHARACTERISTICS)
+    if unknown:
+        raise ValueError(f"Unknown characteristics: {', '.join(sorted(unknown))}")
+    return sum(1 << CHARACTERISTICS.index(name) for name in names)
+
+
+def sort_column(values):
+    """Return (order, sorted values) for binary-search range lookups."""
+    order = np.argsort(values, kind='stable')
+    return order, values[order]
+
+
+class CandyIndex:
+    """Bitset + sorted-array index over the candy flags and percentiles."""
+
+    def __init__(self, bitsets, size, sugar, price, sugar_sort=None, price_sort=None):
+        # bitsets: (len(CHARACTERISTICS), n_words) uint64, one packed row per flag,
+        # padded to whole 64-bit words so that intersections run a word at a time
+        self.size = size
+        self.bitsets = {name: bitsets[j] for j, name in enumerate(CHARACTERISTICS)}
+        self._all = pack_bits(np.ones(size, dtype=bool))
+
+        # Raw values are kept for checking candidates against the second range
+        self.sugar = np.asarray(sugar)
+        self.price = np.asarray(price)
+        # (order, sorted values) pairs can be passed in precomputed, e.g. when
+        # they are memory-mapped from the columnar store
+        self._sugar_order, self._sugar_sorted = sugar_sort or sort_column(self.sugar)
+        self._price_order, self._price_sorted = price_sort or sort_column(self.price)
+
+    @classmethod
+    def from_flags(cls, flags, sugar, price):
+        flags = np.asarray(flags, dtype=bool)
+        bitsets = np.stack([pack_bits(flags[:, j]) for j in range(len(CHARACTERISTICS))])
+        return cls(bitsets, len(flags), sugar, price)
+
+    @classmethod
+    def from_frame(cls, data):
+        return cls.from_flags(
+            data[CHARACTERISTICS].to_numpy(dtype=bool),
+            data['sugarpercent'].to_numpy(),
+            data['pricepercent'].to_numpy(),
+        )
+
+    def sort_order(self, column):
+        """Row positions ordered by ``sugarpercent`` or ``pricepercent``."""
+        return {'sugarpercent': self._sugar_order, 'pricepercent': self._price_order}[column]
+
+    def flag_bitset(self, flags):
+        """AND together the bitsets of the requested flags."""
+        result = self._all
+        for name in flags:
+            result = result & self.bitsets[name]
+        return result
+
+    def _range(self, sorted_values, order, value_range):
+        # Cast the bounds to the column dtype so boundary values compare the
+        # same way they would against the column itself
+        lo, hi = np.asarray(value_range, dtype=sorted_values.dtype)
+        start = np.searchsorted(sorted_values, lo, side='left')
+        stop = np.searchsorted(sorted_values, hi, side='right')
+        return order[start:stop]
+
+    def range_rows(self, sugar_range=(0.0, 1.0), price_range=(0.0, 1.0)):
+        """Unordered row positions inside both ranges, or None if they cover every row."""
+        sugar_rows = self._range(self._sugar_sorted, self._sugar_order, sugar_range)
+        price_rows = self._range(self._price_sorted, self._price_order, price_range)
+
+        if len(sugar_rows) == self.size and len(price_rows) == self.size:
+            return None
+
+        # Start from the narrower range and check the other one only on those
+        # candidates
+        if len(sugar_rows) <= len(price_rows):
+            candidates = sugar_rows
+            lo, hi = np.asarray(price_range, dtype=self.price.dtype)
+            other = self.price[candidates]
+        else:
+            candidates = price_rows
+            lo, hi = np.asarray(sugar_range, dtype=self.sugar.dtype)
+            other = self.sugar[candidates]
+        return candidates[(other >= lo) & (other <= hi)]
+
+    def query(self, flags=(), sugar_range=(0.0, 1.0), price_range=(0.0, 1.0)):
+        """Return the row positions matching every flag and both ranges.
+
+        Positions are returned in ascending order, so ``data.iloc[positions]``
+        keeps the original row order.
+        """
+        bitset = self.flag_bitset(flags)
+        candidates = self.range_rows(sugar_range, price_range)
+
+        if candidates is None:
+            # No effective range restriction: the bitset alone is the answer
+            if not flags:
+                return np.arange(self.size)
+            return bitset_rows(bitset)
+
+        if flags:
+            packed = bitset.view(np.uint8)
+            hit = (packed[candidates >> 3] >> (7 - (candidates & 7))) & 1
+            candidates = candidates[hit.astype(bool)]
+
+        return np.sort(candidates)
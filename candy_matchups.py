@@ -0,0 +1,201 @@
+"""Live head-to-head votes: an append-only binary log and online win rates.
+
+Each vote is a fixed 9-byte record ``(candy_a, candy_b, b_won)`` of row
+positions in the catalog, appended in batches with a single ``O_APPEND``
+write, so several producers can share one log. The header holds a digest of
+the candy names in row order, so a log is never read against a catalog
+whose rows are in another order (the positions would credit the wrong
+candies). ``MatchupTracker`` tails the log from its last offset and folds
+new votes into a ``WinRateEstimator`` (and optionally ``EloRatings``) with
+vectorized counting, never re-reading old votes.
+
+The estimator starts from the CSV's ``winpercent`` as a prior worth
+``PRIOR_GAMES`` matchups per candy, so the first few live votes nudge rather
+than replace the survey result. ``CandyCatalog.with_winpercent`` feeds the
+estimate back into the same ``winpercent`` field the dashboard reads.
+"""
+
+import hashlib
+import os
+import struct
+import threading
+
+import numpy as np
+
+from candy_names import CandyNames, hash_names
+
+MAGIC = b'CNDYVOTE'
+LOG_FORMAT = 2
+# magic, format, number of candies the positions refer to, names_digest
+HEADER = struct.Struct('<8sII20s')
+
+VOTE = np.dtype([('a', '<u4'), ('b', '<u4'), ('b_won', 'u1')])
+
+# Weight of the CSV winpercent, in matchups, when live votes are blended in
+PRIOR_GAMES = 1000
+
+ELO_K = 16
+ELO_INITIAL = 1500.0
+
+# Votes read per step when catching up on a long log
+READ_CHUNK = 4_000_000
+
+
+def names_digest(names):
+    """SHA-1 of the candy names in row order; ``names`` is a sequence of
+    strings or a catalog's ``CandyNames``."""
+    hashes = names.hashes() if isinstance(names, CandyNames) else hash_names(names)
+    return hashlib.sha1(np.ascontiguousarray(hashes, dtype='<u8').tobytes()).digest()
+
+
+class MatchupLog:
+    """Append-only vote log for a catalog whose candies are ``names``, in row order."""
+
+    def __init__(self, path, names):
+        self.path = path
+        self.candies = len(names)
+        self.digest = names_digest(names)
+        if not os.path.exists(path):
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, LOG_FORMAT, self.candies, self.digest))
+            try:
+                # Only the first writer creates the log; later ones keep its votes
+                os.link(tmp_path, path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp_path)
+        self._check_header()
+
+    def _check_header(self):
+        with open(self.path, 'rb') as f:
+            magic, log_format, candies, digest = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or log_format != LOG_FORMAT:
+            raise ValueError(f"{self.path} is not a candy matchup log")
+        if candies != self.candies:
+            raise ValueError(f"{self.path} was written for {candies:,} candies, not {self.candies:,}")
+        if digest != self.digest:
+            raise ValueError(f"{self.path} was written for a catalog with other candies or in another order")
+
+    def append(self, a, b, b_won):
+        """Append a batch of votes; arrays of row positions and winner flags."""
+        votes = np.empty(len(a), dtype=VOTE)
+        votes['a'] = a
+        votes['b'] = b
+        votes['b_won'] = b_won
+        data = memoryview(votes.tobytes())
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        try:
+            written = os.write(fd, data)
+            # An O_APPEND write leaves the offset at the end of what it wrote
+            start = os.lseek(fd, 0, os.SEEK_CUR) - written
+            try:
+                while written < len(data):
+                    written += os.write(fd, data[written:])
+            except OSError:
+                # A partial record would shift every later vote, so cut back
+                # to the last whole one (unless another producer appended since)
+                if os.fstat(fd).st_size == start + written:
+                    os.ftruncate(fd, start + written // VOTE.itemsize * VOTE.itemsize)
+                raise
+        finally:
+            os.close(fd)
+
+    def read(self, start=0, limit=READ_CHUNK):
+        """Up to ``limit`` complete votes from vote number ``start``."""
+        available = (os.path.getsize(self.path) - HEADER.size) // VOTE.itemsize - start
+        count = max(0, min(available, limit))
+        if not count:
+            return np.empty(0, dtype=VOTE)
+        return np.fromfile(self.path, dtype=VOTE, count=count,
+                           offset=HEADER.size + start * VOTE.itemsize)
+
+
+def _add(target, positions, weights=None):
+    """target[positions] += weights, choosing bincount or add.at by batch size."""
+    if len(positions) * 8 >= len(target):
+        target += np.bincount(positions, weights, minlength=len(target))
+    else:
+        np.add.at(target, positions, 1 if weights is None else weights)
+
+
+class WinRateEstimator:
+    """Per-candy wins / games, seeded from a prior win percentage."""
+
+    def __init__(self, base_winpercent, prior_games=PRIOR_GAMES):
+        base = np.asarray(base_winpercent, dtype=np.float64)
+        self.games = np.full(len(base), float(prior_games))
+        self.wins = base / 100 * prior_games
+        self.votes = 0
+
+    def update(self, a, b, b_won):
+        _add(self.games, a)
+        _add(self.games, b)
+        _add(self.wins, np.where(b_won, b, a))
+        self.votes += len(a)
+
+    @property
+    def winpercent(self):
+        return 100 * self.wins / np.maximum(self.games, 1e-12)
+
+
+class EloRatings:
+    """Elo ratings updated once per batch from the ratings at batch start."""
+
+    def __init__(self, candies, k=ELO_K, initial=ELO_INITIAL):
+        self.k = k
+        self.ratings = np.full(candies, initial)
+
+    def update(self, a, b, b_won):
+        expected_a = 1 / (1 + 10 ** ((self.ratings[b] - self.ratings[a]) / 400))
+        delta = self.k * ((1 - b_won.astype(np.float64)) - expected_a)
+        _add(self.ratings, a, delta)
+        _add(self.ratings, b, -delta)
+
+
+class MatchupTracker:
+    """Follows a matchup log and keeps the estimators current."""
+
+    def __init__(self, log_path, names, base_winpercent, prior_games=PRIOR_GAMES, elo=False):
+        base = np.asarray(base_winpercent)
+        self.log = MatchupLog(log_path, names)
+        self.estimator = WinRateEstimator(base, prior_games)
+        self.elo = EloRatings(len(base)) if elo else None
+        self.offset = 0     # votes already read from the log
+        self.skipped = 0    # votes with out-of-range or identical candies
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Fold in every vote appended since the last call; returns how many."""
+        with self._lock:
+            return self._catch_up()
+
+    def _catch_up(self):
+        ingested = 0
+        while True:
+            votes = self.log.read(self.offset)
+            if not len(votes):
+                return ingested
+            self.offset += len(votes)
+            a, b, b_won = votes['a'], votes['b'], votes['b_won'].astype(bool)
+            valid = (a < self.log.candies) & (b < self.log.candies) & (a != b)
+            if not valid.all():
+                self.skipped += int((~valid).sum())
+                a, b, b_won = a[valid], b[valid], b_won[valid]
+            a, b = a.astype(np.intp), b.astype(np.intp)
+            self.estimator.update(a, b, b_won)
+            if self.elo is not None:
+                self.elo.update(a, b, b_won)
+            ingested += len(a)
+
+    @property
+    def winpercent(self):
+        """Current win rates, a copy taken between refreshes."""
+        with self._lock:
+            return self.estimator.winpercent
+
+    def snapshot(self):
+        """``(winpercent, offset)`` from the same point in the log."""
+        with self._lock:
+            return self.estimator.winpercent, self.offset
@@ -0,0 +1,99 @@
+"""Candy names served straight from the columnar store's name dictionary.
+
+The store keeps the names as a dictionary of UTF-8 strings (one blob plus
+offsets) with a code per row, and next to it each entry's hash, the entries
+sorted by hash for lookups, and a lower-cased copy of the dictionary for
+search (see ``candy_store``). ``CandyNames`` answers name -> row, rows ->
+names and substring search on those arrays directly, so a serving process
+holds no Python string or dict entry per candy, and processes on the same
+store files or shared segment (``candy_shared``) share every page.
+"""
+
+import hashlib
+
+import numpy as np
+
+# Bytes of the lower-cased dictionary compared per step of a search
+SEARCH_BLOCK = 1 << 22
+
+
+def name_hash(encoded):
+    """64-bit hash of a name's UTF-8 bytes; the same in every process."""
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), 'little')
+
+
+def hash_names(names):
+    """``name_hash`` of each name."""
+    # surrogatepass: a name that can't be UTF-8 can't be in the store either
+    return np.fromiter((name_hash(name.encode('utf-8', 'surrogatepass')) for name in names),
+                       dtype=np.uint64, count=len(names))
+
+
+class CandyNames:
+    """Name lookup, decoding and search over a store's name dictionary."""
+
+    def __init__(self, store):
+        self.codes = store.column('name_codes')
+        self._offsets = store.column('name_offsets')
+        self._blob = store.column('name_blob')
+        self._hashes = store.column('name_hashes')
+        # Each entry's first row; an entry repeated by a later ingestion chunk
+        # has a later first row
+        self._first_rows = store.column('name_first_rows')
+        # Entries ordered by (hash, first row), and their hashes in that order
+        self._lookup = store.column('name_lookup')
+        self._lookup_hashes = store.column('name_lookup_hashes')
+        self._lower_offsets = store.column('name_lower_offsets')
+        self._lower_blob = store.column('name_lower_blob')
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _entry(self, entry):
+        return self._blob[self._offsets[entry]:self._offsets[entry + 1]].tobytes()
+
+    def take(self, positions):
+        """The names of the rows at ``positions``."""
+        return [self._entry(code).decode('utf-8') for code in self.codes[positions].tolist()]
+
+    def lookup(self, names):
+        """Each name's first row position, or -1 for names not in the catalog."""
+        hashes = hash_names(names)
+        starts = np.searchsorted(self._lookup_hashes, hashes).tolist()
+        positions = np.full(len(names), -1, dtype=np.intp)
+        for i, (name, start) in enumerate(zip(names, starts)):
+            encoded = name.encode('utf-8', 'surrogatepass')
+            # Entries with this hash, earliest first row first
+            for j in range(start, len(self._lookup)):
+                if self._lookup_hashes[j] != hashes[i]:
+                    break
+                entry = self._lookup[j]
+                if self._entry(entry) == encoded:
+                    positions[i] = self._first_rows[entry]
+                    break
+        return positions
+
+    def hashes(self):
+        """``hash_names`` of every row's name, in row order."""
+        return self._hashes[self.codes]
+
+    def containing(self, query):
+        """Per dictionary entry, whether its lower-cased name contains ``query``.
+
+        ``query`` is already lower-cased. The dictionary is scanned in blocks
+        for the query's first byte, and the candidates are narrowed one byte
+        at a time, so no per-name work is done in Python.
+        """
+        needle = np.frombuffer(query.encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+        blob, offsets = self._lower_blob, self._lower_offsets
+        found = np.zeros(len(offsets) - 1, dtype=bool)
+        last_start = len(blob) - len(needle)
+        for block in range(0, last_start + 1, SEARCH_BLOCK):
+            stop = min(block + SEARCH_BLOCK, last_start + 1)
+            starts = block + np.flatnonzero(blob[block:stop] == needle[0])
+            for k in range(1, len(needle)):
+                starts = starts[blob[starts + k] == needle[k]]
+            entries = np.searchsorted(offsets, starts, side='right') - 1
+            # Keep matches that end inside the name they start in
+            found[entries[starts + len(needle) <= offsets[entries + 1]]] = True
+        return found
@@ -0,0 +1,111 @@
+"""Server-side sorting, paging and name search for the filtered candy list.
+
+Only one page of rows (and a bounded list of multiselect options) is sent to
+the browser per interaction, however large the catalog or the filter result.
+"""
+
+import numpy as np
+
+SORT_COLUMNS = ['winpercent', 'sugarpercent', 'pricepercent']
+
+# Below this share of the catalog, sorting the filtered rows directly is cheaper
+# than walking a presorted order of the whole catalog
+DIRECT_SORT_SHARE = 1 / 16
+
+# Rows scanned per step when searching names, so common queries stop early
+SEARCH_CHUNK = 65_536
+
+
+class ResultPager:
+    """Sorted, paged access to a subset of rows, using presorted column orders."""
+
+    def __init__(self, columns, index, winpercent_order=None):
+        self._values = {name: np.asarray(columns[name]) for name in SORT_COLUMNS}
+        self._size = len(self._values['winpercent'])
+        # Sugar and price orders come from the filter index; the win rate order
+        # is sorted here unless passed in (e.g. memory-mapped from the store)
+        if winpercent_order is None:
+            winpercent_order = np.argsort(self._values['winpercent'], kind='stable')
+        self._orders = {
+            'winpercent': winpercent_order,
+            'sugarpercent': index.sort_order('sugarpercent'),
+            'pricepercent': index.sort_order('pricepercent'),
+        }
+
+    def with_winpercent(self, winpercent):
+        """A copy that sorts by new win rates, keeping the other orders."""
+        pager = object.__new__(ResultPager)
+        pager._size = self._size
+        pager._values = {**self._values, 'winpercent': np.asarray(winpercent)}
+        pager._orders = {**self._orders, 'winpercent': np.argsort(winpercent, kind='stable')}
+        return pager
+
+    def sort(self, positions, column, descending=True):
+        """Return ``positions`` ordered by ``column``; ties keep row order either way."""
+        positions = np.asarray(positions)
+        values = self._values[column]
+        if len(positions) < self._size * DIRECT_SORT_SHARE:
+            keys = values[positions]
+            order = np.argsort(-keys if descending else keys, kind='stable')
+            return positions[order]
+        member = np.zeros(self._size, dtype=bool)
+        member[positions] = True
+        full_order = self._orders[column]
+        ordered = full_order[member[full_order]]
+        return _descending(ordered, values) if descending else ordered
+
+    def page(self, positions, column, descending=True, page=1, page_size=25):
+        """Row positions for one page, plus the total number of pages."""
+        n_pages = max(1, -(-len(positions) // page_size))
+        page = min(max(1, page), n_pages)
+        ordered = self.sort(positions, column, descending)
+        start = (page - 1) * page_size
+        return ordered[start:start + page_size], n_pages
+
+
+def _descending(ordered, values):
+    """Turn ``ordered`` (ascending by ``values``, ties in row order) descending.
+
+    Reversing alone would reverse each run of ties too, so those runs are
+    flipped back into row order.
+    """
+    flipped = ordered[::-1]
+    if not len(flipped):
+        return flipped
+    keys = values[flipped]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
+    run = np.repeat(np.arange(len(starts)), ends - starts)
+    return flipped[starts[run] + ends[run] - 1 - np.arange(len(keys))]
+
+
+class NameSearch:
+    """Case-insensitive substring search over candy names with a result limit."""
+
+    def __init__(self, names):
+        # A candy_names.CandyNames over the store's name dictionary
+        self._names = names
+
+    def search(self, query, positions=None, limit=50):
+        """Up to ``limit`` names containing ``query``, in row order.
+
+        ``positions`` restricts the search to those rows (e.g. the filter
+        result). Rows are scanned in chunks, stopping once the limit is hit.
+        """
+        query = query.strip().lower()
+        if positions is None:
+            positions = np.arange(len(self._names))
+        if not query:
+            return self._names.take(positions[:limit])
+
+        # Which dictionary entries match is worked out once, over the
+        # dictionary; the rows are then checked through their name codes
+        matches = self._names.containing(query)
+        found = []
+        for start in range(0, len(positions), SEARCH_CHUNK):
+            chunk = positions[start:start + SEARCH_CHUNK]
+            hits = chunk[matches[self._names.codes[chunk]]]
+            found.extend(self._names.take(hits[:limit - len(found)]))
+            if len(found) >= limit:
+                break
+        return found
@@ -0,0 +1,110 @@
+"""Opt-in render profiling for the dashboard.
+
+Set ``CANDY_PROFILE=1`` or open the app with ``?profile=1`` to time each
+section of a rerun and count cache hits and misses. ``app.py`` calls
+``checkpoint(name)`` after each section, so every checkpoint records the time
+since the previous one and the sections add up to the whole rerun. Set
+``CANDY_PROFILE_LOG`` to a path to also append every rerun to a JSON-lines log.
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+PROFILE_ENV = 'CANDY_PROFILE'
+LOG_ENV = 'CANDY_PROFILE_LOG'
+
+# Reruns kept per session for the sidebar panel and the download
+HISTORY_SIZE = 100
+
+_TRUE = {'1', 'true', 'yes', 'on'}
+
+
+def profiling_requested(query_params=None):
+    """True if profiling is switched on by the environment or a query param."""
+    if os.environ.get(PROFILE_ENV, '').lower() in _TRUE:
+        return True
+    return bool(query_params) and str(query_params.get('profile', '')).lower() in _TRUE
+
+
+class RerunProfile:
+    """Section timings and cache hit/miss counts for one rerun.
+
+    When disabled every method is a cheap no-op, so the calls can stay in the
+    script unconditionally.
+    """
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.started = datetime.now(timezone.utc)
+        self.sections = {}  # name -> seconds, in checkpoint order
+        self.caches = {}    # name -> {'hits': n, 'misses': n}
+        self._start = self._last = time.perf_counter()
+        self._missed = set()
+
+    def checkpoint(self, name):
+        """Attribute the time since the previous checkpoint to ``name``."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.sections[name] = self.sections.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def miss(self, name):
+        """Call from inside a cached function body: it only runs on a miss."""
+        self._missed.add(name)
+
+    def cached(self, name, function, *args):
+        """Call a cached ``function`` and count whether it was a hit or a miss."""
+        if not self.enabled:
+            return function(*args)
+        self._missed.discard(name)
+        result = function(*args)
+        counts = self.caches.setdefault(name, {'hits': 0, 'misses': 0})
+        counts['misses' if name in self._missed else 'hits'] += 1
+        return result
+
+    def record(self):
+        """This rerun as a JSON-serializable dict, timings in milliseconds."""
+        return {
+            'started': self.started.isoformat(timespec='milliseconds'),
+            'total_ms': round((self._last - self._start) * 1000, 3),
+            'sections': {name: round(seconds * 1000, 3) for name, seconds in self.sections.items()},
+            'caches': {name: dict(counts) for name, counts in self.caches.items()},
+        }
+
+    def finish(self, history):
+        """Close the last section, append the record to ``history`` and the log file."""
+        self.checkpoint('other')
+        record = self.record()
+        history.append(record)
+        del history[:-HISTORY_SIZE]
+        log_path = os.environ.get(LOG_ENV)
+        if log_path:
+            with open(log_path, 'a') as log:
+                log.write(json.dumps(record) + '\n')
+        return record
+
+
+def summarize_history(history):
+    """Per-section rerun count, median, p90 and max milliseconds over ``history``."""
+    timings = {}
+    for record in history:
+        for name, ms in record['sections'].items():
+            timings.setdefault(name, []).append(ms)
+    rows = []
+    for name, values in timings.items():
+        values = sorted(values)
+        rows.append({
+            'section': name,
+            'reruns': len(values),
+            'median_ms': values[len(values) // 2],
+            'p90_ms': values[min(len(values) - 1, int(len(values) * 0.9))],
+            'max_ms': values[-1],
+        })
+    return rows
+
+
+def history_jsonl(history):
+    return ''.join(json.dumps(record) + '\n' for record in history)
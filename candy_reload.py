@@ -0,0 +1,111 @@
+"""Background reloading of the candy catalog when the CSV is replaced.
+
+``DatasetManager`` loads the catalog once, then a daemon thread polls the
+CSV's version (size and mtime, see ``candy_stats.dataset_version``). Once a
+new version has stayed the same for one poll, so a file still being written
+is not picked up half way, the thread builds a new ``CandyCatalog`` from it.
+The version is checked again after the build, and a catalog read from a file
+that changed meanwhile is dropped.
+Ingestion validates every row (see ``candy_stream.validate_chunk``); if
+anything fails, the current catalog stays in place, ``error`` says why and
+the thread keeps polling for the next version.
+
+Swapping in the new catalog is a single attribute assignment, so a rerun or
+request that already holds the old catalog finishes with it undisturbed,
+and the next one sees the new catalog and its version. The version is the
+cache key for everything derived from the catalog.
+
+``version()`` and ``attach()`` mirror ``candy_shared.SharedCatalog``, so the
+dashboard and API can take their catalog from either.
+"""
+
+import threading
+
+from candy_core import DATA_PATH, CandyCatalog
+from candy_stats import dataset_version
+
+# Seconds between checks of the CSV, overridable with CANDY_RELOAD_SECONDS
+RELOAD_POLL_SECONDS = 2.0
+
+
+class DatasetManager:
+    """The current catalog for a CSV, reloaded in the background when it changes."""
+
+    def __init__(self, csv_path=DATA_PATH, poll_seconds=RELOAD_POLL_SECONDS, watch=True):
+        self.csv_path = csv_path
+        self.poll_seconds = poll_seconds
+        self.catalog = CandyCatalog(csv_path)
+        self.error = None       # why the last reload failed, until one succeeds
+        self.reloads = 0
+        self._pending = None    # a new version seen once, waiting to settle
+        self._failed = None     # a version that failed to load; not retried
+        self._stop = threading.Event()
+        self._thread = None
+        if watch:
+            self._thread = threading.Thread(target=self._watch, name='candy-reload', daemon=True)
+            self._thread.start()
+
+    def version(self):
+        return self.catalog.version
+
+    def attach(self, version=None):
+        """The current catalog; older versions are not kept."""
+        return self.catalog
+
+    def check(self):
+        """One poll of the CSV; returns True if a new catalog was swapped in."""
+        try:
+            version = dataset_version(self.csv_path)
+        except OSError:
+            # Mid-replace; look again next time
+            return False
+        if version in (self.catalog.version, self._failed):
+            self._pending = None
+            return False
+        if version != self._pending:
+            self._pending = version
+            return False
+
+        self._pending = None
+        try:
+            catalog = CandyCatalog(self.csv_path)
+        except Exception as e:
+            # Whatever a broken file raises, the current catalog stays
+            if self._replaced_since(version):
+                return False
+            self.error = f"Could not load {self.csv_path}: {e}"
+            self._failed = version
+            return False
+        if self._replaced_since(version):
+            return False
+        self.catalog = catalog
+        self.error = None
+        self.reloads += 1
+        return True
+
+    def _replaced_since(self, version):
+        # The catalog is stamped with the version seen before it was read, so
+        # look at the file again after the load: if it changed meanwhile, what
+        # was read may be a mix of both files. The new version counts as seen
+        # once, so it is loaded after it settles.
+        try:
+            current = dataset_version(self.csv_path)
+        except OSError:
+            return True
+        if current == version:
+            return False
+        self._pending = current
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                # A dead thread would never reload again; report and poll on
+                self.error = f"Could not reload {self.csv_path}: {e}"
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
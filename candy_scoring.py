@@ -0,0 +1,106 @@
+"""Weighted candy scoring, as used in analysis.ipynb, for any number of weightings.
+
+Each weighting is one row of a weight matrix over ``SCORE_FEATURES``; scoring
+every candy under every weighting is a single ``features @ weights.T`` product,
+and top-k selection uses ``np.argpartition`` instead of a full sort.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from candy_index import CHARACTERISTICS
+
+SCORE_FEATURES = ['winpercent', 'pricepercent', 'sugarpercent', 'feature_diversity']
+
+# weights: {feature: weight}; require: {characteristic: 0 or 1} rows must match
+ScorePreset = namedtuple('ScorePreset', ['name', 'label', 'weights', 'require'])
+
+PRESETS = {
+    preset.name: preset for preset in [
+        # Highest head-to-head win rate, regardless of anything else
+        ScorePreset('crowd_favorite', 'Crowd favorite', {'winpercent': 1.0}, {}),
+        # The notebook's overall final_score
+        ScorePreset(
+            'balanced', 'Balanced pick',
+            {'winpercent': 0.35, 'pricepercent': 0.5, 'sugarpercent': 0.3, 'feature_diversity': 10},
+            {},
+        ),
+        # The notebook's nut-free final_score
+        ScorePreset(
+            'nut_free', 'Nut-free pick',
+            {'winpercent': 0.5, 'pricepercent': 0.5, 'sugarpercent': 0.5, 'feature_diversity': 5},
+            {'peanutyalmondy': 0},
+        ),
+        # The notebook's fruity final_score
+        ScorePreset(
+            'fruity', 'Fruity pick',
+            {'winpercent': 0.5, 'pricepercent': 0.5, 'sugarpercent': 0.5},
+            {'fruity': 1},
+        ),
+    ]
+}
+
+# One pick per preset, in order, for the Recommendations tab
+RECOMMENDATION_PRESETS = ['crowd_favorite', 'nut_free', 'fruity']
+
+
+def feature_matrix(data):
+    """(rows, len(SCORE_FEATURES)) float matrix of the scoring features."""
+    features = np.empty((len(data), len(SCORE_FEATURES)))
+    features[:, 0] = data['winpercent'].to_numpy()
+    features[:, 1] = data['pricepercent'].to_numpy()
+    features[:, 2] = data['sugarpercent'].to_numpy()
+    features[:, 3] = data[CHARACTERISTICS].to_numpy(dtype=np.int8).sum(axis=1)
+    return features
+
+
+def weight_matrix(presets):
+    """(len(presets), len(SCORE_FEATURES)) matrix, one row per preset."""
+    weights = np.zeros((len(presets), len(SCORE_FEATURES)))
+    for i, preset in enumerate(presets):
+        for feature, weight in preset.weights.items():
+            weights[i, SCORE_FEATURES.index(feature)] = weight
+    return weights
+
+
+def score_matrix(data, presets):
+    """Score every candy under every preset: (rows, len(presets)).
+
+    Rows that don't satisfy a preset's ``require`` flags score ``-inf``.
+    """
+    scores = feature_matrix(data) @ weight_matrix(presets).T
+    for i, preset in enumerate(presets):
+        for name, value in preset.require.items():
+            scores[data[name].to_numpy() != value, i] = -np.inf
+    return scores
+
+
+def top_k(scores, k):
+    """Positions of the k highest finite scores, best first."""
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def recommend(data, preset_names=RECOMMENDATION_PRESETS):
+    """Pick one distinct candy per preset; returns [(candy name, preset), ...]."""
+    presets = [PRESETS[name] for name in preset_names]
+    scores = score_matrix(data, presets)
+    names = data['competitorname'].to_numpy()
+
+    picks = []
+    chosen = set()
+    for i, preset in enumerate(presets):
+        # Enough candidates to skip over everything already chosen
+        for position in top_k(scores[:, i], len(chosen) + 1):
+            if position not in chosen:
+                chosen.add(position)
+                picks.append((names[position], preset))
+                break
+    return picks
@@ -0,0 +1,232 @@
+"""Publish the candy catalog into shared memory for several serving processes.
+
+One publisher process opens the columnar store (see ``candy_store``) and
+copies its columns, including the filter index's bitsets and sort orders and
+the other per-candy arrays the catalog derives (see ``candy_store``), into a
+shared memory segment. Dashboard or API workers on the same host attach
+to it and build their ``CandyCatalog`` on read-only views of that segment, so
+the dataset is held in memory once however many workers there are.
+
+Each published dataset gets a new segment, ``<name>-<generation>``. A small
+control segment, ``<name>``, holds the current generation and is only updated
+once the new segment is complete, so workers see either the old dataset or the
+new one, never a partial copy. Workers check the generation (one 8-byte read)
+and re-attach when it changes; mappings they already hold stay valid after
+the publisher unlinks the old segment.
+
+    python candy_shared.py --name candy --data data/candy-data.csv
+    kill -HUP <publisher pid>    # republish after the CSV changes
+
+Workers find the segment through ``CANDY_SHARED_CATALOG=candy`` (dashboard)
+or ``--shared candy`` (API).
+"""
+
+import argparse
+import json
+import os
+import signal
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from candy_core import DATA_PATH, CandyCatalog
+from candy_stats import dataset_version
+from candy_store import CandyStore, default_store_dir, open_store
+
+# Columns start on cache-line boundaries
+ALIGNMENT = 64
+
+# Segments kept alive after being replaced, for workers that are still attaching
+KEEP_GENERATIONS = 2
+
+_HEADER_LENGTH = np.dtype('<u8')
+
+# Segments created by a publisher in this process
+_published = set()
+
+
+def _create(segment_name, size):
+    segment = shared_memory.SharedMemory(segment_name, create=True, size=size)
+    _published.add(segment_name)
+    return segment
+
+
+def _attach(segment_name):
+    segment = shared_memory.SharedMemory(segment_name)
+    # The publisher owns the segment; without this, Python < 3.13 unlinks it
+    # when the first attached worker exits
+    if segment_name not in _published:
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class SharedStore(CandyStore):
+    """A ``CandyStore`` whose columns are read-only views on a shared segment."""
+
+    def __init__(self, segment):
+        self.segment = segment
+        header_length = int(np.frombuffer(segment.buf, _HEADER_LENGTH, 1)[0])
+        header = json.loads(bytes(segment.buf[_HEADER_LENGTH.itemsize:][:header_length]))
+        self.store_dir = None
+        self.manifest = header['manifest']
+        self.rows = self.manifest['rows']
+        self.summary = self.manifest['summary']
+        self.version = header['version']
+        self.csv_path = header['csv_path']
+        self._columns = header['columns']
+
+    def column(self, name):
+        offset, descr, shape = self._columns[name]
+        array = np.ndarray(shape, np.lib.format.descr_to_dtype(descr), self.segment.buf, offset)
+        array.flags.writeable = False
+        return array
+
+
+def _write_segment(segment_name, store, version, csv_path):
+    """Copy every column of ``store`` into a new segment; returns the segment."""
+    columns = store.columns()
+
+    def header_bytes(layout):
+        return json.dumps({
+            'version': version, 'csv_path': csv_path,
+            'manifest': store.manifest, 'columns': layout,
+        }).encode()
+
+    # Offsets depend on the header length and the header holds the offsets, so
+    # lay out with room to spare for the offsets' digits
+    reserved = len(header_bytes({name: [0, '', list(a.shape)] for name, a in columns.items()}))
+    reserved += 32 * len(columns) + _HEADER_LENGTH.itemsize
+    layout, offset = {}, _aligned(reserved)
+    for name, array in columns.items():
+        layout[name] = [offset, np.lib.format.dtype_to_descr(array.dtype), list(array.shape)]
+        offset = _aligned(offset + array.nbytes)
+    header = header_bytes(layout)
+
+    segment = _create(segment_name, max(offset, 1))
+    try:
+        np.frombuffer(segment.buf, _HEADER_LENGTH, 1)[:] = len(header)
+        segment.buf[_HEADER_LENGTH.itemsize:_HEADER_LENGTH.itemsize + len(header)] = header
+        for name, array in columns.items():
+            start, _, shape = layout[name]
+            np.ndarray(shape, array.dtype, segment.buf, start)[...] = array
+    except BaseException:
+        segment.close()
+        segment.unlink()
+        raise
+    return segment
+
+
+class CatalogPublisher:
+    """Owns the shared segments for one catalog name."""
+
+    def __init__(self, name, csv_path=DATA_PATH):
+        self.name = name
+        self.csv_path = csv_path
+        self.version = None
+        self.generation = 0
+        self._segments = []     # (generation, segment), oldest first
+        self._control = _create(name, _HEADER_LENGTH.itemsize)
+        self._current = np.ndarray(1, _HEADER_LENGTH, self._control.buf)
+        self._current[0] = 0
+
+    def publish(self):
+        """Publish the CSV if it changed since the last call; returns True if it did."""
+        version = dataset_version(self.csv_path)
+        if version == self.version:
+            return False
+        store = open_store(self.csv_path)
+        generation = self.generation + 1
+        segment = _write_segment(f'{self.name}-{generation}', store, version, self.csv_path)
+        self._segments.append((generation, segment))
+        # The swap: workers pick the new segment up from here on
+        self._current[0] = generation
+        self.generation, self.version = generation, version
+
+        while len(self._segments) > KEEP_GENERATIONS:
+            _, old = self._segments.pop(0)
+            old.close()
+            old.unlink()
+        return True
+
+    def close(self):
+        del self._current
+        for _, segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+        self._control.close()
+        self._control.unlink()
+
+
+class SharedCatalog:
+    """Worker side: the catalog in the publisher's current segment."""
+
+    def __init__(self, name):
+        self.name = name
+        self._control = _attach(name)
+        self._current = np.ndarray(1, _HEADER_LENGTH, self._control.buf)
+
+    def generation(self):
+        """The generation being published; 0 until the first dataset is."""
+        return int(self._current[0])
+
+    def version(self):
+        """Name of the current segment; a cache key for the published dataset."""
+        generation = self.generation()
+        if not generation:
+            raise RuntimeError(f"Nothing has been published as {self.name!r} yet")
+        return f'{self.name}-{generation}'
+
+    def attach(self, version=None):
+        """``CandyCatalog`` over a published ``version`` (default: the current one)."""
+        version = version or self.version()
+        try:
+            store = SharedStore(_attach(version))
+        except FileNotFoundError:
+            if version == self.version():
+                raise
+            # Replaced twice since the caller looked; take the current one
+            return self.attach()
+        return CandyCatalog(store.csv_path, store=store, version=store.version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--name', default='candy', help="shared memory name workers attach to")
+    parser.add_argument('--data', default=DATA_PATH, help="candy CSV to publish")
+    args = parser.parse_args()
+
+    publisher = CatalogPublisher(args.name, args.data)
+    reload_requested = threading.Event()
+    stop_requested = threading.Event()
+    signal.signal(signal.SIGHUP, lambda *_: reload_requested.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_requested.set())
+    try:
+        publisher.publish()
+        print(f"Published {args.data} as {args.name!r} (generation 1, store {default_store_dir(args.data)}); "
+              f"SIGHUP {os.getpid()} to reload")
+        while not stop_requested.is_set():
+            if reload_requested.wait(1.0):
+                reload_requested.clear()
+                try:
+                    published = publisher.publish()
+                except (OSError, ValueError, MemoryError) as e:
+                    print(f"Still publishing generation {publisher.generation}: {e}")
+                    continue
+                if published:
+                    print(f"Published generation {publisher.generation} ({publisher.version})")
+                else:
+                    print("Dataset unchanged; nothing to publish")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
+
+
+if __name__ == '__main__':
+    main()
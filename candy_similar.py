@@ -0,0 +1,88 @@
+"""Nearest-neighbour search for "candies like this one".
+
+Each candy's nine characteristic flags are packed into a 9-bit code, and the
+distance between two candies is the Hamming distance between their codes plus
+``NUMERIC_WEIGHT`` times the Euclidean distance between their (sugar, price)
+percentiles on a 0-1 scale.
+
+Rows are grouped by code once. A query ranks the (at most 512) codes by
+Hamming distance with a popcount lookup table, then scans code groups nearest
+first, computing the numeric part for a whole group at once. The numeric part
+is never negative, so the scan stops as soon as the next group's Hamming
+distance alone can't beat the k-th best candy found so far; most queries touch
+a handful of groups however large the catalog.
+"""
+
+import numpy as np
+
+from candy_index import FLAG_CODES as CODES, flag_mask
+
+# Bits set in every possible 9-bit code
+POPCOUNT = np.array([bin(code).count('1') for code in range(CODES)], dtype=np.int8)
+
+# One characteristic of difference counts as much as this far apart in sugar/price
+NUMERIC_WEIGHT = 3.0
+
+
+def group_by_code(codes, sugar, price):
+    """(order, sugar, price): rows sorted by flag code, and their float32
+    sugar/price in that order."""
+    order = np.argsort(codes, kind='stable')
+    return order, np.asarray(sugar, dtype=np.float32)[order], np.asarray(price, dtype=np.float32)[order]
+
+
+class SimilarityIndex:
+    """Rows grouped by flag code, with sugar/price stored in group order."""
+
+    def __init__(self, codes, sugar, price, grouped=None):
+        self.codes = codes
+        self._sugar = np.asarray(sugar, dtype=np.float32)
+        self._price = np.asarray(price, dtype=np.float32)
+        # The ``group_by_code`` arrays can be passed in precomputed, e.g. when
+        # they are memory-mapped from the columnar store
+        self._order, self._sorted_sugar, self._sorted_price = grouped or group_by_code(codes, sugar, price)
+        # Rows with code c are self._order[self._starts[c]:self._starts[c + 1]]
+        self._starts = np.zeros(CODES + 1, dtype=np.intp)
+        np.cumsum(np.bincount(codes, minlength=CODES), out=self._starts[1:])
+
+    def query(self, position, k=5, require=(), exclude=(), sugar_range=(0.0, 1.0),
+              price_range=(0.0, 1.0), numeric_weight=NUMERIC_WEIGHT):
+        """The ``k`` nearest rows to ``position`` satisfying the constraints.
+
+        ``require``/``exclude`` are characteristics every neighbour must have
+        or lack; the ranges (0-1) bound its sugar and price percentiles.
+        Returns ``(positions, distances, flag_differences)``, nearest first.
+        """
+        required, excluded = flag_mask(require), flag_mask(exclude)
+        code = int(self.codes[position])
+        sugar, price = self._sugar[position], self._price[position]
+
+        codes = np.arange(CODES)
+        allowed = ((codes & required) == required) & ((codes & excluded) == 0)
+        allowed &= self._starts[1:] > self._starts[:-1]
+        codes = codes[allowed]
+        hamming = POPCOUNT[codes ^ code]
+        by_distance = np.argsort(hamming, kind='stable')
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0)
+        for c, h in zip(codes[by_distance], hamming[by_distance]):
+            if len(best_rows) == k and h >= best_dist[-1]:
+                break
+            start, stop = self._starts[c], self._starts[c + 1]
+            s, p = self._sorted_sugar[start:stop], self._sorted_price[start:stop]
+            keep = (s >= sugar_range[0]) & (s <= sugar_range[1]) & (p >= price_range[0]) & (p <= price_range[1])
+            rows = self._order[start:stop][keep]
+            dist = h + numeric_weight * np.hypot(s[keep] - sugar, p[keep] - price)
+            not_self = rows != position
+            rows, dist = rows[not_self], dist[not_self]
+
+            best_rows = np.concatenate([best_rows, rows])
+            best_dist = np.concatenate([best_dist, dist])
+            if len(best_rows) > k:
+                top = np.argpartition(best_dist, k - 1)[:k]
+                best_rows, best_dist = best_rows[top], best_dist[top]
+            order = np.lexsort((best_rows, best_dist))
+            best_rows, best_dist = best_rows[order], best_dist[order]
+
+        return best_rows, best_dist, POPCOUNT[self.codes[best_rows] ^ code]
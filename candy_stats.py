@@ -0,0 +1,76 @@
+"""Summary statistics for the candy dataset.
+
+The numbers are accumulated during ingestion (see ``candy_store.build_store``)
+and saved with the store, so serving them is a dictionary lookup. They are
+keyed on the dataset version, which changes whenever the CSV does.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from candy_index import CHARACTERISTICS
+
+
+def dataset_version(csv_path):
+    """Cheap version key for the CSV: size and modification time."""
+    stat = os.stat(csv_path)
+    return f'{stat.st_size}-{stat.st_mtime_ns}'
+
+
+def file_sha1(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FlagStats:
+    """Running sums for per-characteristic means and flag/winpercent correlations."""
+
+    def __init__(self):
+        self.count = 0
+        self.sum_win = 0.0
+        self.sum_win_sq = 0.0
+        self.flag_count = np.zeros(len(CHARACTERISTICS), dtype=np.int64)
+        self.flag_win = np.zeros(len(CHARACTERISTICS))
+
+    def update(self, flags, winpercent):
+        # flags: (rows, len(CHARACTERISTICS)) bool, winpercent: (rows,)
+        win = np.asarray(winpercent, dtype=np.float64)
+        flags = np.asarray(flags, dtype=bool)
+        self.count += len(win)
+        self.sum_win += win.sum()
+        self.sum_win_sq += (win * win).sum()
+        self.flag_count += flags.sum(axis=0)
+        self.flag_win += win @ flags
+
+    def summary(self):
+        n = self.count
+        result = {}
+        for j, name in enumerate(CHARACTERISTICS):
+            k = self.flag_count[j]
+            # Pearson correlation of a 0/1 column with winpercent, from sums
+            cov = n * self.flag_win[j] - k * self.sum_win
+            var_flag = n * k - k * k
+            var_win = n * self.sum_win_sq - self.sum_win ** 2
+            denom = np.sqrt(var_flag * var_win)
+            result[name] = {
+                'share': k / n if n else float('nan'),
+                'mean_winpercent': self.flag_win[j] / k if k else float('nan'),
+                'mean_winpercent_without': (self.sum_win - self.flag_win[j]) / (n - k) if n > k else float('nan'),
+                'correlation': float(cov / denom) if denom > 0 else float('nan'),
+            }
+        return result
+
+
+def summarize(rows, column_stats, flag_stats, sha1=None):
+    """Assemble the summary dictionary stored in the manifest."""
+    return {
+        'rows': rows,
+        'sha1': sha1,
+        'columns': {name: stats.summary() for name, stats in column_stats.items()},
+        'characteristics': flag_stats.summary(),
+    }
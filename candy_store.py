@@ -0,0 +1,435 @@
+"""Compact, memory-mapped columnar copy of the candy dataset.
+
+The first load streams ``data/candy-data.csv`` in chunks into a directory of
+``.npy`` files next to it (flags as bool plus packed bitsets, percents as float32,
+names as a dictionary of UTF-8 strings with int32 codes). Later loads
+memory-map those files read-only, so every Streamlit worker on the host shares
+the same pages instead of parsing the CSV again.
+
+Everything the catalog derives per row is built here too and stored next to
+the columns: the filter index's sort orders, the win-rate order, each row's
+flag code and the similarity search's grouping, and the name dictionary's
+hashes, lookup order and lower-cased copy (see ``candy_names``). A serving
+process then builds no per-candy structure of its own.
+
+Each build goes into its own version directory inside the store directory,
+and a ``CURRENT`` file, replaced atomically, names the published one. Readers
+therefore always find a complete store: a rebuild only swaps the pointer, and
+a failed one leaves the previous version in place. Replaced versions are
+deleted after the swap; a process that still has their files mapped keeps
+its pages, and one that read the old pointer just before retries.
+
+The store can also be built ahead of time, e.g. while building a container
+image, so a new instance starts from that snapshot instead of ingesting the
+CSV first:
+
+    python candy_store.py data/candy-data.csv
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from candy_index import CHARACTERISTICS, CandyIndex, flag_codes, pack_bits, sort_column
+from candy_names import name_hash
+from candy_similar import SimilarityIndex, group_by_code
+from candy_stats import FlagStats, file_sha1, summarize
+from candy_stream import check_index_fits, memory_limit_bytes, new_column_stats, read_chunks
+
+# Bump when the on-disk layout changes so old stores are rebuilt
+STORE_FORMAT = 5
+
+# File in the store directory naming the published version's subdirectory
+POINTER = 'CURRENT'
+
+# Times a reader follows the pointer again when a rebuild removed the version
+# it named before its columns were mapped
+OPEN_ATTEMPTS = 3
+
+PERCENT_COLUMNS = ['sugarpercent', 'pricepercent', 'winpercent']
+
+
+def default_store_dir(csv_path):
+    base, _ = os.path.splitext(csv_path)
+    return base + '.store'
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _current(store_dir):
+    """The published version's directory and its manifest, or (None, None)."""
+    try:
+        with open(os.path.join(store_dir, POINTER)) as f:
+            version_dir = os.path.join(store_dir, f.read().strip())
+        with open(os.path.join(version_dir, 'manifest.json')) as f:
+            return version_dir, json.load(f)
+    except (OSError, ValueError):
+        return None, None
+
+
+def is_fresh(csv_path, store_dir):
+    """True if the store exists and was built from the current CSV.
+
+    Matching size and mtime are enough. If only the mtime differs (a fresh
+    checkout or image layer holding a store built elsewhere), the CSV's SHA-1
+    is compared with the one the store was built from, and on a match the
+    manifest is re-stamped so the file is hashed only once.
+    """
+    version_dir, manifest = _current(store_dir)
+    if manifest is None or manifest.get('format') != STORE_FORMAT:
+        return False
+    signature = _source_signature(csv_path)
+    if manifest.get('source') == signature:
+        return True
+    if manifest.get('source', {}).get('size') != signature['size']:
+        return False
+    if manifest['summary'].get('sha1') != file_sha1(csv_path):
+        return False
+    manifest['source'] = signature
+    try:
+        _write_file(os.path.join(version_dir, 'manifest.json'), json.dumps(manifest))
+    except OSError:
+        # A read-only snapshot is still usable; it is just hashed again next time
+        pass
+    return True
+
+
+def _write_file(path, text):
+    # Written aside and renamed so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_npy(path, dtype, shape, raw_paths):
+    """Write an .npy file whose body is the concatenation of raw column files."""
+    dtype = np.dtype(dtype)
+    with open(path, 'wb') as out:
+        header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': shape}
+        np.lib.format.write_array_header_1_0(out, header)
+        for raw_path in raw_paths:
+            with open(raw_path, 'rb') as raw:
+                shutil.copyfileobj(raw, out)
+            os.remove(raw_path)
+
+
+class _ColumnWriter:
+    """Append-only raw column file, finished into an .npy once the length is known."""
+
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self._file = open(path + '.raw', 'wb')
+
+    def append(self, values):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self._file.write(values.tobytes())
+        self.length += len(values)
+
+    def close(self):
+        self._file.close()
+        return self.path + '.raw'
+
+    def finish(self):
+        _write_npy(self.path + '.npy', self.dtype, (self.length,), [self.close()])
+
+
+class _StringWriter:
+    """A growing dictionary of strings as a UTF-8 blob plus int64 offsets."""
+
+    def __init__(self, writer, name):
+        self.offsets = writer(name + '_offsets', np.int64)
+        self.blob = writer(name + '_blob', np.uint8)
+        self.offsets.append([0])
+        self.size = 0
+
+    def append(self, encoded):
+        self.offsets.append(self.size + np.cumsum([len(b) for b in encoded], dtype=np.int64))
+        self.blob.append(np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        self.size += sum(len(b) for b in encoded)
+
+    def finish(self):
+        self.offsets.finish()
+        self.blob.finish()
+
+
+def build_store(csv_path, store_dir, memory_limit_mb=None):
+    """Convert the CSV into the columnar layout, replacing any old store.
+
+    The CSV is read in chunks sized from ``memory_limit_mb`` (default
+    ``CANDY_MEMORY_LIMIT_MB``); only the current chunk, the running statistics
+    and finally the filter index's sort orders are held in memory.
+    """
+    signature = _source_signature(csv_path)
+    memory_limit = memory_limit_bytes(memory_limit_mb)
+
+    os.makedirs(store_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.build-', dir=store_dir)
+    version = 'v-' + os.path.basename(tmp_dir)[len('.build-'):]
+    try:
+        manifest = _ingest(csv_path, tmp_dir, memory_limit)
+        manifest['source'] = signature
+        manifest['summary']['sha1'] = file_sha1(csv_path)
+        if _source_signature(csv_path) != signature:
+            # Replaced while being read: the columns may mix both files
+            raise ValueError(f"{csv_path} changed while the store was being built")
+        _write_file(os.path.join(tmp_dir, 'manifest.json'), json.dumps(manifest))
+        os.rename(tmp_dir, os.path.join(store_dir, version))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Publish: readers follow the pointer to either the old or the new version
+    try:
+        _write_file(os.path.join(store_dir, POINTER), version)
+    except BaseException:
+        shutil.rmtree(os.path.join(store_dir, version), ignore_errors=True)
+        raise
+    _remove_replaced(store_dir, version)
+
+
+def _remove_replaced(store_dir, version):
+    """Delete replaced versions and any files of the older one-directory layout.
+
+    Whichever version is current is kept too, as a concurrent build may have
+    published after this one, and so are the dot-named builds in progress.
+    """
+    _, current = os.path.split(_current(store_dir)[0] or '')
+    for entry in os.listdir(store_dir):
+        if entry in (POINTER, version, current) or entry.startswith('.'):
+            continue
+        path = os.path.join(store_dir, entry)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _ingest(csv_path, tmp_dir, memory_limit):
+    """Stream the CSV into column files under ``tmp_dir``; return the manifest."""
+
+    def writer(name, dtype):
+        return _ColumnWriter(os.path.join(tmp_dir, name), dtype)
+
+    # Names as a string dictionary: one UTF-8 blob plus offsets, and a code per
+    # row. The dictionary is built per chunk, so names repeated across chunks
+    # are merged when the store is opened; each entry's hash and first row let
+    # a lookup find the earliest row with a name (see candy_names).
+    name_codes = writer('name_codes', np.int32)
+    names = _StringWriter(writer, 'name')
+    lower_names = _StringWriter(writer, 'name_lower')
+    name_hashes = writer('name_hashes', np.uint64)
+    name_first_rows = writer('name_first_rows', np.int64)
+    n_names = 0
+    codes_column = writer('flag_codes', np.uint16)
+
+    flag_columns = {name: writer(name, bool) for name in CHARACTERISTICS}
+    flag_bits = {name: writer(name + '_bits', np.uint64) for name in CHARACTERISTICS}
+    percent_columns = {name: writer(name, np.float32) for name in PERCENT_COLUMNS}
+    stats = new_column_stats()
+    flag_stats = FlagStats()
+
+    for chunk in read_chunks(csv_path, memory_limit):
+        codes, categories = pd.factorize(chunk['competitorname'])
+        encoded = [name.encode('utf-8') for name in categories]
+        name_codes.append(codes + n_names)
+        names.append(encoded)
+        lower_names.append([name.lower().encode('utf-8') for name in categories])
+        name_hashes.append([name_hash(b) for b in encoded])
+        # Codes count up in order of first appearance
+        name_first_rows.append(name_codes.length - len(codes) + np.unique(codes, return_index=True)[1])
+        n_names += len(encoded)
+
+        # Chunks hold whole 64-row words, so packed bitsets concatenate cleanly
+        flags = chunk[CHARACTERISTICS].to_numpy(dtype=bool)
+        for j, name in enumerate(CHARACTERISTICS):
+            flag_columns[name].append(flags[:, j])
+            flag_bits[name].append(pack_bits(flags[:, j]))
+        codes_column.append(flag_codes(flags))
+        flag_stats.update(flags, chunk['winpercent'].to_numpy())
+
+        for name in PERCENT_COLUMNS:
+            values = chunk[name].to_numpy(dtype=np.float32)
+            percent_columns[name].append(values)
+            stats[name].update(values)
+
+    for column in [name_codes, names, lower_names, name_hashes, name_first_rows, codes_column,
+                   *flag_columns.values(), *percent_columns.values()]:
+        column.finish()
+    rows = name_codes.length
+    n_words = flag_bits[CHARACTERISTICS[0]].length
+    _write_npy(
+        os.path.join(tmp_dir, 'bitsets.npy'), np.uint64, (len(CHARACTERISTICS), n_words),
+        [flag_bits[name].close() for name in CHARACTERISTICS],
+    )
+
+    # Sorting needs the whole column, so this is where the memory ceiling bites;
+    # the sorts run one at a time, each within the index's per-row budget
+    check_index_fits(rows, memory_limit)
+
+    def load(name):
+        return np.load(os.path.join(tmp_dir, name + '.npy'), mmap_mode='r')
+
+    def save(name, array):
+        np.save(os.path.join(tmp_dir, name + '.npy'), array)
+
+    for name in ['sugarpercent', 'pricepercent']:
+        order, sorted_values = sort_column(load(name))
+        save(name + '_order', order)
+        save(name + '_sorted', sorted_values)
+        del order, sorted_values
+    save('winpercent_order', np.argsort(load('winpercent'), kind='stable'))
+
+    order, sorted_sugar, sorted_price = group_by_code(load('flag_codes'), load('sugarpercent'), load('pricepercent'))
+    save('similar_order', order)
+    save('similar_sugar', sorted_sugar)
+    save('similar_price', sorted_price)
+    del order, sorted_sugar, sorted_price
+
+    hashes = load('name_hashes')
+    lookup = np.lexsort((load('name_first_rows'), hashes))
+    save('name_lookup', lookup)
+    save('name_lookup_hashes', hashes[lookup])
+    del hashes, lookup
+
+    return {
+        'format': STORE_FORMAT,
+        'rows': rows,
+        'columns': sorted(name[:-len('.npy')] for name in os.listdir(tmp_dir) if name.endswith('.npy')),
+        'summary': summarize(rows, stats, flag_stats),
+    }
+
+
+def _decode_names(offsets, blob):
+    """The strings of a UTF-8 blob split at ``offsets``.
+
+    The names are joined with NUL separators in one numpy pass, so the blob is
+    decoded and split once rather than slice by slice.
+    """
+    if not len(blob) or 0 in blob:
+        # NUL inside a name (or nothing to join): slice name by name
+        data = blob.tobytes()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+    return np.insert(blob, offsets[1:-1], 0).tobytes().decode('utf-8').split('\0')
+
+
+class CandyStore:
+    """Read-only, memory-mapped view of a built store directory."""
+
+    def __init__(self, store_dir):
+        """Map the published version; FileNotFoundError if there is none.
+
+        Every column is mapped now, so columns first used later (e.g. by the
+        catalog's lazily built DataFrame) still come from this version after
+        a rebuild has replaced and deleted it.
+        """
+        self.store_dir = store_dir
+        for _ in range(OPEN_ATTEMPTS):
+            version_dir, self.manifest = _current(store_dir)
+            if self.manifest is None:
+                break
+            try:
+                self._mapped = {
+                    name: np.load(os.path.join(version_dir, name + '.npy'), mmap_mode='r')
+                    for name in self.manifest['columns']
+                }
+                break
+            except FileNotFoundError:
+                # Replaced and deleted since the pointer was read
+                self.manifest = None
+        if self.manifest is None:
+            raise FileNotFoundError(f"No built store in {store_dir}")
+        self.rows = self.manifest['rows']
+        # Summary statistics accumulated while the store was built
+        self.summary = self.manifest['summary']
+
+    def column(self, name):
+        return self._mapped[name]
+
+    def columns(self):
+        """Every column by name, derived ones included."""
+        return dict(self._mapped)
+
+    def names(self):
+        codes = self.column('name_codes')
+        offsets = self.column('name_offsets')
+        categories = _decode_names(np.asarray(offsets), np.asarray(self.column('name_blob')))
+        # Merge dictionary entries that were repeated across ingestion chunks
+        remap, categories = pd.factorize(pd.Index(categories))
+        if len(categories) < len(remap):
+            codes = remap[codes]
+        return pd.Categorical.from_codes(codes, categories=categories)
+
+    def to_frame(self):
+        """DataFrame whose flag and percent columns are views on the mapped files."""
+        columns = {'competitorname': self.names()}
+        for name in CHARACTERISTICS + PERCENT_COLUMNS:
+            columns[name] = self.column(name)
+        return pd.DataFrame(columns, copy=False)
+
+    def similarity_index(self):
+        return SimilarityIndex(
+            self.column('flag_codes'),
+            self.column('sugarpercent'),
+            self.column('pricepercent'),
+            grouped=(self.column('similar_order'), self.column('similar_sugar'), self.column('similar_price')),
+        )
+
+    def index(self):
+        return CandyIndex(
+            self.column('bitsets'),
+            self.rows,
+            self.column('sugarpercent'),
+            self.column('pricepercent'),
+            sugar_sort=(self.column('sugarpercent_order'), self.column('sugarpercent_sorted')),
+            price_sort=(self.column('pricepercent_order'), self.column('pricepercent_sorted')),
+        )
+
+
+def open_store(csv_path, store_dir=None, memory_limit_mb=None):
+    """Open the columnar store for ``csv_path``, (re)building it if stale."""
+    store_dir = store_dir or default_store_dir(csv_path)
+    if not is_fresh(csv_path, store_dir):
+        build_store(csv_path, store_dir, memory_limit_mb)
+    try:
+        return CandyStore(store_dir)
+    except FileNotFoundError:
+        # Removed by a concurrent rebuild between the check and the open
+        build_store(csv_path, store_dir, memory_limit_mb)
+        return CandyStore(store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the columnar store for a candy CSV ahead of time.")
+    parser.add_argument('csv_path', nargs='?', default='data/candy-data.csv')
+    parser.add_argument('--store-dir', help="where to build it (default: next to the CSV)")
+    parser.add_argument('--memory-limit-mb', type=int, help="ingestion memory budget")
+    args = parser.parse_args()
+
+    store_dir = args.store_dir or default_store_dir(args.csv_path)
+    if is_fresh(args.csv_path, store_dir):
+        print(f"{store_dir} is up to date")
+        return
+    build_store(args.csv_path, store_dir, args.memory_limit_mb)
+    print(f"Built {store_dir} ({CandyStore(store_dir).rows:,} rows)")
+
+
+if __name__ == '__main__':
+    main()
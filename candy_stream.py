@@ -0,0 +1,143 @@
+"""Chunked ingestion helpers for candy catalogs larger than RAM.
+
+``read_chunks`` walks the CSV in fixed-size chunks sized from a memory ceiling,
+checking each one with ``validate_chunk``, and ``ColumnStats`` keeps running
+aggregates (count, mean, min/max and a histogram sketch for percentiles) so
+summary numbers never need the whole column in memory.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from candy_index import CHARACTERISTICS
+
+# Memory ceiling for ingestion, overridable with CANDY_MEMORY_LIMIT_MB
+DEFAULT_MEMORY_LIMIT_MB = 512
+
+# Rough in-memory cost of one parsed CSV row (name string + 12 numeric columns)
+CHUNK_ROW_BYTES = 200
+
+# Bytes per row the filter index keeps resident: packed flags, float32
+# sugar/price plus their int64 sort orders and sorted float32 copies
+INDEX_ROW_BYTES = 9 / 8 + 2 * (4 + 8 + 4)
+
+# Value ranges of the percent columns, used to lay out the histogram sketches
+COLUMN_RANGES = {
+    'sugarpercent': (0.0, 1.0),
+    'pricepercent': (0.0, 1.0),
+    'winpercent': (0.0, 100.0),
+}
+
+REQUIRED_COLUMNS = ['competitorname'] + CHARACTERISTICS + list(COLUMN_RANGES)
+
+
+def memory_limit_bytes(memory_limit_mb=None):
+    if memory_limit_mb is None:
+        memory_limit_mb = float(os.environ.get('CANDY_MEMORY_LIMIT_MB', DEFAULT_MEMORY_LIMIT_MB))
+    return int(memory_limit_mb * 1024 * 1024)
+
+
+def chunk_rows(memory_limit):
+    """Rows per chunk: a quarter of the ceiling, rounded to whole 64-row words."""
+    rows = max(64, memory_limit // 4 // CHUNK_ROW_BYTES)
+    return rows // 64 * 64
+
+
+def check_index_fits(rows, memory_limit):
+    needed = rows * INDEX_ROW_BYTES
+    if needed > memory_limit:
+        raise MemoryError(
+            f"The filter index for {rows:,} candies needs about {needed / 2**20:.1f} MB, "
+            f"above the {memory_limit / 2**20:.1f} MB ingestion limit "
+            f"(raise CANDY_MEMORY_LIMIT_MB)."
+        )
+
+
+def validate_chunk(chunk, start=0):
+    """Raise ValueError naming the first bad CSV line found in ``chunk``.
+
+    ``start`` is the position of the chunk's first row in the file.
+    """
+    missing = [name for name in REQUIRED_COLUMNS if name not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    problems = [(chunk['competitorname'].isna(), "competitorname is empty")]
+    for name in CHARACTERISTICS:
+        problems.append((~chunk[name].isin([0, 1]), f"{name} must be 0 or 1"))
+    for name, (lo, hi) in COLUMN_RANGES.items():
+        values = pd.to_numeric(chunk[name], errors='coerce')
+        problems.append((~values.between(lo, hi), f"{name} must be a number from {lo:g} to {hi:g}"))
+    for bad, message in problems:
+        bad = bad.to_numpy()
+        if bad.any():
+            # +2 for the header line and 1-based numbering
+            raise ValueError(f"Line {start + int(bad.argmax()) + 2}: {message}")
+
+
+def read_chunks(csv_path, memory_limit):
+    """Yield validated DataFrame chunks whose length is a multiple of 64 (except the last)."""
+    start = 0
+    # Types are inferred per chunk, so a chunk of numeric-looking names would
+    # otherwise come back as numbers
+    reader = pd.read_csv(csv_path, chunksize=chunk_rows(memory_limit), dtype={'competitorname': str})
+    for chunk in reader:
+        validate_chunk(chunk, start)
+        start += len(chunk)
+        yield chunk
+    if not start:
+        raise ValueError(f"{csv_path} has no candies")
+
+
+class ColumnStats:
+    """Running count/mean/min/max plus a fixed-bin histogram for percentiles."""
+
+    def __init__(self, lo, hi, bins=1000):
+        self.lo, self.hi = lo, hi
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.histogram = np.zeros(bins, dtype=np.int64)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        self.count += len(values)
+        self.total += values.sum()
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        bins = len(self.histogram)
+        slots = ((values - self.lo) / (self.hi - self.lo) * bins).astype(np.int64)
+        self.histogram += np.bincount(np.clip(slots, 0, bins - 1), minlength=bins)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float('nan')
+
+    def quantile(self, q):
+        """Approximate quantile, accurate to one histogram bin."""
+        if not self.count:
+            return float('nan')
+        cumulative = np.cumsum(self.histogram)
+        slot = int(np.searchsorted(cumulative, q * self.count, side='left'))
+        width = (self.hi - self.lo) / len(self.histogram)
+        value = self.lo + (slot + 0.5) * width
+        return float(min(max(value, self.min), self.max))
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': float(self.min),
+            'max': float(self.max),
+            'p25': self.quantile(0.25),
+            'median': self.quantile(0.5),
+            'p75': self.quantile(0.75),
+        }
+
+
+def new_column_stats():
+    return {name: ColumnStats(lo, hi) for name, (lo, hi) in COLUMN_RANGES.items()}
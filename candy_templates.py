@@ -0,0 +1,186 @@
+"""Precompiled HTML for the dashboard's cards, styles and info boxes.
+
+The markup is written once here and minified at import into format
+strings, so a rerun only fills in candy values instead of rebuilding large
+f-string blobs. Repeated inline styles live in
+``PAGE_STYLE`` as classes, which keeps each card down to its content.
+
+``card_row`` puts a whole row of cards in one element, rather than one
+``st.markdown`` call per card. Streamlit re-sends every element on each
+rerun, but the browser keeps any element at least
+``global.minCachedMessageSize`` bytes long (see .streamlit/config.toml) and
+later reruns only send its hash. That covers the style sheet, card rows and
+static boxes, so unchanged ones cross the websocket once per session.
+"""
+
+import html
+import re
+
+
+def minify_html(markup):
+    """Collapse runs of whitespace and drop whitespace between tags."""
+    return re.sub(r'>\s+<', '><', re.sub(r'\s+', ' ', markup)).strip()
+
+
+def minify_css(css):
+    """``minify_html`` plus no whitespace around CSS punctuation."""
+    return re.sub(r'\s*([{};:,>])\s*', r'\1', minify_html(css)).replace(';}', '}')
+
+
+# Custom CSS for Halloween theme with improved readability
+PAGE_STYLE = '<style>' + minify_css("""
+    .stApp {
+        background-color: #F8F0E3;
+        color: #333333;
+    }
+    h1, h2, h3, h4, h5 {
+        color: #D35400;
+        font-family: 'Arial', sans-serif;
+    }
+    .stPlotlyChart {
+        background-color: #FFFFFF;
+    }
+    .stButton>button {
+        color: #FFFFFF;
+        background-color: #D35400;
+        border-radius: 5px;
+    }
+    .stTextInput>div>div>input {
+        color: #333333;
+    }
+    .stSelectbox>div>div>select {
+        color: #333333;
+    }
+    .stMultiSelect>div>div>select {
+        color: #333333;
+    }
+    .candy-row {
+        display: grid;
+        gap: 1rem;
+    }
+    .candy-card {
+        background-color: white;
+        border-radius: 10px;
+        padding: 20px;
+        margin-bottom: 20px;
+        border: 2px solid #D35400;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        height: 370px;
+    }
+    .candy-card .candy-name {
+        font-size: 18px;
+        text-align: center;
+        color: #D35400;
+    }
+    .candy-card hr {
+        border-top: 1px solid #D35400;
+    }
+    .section-divider {
+        border-top: 2px solid #D35400;
+        margin: 30px 0;
+    }
+    .metric-label {
+        padding-top: 40px;
+        font-size: 16px;
+        font-weight: bold;
+    }
+    .info-box {
+        background-color: #2E2E2E;
+        color: white;
+        border-radius: 10px;
+        padding: 20px;
+        margin-top: 20px;
+    }
+    .info-box h4, .info-box a {
+        color: #FF6600;
+    }
+    .info-box .analysis-link {
+        text-decoration: none;
+        color: white;
+        background-color: #D35400;
+        padding: 10px 20px;
+        border-radius: 5px;
+    }
+""") + '</style>'
+
+SECTION_DIVIDER = "<div class='section-divider'></div>"
+
+_CARD = minify_html("""
+    <div class="candy-card">
+        <p class="candy-name"><strong>{name}</strong></p>
+        <hr>
+        {fields}
+    </div>
+""").format
+_FIELD = '<p><strong>{}:</strong> {}</p>'.format
+_ROW = '<div class="candy-row" style="grid-template-columns:repeat({columns},1fr)">{cards}</div>'.format
+_METRIC_LABEL = "<h4 class='metric-label'>{}</h4>".format
+_INFO_BOX = '<div class="info-box"><h4>{title}</h4>{body}</div>'.format
+
+
+def card_template(labels):
+    """A card layout with ``labels`` in order, compiled to one format string.
+
+    Returns ``card(name, *values)``, with one value per label.
+    """
+    layout = _CARD(name='{}', fields=''.join(_FIELD(label, '{}') for label in labels)).format
+
+    def card(name, *values):
+        return layout(html.escape(name, quote=False), *values)
+    return card
+
+
+# Top Recommendations and Create Your Own Potion cards
+RECOMMENDATION_CARD = card_template(["Characteristics", "Win Percentage", "Sugar Percentile", "Price Percentile"])
+PICK_CARD = card_template(["Win Percentage", "Sugar Percentile", "Price Percentile", "Characteristics"])
+
+
+def card_row(cards, columns=3):
+    """Cards side by side in a single element."""
+    return _ROW(columns=columns, cards=''.join(cards))
+
+
+def metric_label(label):
+    return _METRIC_LABEL(label)
+
+
+def info_box(title, body):
+    """A dark box with an orange title; ``body`` is minified HTML."""
+    return _INFO_BOX(title=title, body=minify_html(body))
+
+
+WHY_THESE_CANDIES = info_box("Why These 3 Candies? 🎃", """
+    <p>
+        Our selection of top candies is based on a careful, data-driven approach to ensure they’re a Halloween hit, considering:
+    </p>
+    <ul>
+        <li><strong>Popularity</strong> 🏆: These treats have consistently won in head-to-head matchups, making them crowd favorites.</li>
+        <li><strong>Balanced Flavors</strong> 🍭: We’ve chosen a variety of sweet, rich, and fruity options to cater to diverse tastes.</li>
+        <li><strong>Variety</strong> 🍫: From chewy to crunchy, we’ve included something for every texture preference.</li>
+        <li><strong>Affordability</strong> 💸: By analyzing price data, we've ensured the selection fits within a reasonable budget without sacrificing quality.</li>
+        <li><strong>Safety</strong> 🧙‍♀️: Allergy considerations are taken into account to keep all trick-or-treaters safe.</li>
+    </ul>
+    <p><strong>Curious about the data behind our candy selection?</strong> Click the button below to dive deeper into our detailed analysis!</p>
+    <a class="analysis-link" href='https://halloween-candy-rankings-analysis.netlify.app/' target='_blank'>🔍 Dive into Our Analysis</a>
+""")
+
+FINAL_THOUGHTS = info_box("🎭 Final Thoughts", """
+    <p>Remember, the perfect Halloween candy assortment often includes a mix of different types, flavors, and price points to appeal to a wide range of trick-or-treaters.
+    Feel free to adjust your selection based on this analysis to create the ultimate Halloween treat experience!</p>
+""")
+
+ABOUT = info_box("About This Dashboard", """
+    <p>
+    Welcome to our spooktacular candy selection tool! Discover the perfect mix of treats for your trick-or-treaters using our data-driven approach.
+    Explore our top recommendations or create your own haunting blend of sweets!
+    </p>
+    <p>
+        <a href="https://mavenanalytics.io/challenges/maven-halloween-challenge/701f06a2-a19b-41e9-95d3-37a0dcc5492f">Created for Maven Halloween Challenge</a>
+    </p>
+    <p>Connect with me:</p>
+    <ul>
+        <li><a href="https://www.linkedin.com/in/santanu-jha-845510292/">LinkedIn</a></li>
+        <li><a href="https://github.com/jhasantanu9">GitHub</a></li>
+        <li><a href="https://santanujha.netlify.app/">Portfolio</a></li>
+    </ul>
+""")
@@ -0,0 +1,117 @@
+"""Per-candy view models for the dashboard cards and radar charts.
+
+``CandyViews`` finds a candy's row through the store's name index (see
+``candy_names``), then builds its ``CandyView`` (characteristics string,
+formatted metrics, radar values) the first time it is asked for and memoizes
+it. Rendering a selection is then a handful of lookups instead of DataFrame
+scans, and only the candies actually shown cost any memory.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from candy_index import CHARACTERISTICS
+
+# Card labels for each characteristic, in CHARACTERISTICS order
+CHARACTERISTIC_LABELS = [
+    'Chocolate', 'Fruity', 'Caramel', 'Peanuts/Almonds', 'Nougat',
+    'Crispy/Wafer', 'Hard', 'Bar', 'Pluribus',
+]
+
+RADAR_CATEGORIES = [
+    'Win %', 'Sugar %', 'Price %', 'Chocolate', 'Fruity', 'Peanut/Almond',
+    'Nougat', 'Crispy/Wafer', 'Hard', 'Bar', 'Pluribus',
+]
+
+# The characteristics on the radar chart (caramel has no axis), after the three percentages
+RADAR_FLAGS = [
+    CHARACTERISTICS.index(name) for name in [
+        'chocolate', 'fruity', 'peanutyalmondy', 'nougat', 'crispedricewafer', 'hard', 'bar', 'pluribus',
+    ]
+]
+
+CandyView = namedtuple('CandyView', [
+    'name',
+    'position',          # row position in the dataset
+    'flags',             # frozenset of the characteristic columns that are set
+    'characteristics',   # e.g. "Chocolate, Caramel, Bar"
+    'winpercent', 'sugarpercent', 'pricepercent',
+    'win_text',          # "84.18%"
+    'sugar_text',        # "72.00th"
+    'price_text',        # "65.10th"
+    'radar',             # values for RADAR_CATEGORIES, on a 0-100 scale
+])
+
+
+class CandyViews:
+    """Name-keyed, memoized CandyView lookup for one dataset version."""
+
+    def __init__(self, names, columns):
+        # ``names`` is a candy_names.CandyNames and ``columns`` maps column
+        # names to arrays; a name's first row wins, like the .iloc[0] lookups
+        # this replaces
+        self._names = names
+        self._flags = [columns[name] for name in CHARACTERISTICS]
+        self._win = columns['winpercent']
+        self._sugar = columns['sugarpercent']
+        self._price = columns['pricepercent']
+        self._views = {}
+
+    def with_winpercent(self, winpercent):
+        """A copy using new win rates; the name lookup is shared, not rebuilt."""
+        views = object.__new__(CandyViews)
+        views.__dict__.update(self.__dict__)
+        views._win = np.asarray(winpercent)
+        views._views = {}
+        return views
+
+    def positions(self, names):
+        """Row positions for ``names``; raises KeyError for unknown names."""
+        positions = self._names.lookup(names)
+        for name, position in zip(names, positions):
+            if position < 0:
+                raise KeyError(name)
+        return positions.tolist()
+
+    def __contains__(self, name):
+        return self._names.lookup([name])[0] >= 0
+
+    def __getitem__(self, name):
+        view = self._views.get(name)
+        if view is None:
+            view = self._views[name] = self._build(name)
+        return view
+
+    def _build(self, name):
+        [position] = self.positions([name])
+        row_flags = [bool(column[position]) for column in self._flags]
+        # The store keeps float32; take the shortest decimal that round-trips
+        # (0.72, not 0.7200000286102295), so averages carry no float32 noise
+        win, sugar, price = (
+            float(str(np.float32(column[position]))) for column in (self._win, self._sugar, self._price)
+        )
+        return CandyView(
+            name=name,
+            position=position,
+            flags=frozenset(c for c, is_set in zip(CHARACTERISTICS, row_flags) if is_set),
+            characteristics=", ".join(
+                label for label, is_set in zip(CHARACTERISTIC_LABELS, row_flags) if is_set
+            ),
+            winpercent=win,
+            sugarpercent=sugar,
+            pricepercent=price,
+            win_text=f"{win:.2f}%",
+            sugar_text=f"{sugar*100:.2f}th",
+            price_text=f"{price*100:.2f}th",
+            radar=[win, sugar * 100, price * 100] + [100 if row_flags[j] else 0 for j in RADAR_FLAGS],
+        )
+
+    def averages(self, names):
+        """Mean win rate, sugar and price percentile (0-100) over the named candies."""
+        views = [self[name] for name in names]
+        return (
+            np.mean([v.winpercent for v in views]),
+            np.mean([v.sugarpercent for v in views]) * 100,
+            np.mean([v.pricepercent for v in views]) * 100,
+        )
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from candy_index import CHARACTERISTICS  # noqa: E402
+from candy_stream import CHUNK_ROW_BYTES  # noqa: E402
+
+# Ingestion memory limit (MB) giving 64-row chunks, so a few hundred candies
+# already span several chunks
+SMALL_CHUNKS_MB = 64 * CHUNK_ROW_BYTES * 4 / 2**20
+
+
+def make_candies(names, seed=0):
+    """A catalog DataFrame with the dataset's columns and random values."""
+    rng = np.random.default_rng(seed)
+    rows = len(names)
+    data = {'competitorname': list(names)}
+    for name in CHARACTERISTICS:
+        data[name] = (rng.random(rows) < 0.4).astype(np.int64)
+    data['sugarpercent'] = rng.integers(0, 1000, rows) / 1000
+    data['pricepercent'] = rng.integers(0, 1000, rows) / 1000
+    data['winpercent'] = (20 + 70 * rng.random(rows)).round(6)
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def write_candies(tmp_path):
+    """Write a catalog CSV under the test's directory; returns its path."""
+
+    def write(frame, name='candy-data.csv'):
+        path = str(tmp_path / name)
+        frame.to_csv(path, index=False)
+        return path
+
+    return write
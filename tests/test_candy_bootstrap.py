@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pytest
+
+import candy_bootstrap
+from candy_bootstrap import BOOTSTRAP_MAX_ROWS, correlation_intervals, selection_intervals
+
+
+def correlated(rows, strength, seed=0):
+    rng = np.random.default_rng(seed)
+    flags = rng.random((rows, 3)) < 0.4
+    # Win rate rises with the first flag only
+    win = 45 + strength * flags[:, 0] + rng.normal(0, 10, rows)
+    return flags, win
+
+
+@pytest.mark.parametrize('rows, method', [(85, 'bootstrap'), (BOOTSTRAP_MAX_ROWS + 1, 'fisher')])
+def test_correlation_intervals_bound_the_correlation(rows, method):
+    flags, win = correlated(rows, 15)
+    results = correlation_intervals(flags, win)
+    for j, result in enumerate(results):
+        assert result['method'] == method
+        assert result['correlation'] == pytest.approx(np.corrcoef(flags[:, j], win)[0, 1])
+        assert -1 <= result['low'] <= result['correlation'] <= result['high'] <= 1
+        assert 0 < result['p_value'] <= 1
+    # The real effect is detected, the unrelated flags are not
+    assert results[0]['low'] > 0 and results[0]['p_value'] < 0.01
+    assert all(result['p_value'] > 0.01 for result in results[1:])
+
+
+def test_fisher_interval_width():
+    flags, win = correlated(5000, 0)
+    for result in correlation_intervals(flags, win):
+        z_width = math.atanh(result['high']) - math.atanh(result['low'])
+        assert z_width == pytest.approx(2 * 1.959964 / math.sqrt(5000 - 3))
+
+
+def test_bootstrap_agrees_with_fisher(monkeypatch):
+    flags, win = correlated(BOOTSTRAP_MAX_ROWS, 5)
+    bootstrap = correlation_intervals(flags, win)
+    monkeypatch.setattr(candy_bootstrap, 'BOOTSTRAP_MAX_ROWS', 0)
+    fisher = correlation_intervals(flags, win)
+    for boot, approx in zip(bootstrap, fisher):
+        assert approx['method'] == 'fisher'
+        assert boot['low'] == pytest.approx(approx['low'], abs=0.03)
+        assert boot['high'] == pytest.approx(approx['high'], abs=0.03)
+
+
+def test_selection_intervals():
+    rng = np.random.default_rng(1)
+    columns = [rng.random(200).astype(np.float32), rng.random(200)]
+    positions = np.argsort(columns[0])[-5:]
+    overall = [column.mean(dtype=np.float64) for column in columns]
+    results = selection_intervals(columns, positions, overall)
+    assert results == selection_intervals(columns, positions, overall)
+    for column, mean, result in zip(columns, overall, results):
+        assert result['delta'] == pytest.approx(column[positions].mean(dtype=np.float64) - mean)
+        assert result['low'] <= result['delta'] <= result['high']
+        assert result['n'] == 5
+    # Five of the highest values are far above average
+    assert results[0]['low'] > 0 and results[0]['p_value'] < 0.01
+
+
+def test_empty_selection_is_refused():
+    with pytest.raises(ValueError):
+        selection_intervals([np.arange(10.0)], [], [4.5])
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from candy_core import CandyCatalog
+from candy_facets import FacetCounts
+from candy_index import CHARACTERISTICS, CandyIndex, bitset_rows, flag_codes, pack_bits
+from conftest import make_candies
+
+QUERIES = [
+    ([], (0, 100), (0, 100)),
+    (['chocolate'], (0, 100), (0, 100)),
+    (['chocolate', 'bar', 'caramel'], (0, 100), (0, 100)),
+    ([], (20, 60), (0, 100)),
+    (['fruity'], (0, 100), (10, 10.1)),
+    (['fruity', 'hard'], (25, 75), (40, 90)),
+    (['nougat'], (50, 50), (0, 100)),
+    (list(CHARACTERISTICS), (0, 100), (0, 100)),
+]
+
+
+def mask_filter(frame, flags, sugar_range, price_range):
+    """The pandas mask chain the dashboard used before the index, on the stored float32 values."""
+    mask = pd.Series(True, index=frame.index)
+    for name in flags:
+        mask &= frame[name] == 1
+    for column, (lo, hi) in (('sugarpercent', sugar_range), ('pricepercent', price_range)):
+        values = frame[column].astype(np.float32)
+        mask &= (values >= np.float32(lo / 100)) & (values <= np.float32(hi / 100))
+    return np.flatnonzero(mask.to_numpy())
+
+
+@pytest.fixture(scope='module')
+def candies():
+    # 1000 rows (not a whole number of 64-row words), with sugar on a coarse
+    # grid so range bounds land on ties
+    frame = make_candies([f'Candy {i}' for i in range(1000)])
+    frame['sugarpercent'] = (frame['sugarpercent'] * 20).round() / 20
+    return frame
+
+
+@pytest.fixture(scope='module')
+def catalog(candies, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('index') / 'candy-data.csv')
+    candies.to_csv(path, index=False)
+    return CandyCatalog(path)
+
+
+@pytest.mark.parametrize('flags, sugar_range, price_range', QUERIES)
+def test_filter_matches_mask(candies, catalog, flags, sugar_range, price_range):
+    expected = mask_filter(candies, flags, sugar_range, price_range)
+    np.testing.assert_array_equal(catalog.filter(flags, sugar_range, price_range), expected)
+
+
+@pytest.mark.parametrize('flags, sugar_range, price_range', QUERIES)
+def test_facets_match_mask(candies, catalog, flags, sugar_range, price_range):
+    facets = catalog.facets(flags, sugar_range, price_range)
+    for name in CHARACTERISTICS:
+        expected = mask_filter(candies, sorted(set(flags) | {name}), sugar_range, price_range)
+        assert facets[name] == len(expected), name
+
+
+def test_bitset_rows():
+    rng = np.random.default_rng(0)
+    for size in [0, 1, 63, 64, 65, 1000]:
+        # Runs of set and clear rows, so whole words are empty
+        values = np.repeat(rng.random(size // 50 + 1) < 0.3, 50)[:size]
+        np.testing.assert_array_equal(bitset_rows(pack_bits(values)), np.flatnonzero(values))
+        np.testing.assert_array_equal(bitset_rows(pack_bits(np.ones(size, dtype=bool))), np.arange(size))
+
+
+def test_clustered_flags():
+    # Flags set on a few runs of rows leave most bitset words empty
+    rng = np.random.default_rng(2)
+    size = 5000
+    flags = np.zeros((size, len(CHARACTERISTICS)), dtype=bool)
+    for j in range(len(CHARACTERISTICS)):
+        for start in rng.integers(0, size, 5):
+            flags[start:start + 200, j] = True
+    sugar = rng.random(size).astype(np.float32)
+    price = rng.random(size).astype(np.float32)
+    index = CandyIndex.from_flags(flags, sugar, price)
+    facets = FacetCounts(flag_codes(flags), index)
+    for names in (['chocolate'], ['chocolate', 'fruity'], ['hard', 'bar', 'pluribus']):
+        columns = [CHARACTERISTICS.index(name) for name in names]
+        expected = np.flatnonzero(flags[:, columns].all(axis=1))
+        np.testing.assert_array_equal(index.query(names), expected)
+        assert facets.counts(names)[names[0]] == len(expected)
@@ -0,0 +1,96 @@
+import errno
+import os
+
+import numpy as np
+import pytest
+
+import candy_matchups
+from candy_matchups import HEADER, VOTE, MatchupLog, MatchupTracker
+
+NAMES = ['Twix', 'Snickers', 'Skittles', 'Ünïcödé Fudge']
+WIN = [81.6, 76.7, 63.1, 50.0]
+
+
+def test_votes_move_win_rates(tmp_path):
+    path = str(tmp_path / 'votes.log')
+    tracker = MatchupTracker(path, NAMES, WIN, prior_games=10)
+    MatchupLog(path, NAMES).append([0, 0, 2], [2, 3, 3], [True, False, True])
+    assert tracker.refresh() == 3
+    winpercent, offset = tracker.snapshot()
+    assert offset == 3
+    # Skittles beat Twix and lost to the fudge
+    assert winpercent[2] == pytest.approx(100 * (0.631 * 10 + 1) / 12)
+    assert tracker.refresh() == 0
+
+
+def test_log_for_other_candies_is_refused(tmp_path):
+    path = str(tmp_path / 'votes.log')
+    MatchupLog(path, NAMES)
+    with pytest.raises(ValueError, match='another order'):
+        MatchupLog(path, NAMES[::-1])
+    with pytest.raises(ValueError, match='another order'):
+        MatchupTracker(path, NAMES[:3] + ['Unicode Fudge'], WIN)
+    with pytest.raises(ValueError, match='3 candies, not 4|4 candies, not 3'):
+        MatchupLog(path, NAMES[:3])
+
+    (tmp_path / 'other.log').write_bytes(b'not a vote log at all, long enough for a header')
+    with pytest.raises(ValueError, match='not a candy matchup log'):
+        MatchupLog(str(tmp_path / 'other.log'), NAMES)
+
+
+def test_trailing_partial_record_is_not_read(tmp_path):
+    path = str(tmp_path / 'votes.log')
+    log = MatchupLog(path, NAMES)
+    log.append([0, 1], [1, 2], [True, True])
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x00\x00')
+    assert len(log.read()) == 2
+    assert os.path.getsize(path) == HEADER.size + 2 * VOTE.itemsize + 3
+
+
+def test_short_writes_are_completed(tmp_path, monkeypatch):
+    path = str(tmp_path / 'votes.log')
+    log = MatchupLog(path, NAMES)
+    real_write = os.write
+
+    def short_write(fd, data):
+        return real_write(fd, bytes(data[:5]))
+
+    monkeypatch.setattr(candy_matchups.os, 'write', short_write)
+    log.append([0, 1, 2], [1, 2, 3], [True, False, True])
+    votes = log.read()
+    assert votes['a'].tolist() == [0, 1, 2] and votes['b'].tolist() == [1, 2, 3]
+    assert os.path.getsize(path) == HEADER.size + 3 * VOTE.itemsize
+
+
+def test_failed_write_is_cut_to_whole_records(tmp_path, monkeypatch):
+    path = str(tmp_path / 'votes.log')
+    log = MatchupLog(path, NAMES)
+    log.append([0], [1], [True])
+    real_write = os.write
+    calls = []
+
+    def failing_write(fd, data):
+        calls.append(len(data))
+        if len(calls) > 1:
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        # One and a half records, then the disk is full
+        return real_write(fd, bytes(data[:VOTE.itemsize + 4]))
+
+    monkeypatch.setattr(candy_matchups.os, 'write', failing_write)
+    with pytest.raises(OSError):
+        log.append([1, 2, 3], [2, 3, 0], [False, False, False])
+    monkeypatch.undo()
+
+    assert os.path.getsize(path) == HEADER.size + 2 * VOTE.itemsize
+    log.append([3], [0], [True])
+    assert log.read()['a'].tolist() == [0, 1, 3]
+
+
+def test_invalid_votes_are_skipped(tmp_path):
+    path = str(tmp_path / 'votes.log')
+    tracker = MatchupTracker(path, NAMES, WIN)
+    MatchupLog(path, NAMES).append([0, 1, 9], [1, 1, 0], [True, True, True])
+    assert tracker.refresh() == 1
+    assert tracker.skipped == 2
+    np.testing.assert_array_equal(tracker.snapshot()[0] > np.asarray(WIN), [False, True, False, False])
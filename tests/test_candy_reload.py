@@ -0,0 +1,78 @@
+import time
+
+import candy_reload
+from candy_reload import DatasetManager
+from conftest import make_candies
+
+
+def settle(manager):
+    """Poll twice, as the watcher would once a new version has stayed put."""
+    manager.check()
+    return manager.check()
+
+
+def test_reloads_a_replaced_csv(write_candies):
+    path = write_candies(make_candies(['A', 'B', 'C']))
+    manager = DatasetManager(path, watch=False)
+    write_candies(make_candies(['A', 'B', 'C', 'D']))
+    assert settle(manager)
+    assert list(manager.catalog.data['competitorname']) == ['A', 'B', 'C', 'D']
+    assert manager.reloads == 1
+
+
+def test_recovers_after_a_bad_csv(write_candies):
+    path = write_candies(make_candies(['A', 'B', 'C']))
+    manager = DatasetManager(path, watch=False)
+
+    bad = make_candies(['A', 'B', 'C', 'D'])
+    bad.loc[2, 'chocolate'] = 7
+    write_candies(bad)
+    assert not settle(manager)
+    assert 'Line 4: chocolate' in manager.error
+    assert list(manager.catalog.data['competitorname']) == ['A', 'B', 'C']
+    # The failed version is not retried
+    assert not settle(manager)
+
+    write_candies(make_candies(['A', 'B', 'C', 'D', 'E']))
+    assert settle(manager)
+    assert manager.error is None
+    assert list(manager.catalog.data['competitorname']) == ['A', 'B', 'C', 'D', 'E']
+
+
+def test_unexpected_load_errors_keep_the_catalog(write_candies, monkeypatch):
+    path = write_candies(make_candies(['A', 'B', 'C']))
+    manager = DatasetManager(path, watch=False)
+
+    def broken(csv_path):
+        raise KeyError('competitorname')
+
+    monkeypatch.setattr(candy_reload, 'CandyCatalog', broken)
+    write_candies(make_candies(['A', 'B']))
+    assert not settle(manager)
+    assert 'competitorname' in manager.error
+    assert list(manager.catalog.data['competitorname']) == ['A', 'B', 'C']
+
+
+def test_watcher_survives_an_error(write_candies, monkeypatch):
+    path = write_candies(make_candies(['A', 'B', 'C']))
+    failures = []
+    real_version = candy_reload.dataset_version
+
+    def flaky_version(csv_path):
+        if not failures:
+            failures.append(csv_path)
+            raise RuntimeError('disk hiccup')
+        return real_version(csv_path)
+
+    monkeypatch.setattr(candy_reload, 'dataset_version', flaky_version)
+    manager = DatasetManager(path, poll_seconds=0.01)
+    try:
+        write_candies(make_candies(['A', 'B', 'C', 'D']))
+        deadline = time.monotonic() + 10
+        while not manager.reloads and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert failures
+        assert manager.reloads == 1
+        assert manager.error is None
+    finally:
+        manager.stop()
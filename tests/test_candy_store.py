@@ -0,0 +1,124 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import candy_store
+from candy_index import CHARACTERISTICS
+from candy_names import CandyNames
+from candy_store import POINTER, CandyStore, build_store, is_fresh, open_store
+from conftest import SMALL_CHUNKS_MB, make_candies
+
+# Names repeated within and across 64-row chunks, non-ASCII and differing only by case
+NAMES = (
+    [f'Candy {i}' for i in range(60)] + ['Ünïcödé Fudge', 'Candy 3', 'Crème Brûlée', 'candy 3']
+    + ['Candy 3', '巧克力', 'Ünïcödé Fudge', 'Candy 10', '🎃 Pumpkin Bites'] * 20
+    + [f'Candy {i}' for i in range(100, 150)]
+)
+
+
+def test_round_trip(write_candies, tmp_path):
+    frame = make_candies(NAMES)
+    store_dir = str(tmp_path / 'store')
+    build_store(write_candies(frame), store_dir, SMALL_CHUNKS_MB)
+    store = CandyStore(store_dir)
+
+    assert store.rows == len(NAMES)
+    stored = store.to_frame()
+    assert list(stored['competitorname']) == NAMES
+    for name in CHARACTERISTICS:
+        assert stored[name].tolist() == frame[name].astype(bool).tolist()
+    for name in candy_store.PERCENT_COLUMNS:
+        np.testing.assert_array_equal(stored[name], frame[name].to_numpy(dtype=np.float32))
+
+    names = CandyNames(store)
+    assert names.take(np.arange(len(NAMES))) == NAMES
+    expected = [NAMES.index(name) if name in NAMES else -1
+                for name in ['Candy 3', 'candy 3', '巧克力', '🎃 Pumpkin Bites', 'Candy 10', 'Nope']]
+    assert names.lookup(['Candy 3', 'candy 3', '巧克力', '🎃 Pumpkin Bites', 'Candy 10', 'Nope']).tolist() == expected
+
+    found = names.containing('ünïcödé')
+    rows = np.flatnonzero(found[names.codes])
+    assert rows.tolist() == [i for i, name in enumerate(NAMES) if name == 'Ünïcödé Fudge']
+
+
+def test_fresh_after_touch(write_candies, tmp_path):
+    path = write_candies(make_candies(NAMES))
+    store_dir = str(tmp_path / 'store')
+    build_store(path, store_dir, SMALL_CHUNKS_MB)
+    assert is_fresh(path, store_dir)
+    # Same contents with a new mtime, as after a fresh checkout
+    os.utime(path, ns=(1, 1))
+    assert is_fresh(path, store_dir)
+    write_candies(make_candies(NAMES, seed=1))
+    assert not is_fresh(path, store_dir)
+
+
+def test_rebuild_keeps_open_stores(write_candies, tmp_path):
+    path = write_candies(make_candies(['A', 'B']))
+    store_dir = str(tmp_path / 'store')
+    old = open_store(path, store_dir)
+    write_candies(make_candies(['A', 'B', 'C']))
+    new = open_store(path, store_dir)
+
+    assert list(new.names()) == ['A', 'B', 'C']
+    # The replaced version is deleted, but its mapped columns stay readable
+    assert list(old.names()) == ['A', 'B']
+    assert len(os.listdir(store_dir)) == 2
+
+
+def test_failed_build_keeps_the_store(write_candies, tmp_path, monkeypatch):
+    path = write_candies(make_candies(['A', 'B']))
+    store_dir = str(tmp_path / 'store')
+    build_store(path, store_dir)
+    write_candies(make_candies(['A', 'B', 'C']))
+
+    real_write = candy_store._write_file
+
+    def failing_write(target, text):
+        if os.path.basename(target) == POINTER:
+            raise OSError('disk full')
+        real_write(target, text)
+
+    monkeypatch.setattr(candy_store, '_write_file', failing_write)
+    with pytest.raises(OSError):
+        build_store(path, store_dir)
+    assert list(CandyStore(store_dir).names()) == ['A', 'B']
+    assert len(os.listdir(store_dir)) == 2
+
+
+def test_missing_store(tmp_path, write_candies):
+    with pytest.raises(FileNotFoundError):
+        CandyStore(str(tmp_path / 'nothing'))
+
+    path = write_candies(make_candies(['A', 'B']))
+    store_dir = str(tmp_path / 'store')
+    build_store(path, store_dir)
+    os.remove(os.path.join(store_dir, POINTER))
+    assert not is_fresh(path, store_dir)
+    assert list(open_store(path, store_dir).names()) == ['A', 'B']
+
+
+def test_readers_during_rebuilds(write_candies, tmp_path):
+    path = write_candies(make_candies(NAMES))
+    store_dir = str(tmp_path / 'store')
+    build_store(path, store_dir)
+    errors, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                assert CandyStore(store_dir).rows == len(NAMES)
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for _ in range(10):
+            build_store(path, store_dir)
+    finally:
+        done.set()
+        reader.join()
+    assert not errors
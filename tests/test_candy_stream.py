@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from candy_store import CandyStore, build_store
+from candy_stream import memory_limit_bytes, read_chunks
+from conftest import SMALL_CHUNKS_MB, make_candies
+
+
+def test_chunks_are_whole_words(write_candies):
+    path = write_candies(make_candies([f'Candy {i}' for i in range(300)]))
+    lengths = [len(chunk) for chunk in read_chunks(path, memory_limit_bytes(SMALL_CHUNKS_MB))]
+    assert lengths == [64, 64, 64, 64, 44]
+
+
+def test_numeric_looking_names_stay_strings(write_candies, tmp_path):
+    # The second chunk holds nothing but numbers, so its names would parse as ints
+    names = [f'Candy {i}' for i in range(64)] + [str(1000 + i) for i in range(64)] + ['3.5', '007']
+    path = write_candies(make_candies(names))
+    for chunk in read_chunks(path, memory_limit_bytes(SMALL_CHUNKS_MB)):
+        assert chunk['competitorname'].map(type).eq(str).all()
+
+    build_store(path, str(tmp_path / 'store'), SMALL_CHUNKS_MB)
+    assert list(CandyStore(str(tmp_path / 'store')).names()) == names
+
+
+def test_bad_value_names_its_line(write_candies):
+    frame = make_candies([f'Candy {i}' for i in range(100)])
+    frame.loc[70, 'sugarpercent'] = 1.5
+    path = write_candies(frame)
+    with pytest.raises(ValueError, match='Line 72: sugarpercent'):
+        list(read_chunks(path, memory_limit_bytes(SMALL_CHUNKS_MB)))
+
+
+def test_empty_csv_is_refused(write_candies):
+    path = write_candies(make_candies([]))
+    with pytest.raises(ValueError, match='has no candies'):
+        list(read_chunks(path, memory_limit_bytes(SMALL_CHUNKS_MB)))